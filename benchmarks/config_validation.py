@@ -0,0 +1,122 @@
+"""Benchmark validating configuration against the compiled schema.
+
+Usage: python benchmarks/config_validation.py [--dashboards N] [--widgets N] [--runs N]
+
+Generates a configuration with the given number of dashboards sharing a set of
+componentized queries, then times validating it against the compiled schema, the
+per-entity checks of required fields that parsing did before the schema, which check
+no types, and parsing every dashboard including validation.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Import nrdash from the checkout the benchmark is run from, even if it is not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nrdash import parsing, schema  # noqa: E402
+
+DEFAULT_DASHBOARDS = 1000
+
+DEFAULT_WIDGETS = 100
+
+DEFAULT_RUNS = 3
+
+_QUERY_FIELDS = ("output", "display", "title", "event")
+
+_WIDGET_FIELDS = ("query", "row", "column", "width", "height")
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dashboards", type=int, default=DEFAULT_DASHBOARDS)
+    parser.add_argument("--widgets", type=int, default=DEFAULT_WIDGETS)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    args = parser.parse_args()
+
+    config = _create_config(args.dashboards, args.widgets)
+    validate = schema.compile_config_validator()
+    print(
+        f"{args.dashboards} dashboards of {args.widgets} widgets, "
+        f"median of {args.runs} runs"
+    )
+    print(f"{'check':<26} {'s':>6}")
+    print(f"{'compiled schema':<26} {_time(validate, config, args.runs):>6.3f}")
+    print(
+        f"{'per-entity required fields':<26} "
+        f"{_time(_check_required_fields, config, args.runs):>6.3f}"
+    )
+    print(
+        f"{'parse with validation':<26} "
+        f"{_time(parsing.parse_dashboards, config, args.runs):>6.3f}"
+    )
+
+
+def _check_required_fields(config):
+    """Check required fields the way parsing did before the schema, entity by entity."""
+    for query_name, query_config in config["queries"].items():
+        for field_name in _QUERY_FIELDS:
+            if field_name not in query_config:
+                raise KeyError(query_name, field_name)
+
+    for dashboard_name, dashboard_config in config["dashboards"].items():
+        priority = dashboard_config.get("priority", 0)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise TypeError(dashboard_name)
+
+        for widget_config in dashboard_config["widgets"]:
+            for field_name in _WIDGET_FIELDS:
+                if field_name not in widget_config:
+                    raise KeyError(dashboard_name, field_name)
+
+
+def _create_config(dashboard_count, widget_count):
+    """Create a configuration of dashboards that share componentized queries."""
+    query_count = 100
+    return {
+        "output-selections": {"count": "count(*)"},
+        "displays": {"billboard": {"visualization": "billboard"}},
+        "queries": {
+            f"query-{index}": {
+                "title": f"Query {index}",
+                "event": "Transaction",
+                "output": "count",
+                "display": "billboard",
+            }
+            for index in range(query_count)
+        },
+        "dashboards": {
+            f"dashboard-{index}": {
+                "title": f"Dashboard {index}",
+                "widgets": [
+                    {
+                        "query": f"query-{(index + widget) % query_count}",
+                        "row": widget // 3 + 1,
+                        "column": widget % 3 + 1,
+                        "width": 1,
+                        "height": 1,
+                    }
+                    for widget in range(widget_count)
+                ],
+            }
+            for index in range(dashboard_count)
+        },
+    }
+
+
+def _time(function, config, runs):
+    """Time calling a function with a configuration, returns the median number of seconds."""
+    timings = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        function(config)
+        timings.append(time.perf_counter() - start_time)
+
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    main()
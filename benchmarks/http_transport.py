@@ -0,0 +1,207 @@
+"""Benchmark the HTTP/1.1 connection pool transport against the HTTP/2 transport.
+
+Usage: python benchmarks/http_transport.py [--requests N] [--latency-ms MS] [--pool-size N]
+
+Starts a local stub of the dashboards API that speaks both HTTP/1.1 and HTTP/2 with prior
+knowledge and answers each request after a fixed latency, then sends the same number of
+dashboard lookups through each transport at 1, 8, and 64 concurrent requests. Requires
+the optional HTTP/2 dependencies, installed with pip install nrdash[http2].
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import h2.config
+import h2.connection
+import h2.events
+
+# Import nrdash from the checkout the benchmark is run from, even if it is not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nrdash import transport  # noqa: E402
+
+DEFAULT_REQUESTS = 256
+
+DEFAULT_LATENCY_MS = 20.0
+
+# Matches the default number of connections requests keeps open to each host
+DEFAULT_POOL_SIZE = 10
+
+CONCURRENCY_LEVELS = (1, 8, 64)
+
+_HTTP2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+
+_RESPONSE_BODY = json.dumps(
+    {"dashboards": [{"id": 1, "title": "My Dashboard"}]}
+).encode()
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+    args = parser.parse_args()
+
+    port = _start_stub_server(args.latency_ms / 1000)
+    url = f"http://127.0.0.1:{port}/v2/dashboards.json"
+    transports = (
+        ("HTTP/1.1 pool", lambda: transport.RequestsTransport(args.pool_size)),
+        ("HTTP/2", lambda: transport.Http2Transport(prior_knowledge=True)),
+    )
+
+    print(
+        f"{args.requests} lookups per run, {args.latency_ms:g} ms stub latency, "
+        f"HTTP/1.1 pool of {args.pool_size} connections"
+    )
+    print(
+        f"{'transport':<14} {'concurrency':>11} {'requests/s':>11} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+    for name, create_transport in transports:
+        for concurrency in CONCURRENCY_LEVELS:
+            with contextlib.closing(create_transport()) as http_transport:
+                elapsed, latencies = _run(
+                    http_transport, url, args.requests, concurrency
+                )
+
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+            print(
+                f"{name:<14} {concurrency:>11} {args.requests / elapsed:>11.1f} "
+                f"{statistics.median(latencies) * 1000:>8.1f} {p95 * 1000:>8.1f}"
+            )
+
+
+def _handle_connection(latency):
+    """Create a connection handler that serves HTTP/1.1 or HTTP/2 with prior knowledge."""
+
+    async def handle(reader, writer):
+        try:
+            start = await reader.readexactly(len(_HTTP2_PREFACE))
+        except asyncio.IncompleteReadError:
+            writer.close()
+            return
+
+        if start == _HTTP2_PREFACE:
+            await _serve_http2(reader, writer, start, latency)
+        else:
+            await _serve_http1(reader, writer, start, latency)
+        writer.close()
+
+    return handle
+
+
+def _run(http_transport, url, request_count, concurrency):
+    """Send lookups concurrently, returns the elapsed time and the latency of each lookup."""
+
+    def lookup(_):
+        start_time = time.perf_counter()
+        response = http_transport.request(
+            "GET",
+            url,
+            {"X-Api-Key": "API_KEY"},
+            (10.0, 10.0),
+            params={"filter[title]": "My Dashboard"},
+        )
+        if response.status_code != 200:
+            sys.exit(f"Stub responded with status {response.status_code}")
+        return time.perf_counter() - start_time
+
+    # Warm up connections so that connection setup is not counted
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lookup, range(concurrency)))
+        start_time = time.perf_counter()
+        latencies = list(executor.map(lookup, range(request_count)))
+
+    return time.perf_counter() - start_time, latencies
+
+
+async def _serve_http1(reader, writer, buffer, latency):
+    """Serve keep-alive HTTP/1.1 requests one at a time, as HTTP/1.1 requires."""
+    while True:
+        while b"\r\n\r\n" not in buffer:
+            data = await reader.read(65536)
+            if not data:
+                return
+            buffer += data
+
+        head, _, buffer = buffer.partition(b"\r\n\r\n")
+        content_length = 0
+        for line in head.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                content_length = int(value)
+
+        while len(buffer) < content_length:
+            buffer += await reader.read(65536)
+        buffer = buffer[content_length:]
+
+        await asyncio.sleep(latency)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(_RESPONSE_BODY)}\r\n\r\n".encode()
+            + _RESPONSE_BODY
+        )
+        await writer.drain()
+
+
+async def _serve_http2(reader, writer, preface, latency):
+    """Serve HTTP/2 requests, answering each stream concurrently."""
+    connection = h2.connection.H2Connection(
+        config=h2.config.H2Configuration(client_side=False)
+    )
+    connection.initiate_connection()
+    events = connection.receive_data(preface)
+    writer.write(connection.data_to_send())
+
+    async def respond(stream_id):
+        await asyncio.sleep(latency)
+        connection.send_headers(
+            stream_id,
+            [
+                (":status", "200"),
+                ("content-type", "application/json"),
+                ("content-length", str(len(_RESPONSE_BODY))),
+            ],
+        )
+        connection.send_data(stream_id, _RESPONSE_BODY, end_stream=True)
+        writer.write(connection.data_to_send())
+
+    while True:
+        for event in events:
+            if isinstance(event, h2.events.DataReceived):
+                connection.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id
+                )
+            elif isinstance(event, h2.events.StreamEnded):
+                asyncio.ensure_future(respond(event.stream_id))
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                return
+
+        writer.write(connection.data_to_send())
+        data = await reader.read(65536)
+        if not data:
+            return
+        events = connection.receive_data(data)
+
+
+def _start_stub_server(latency):
+    """Start the stub API server in a background thread, returns the port it listens on."""
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(
+        asyncio.start_server(_handle_connection(latency), "127.0.0.1", 0)
+    )
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1]
+
+
+if __name__ == "__main__":
+    main()
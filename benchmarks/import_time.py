@@ -0,0 +1,101 @@
+"""Benchmark CLI import time, failing if it regresses past a threshold.
+
+Usage: python benchmarks/import_time.py [--threshold-ms MS] [--runs RUNS]
+
+Each run imports the CLI module in a fresh interpreter with -X importtime and the median
+cumulative import time of nrdash.main is compared with the threshold. Third party modules
+the CLI always needs, such as click, are imported first so that only the cost of nrdash
+itself is measured, which does not depend on the versions of those modules installed. The
+modules that the CLI must not import at startup are also checked.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+# nrdash.main itself takes about 10 ms to import once click is loaded
+DEFAULT_THRESHOLD_MS = 25.0
+
+DEFAULT_RUNS = 7
+
+# Third party modules imported before nrdash.main, excluded from its import time
+BASELINE_MODULES = ("click",)
+
+# Heavy modules only needed once a command runs, never at CLI startup
+FORBIDDEN_STARTUP_MODULES = (
+    "requests",
+    "yaml",
+    "nrdash.parsing",
+    "nrdash.new_relic_api",
+)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threshold-ms", type=float, default=DEFAULT_THRESHOLD_MS)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    args = parser.parse_args()
+
+    timings = []
+    imported_modules = set()
+    for _ in range(args.runs):
+        cumulative_us, modules = _measure_import("nrdash.main")
+        timings.append(cumulative_us / 1000)
+        imported_modules.update(modules)
+
+    median_ms = statistics.median(timings)
+    print(
+        f"nrdash.main import time excluding {', '.join(BASELINE_MODULES)}: "
+        f"median {median_ms:.1f} ms, "
+        f"min {min(timings):.1f} ms, max {max(timings):.1f} ms over {args.runs} runs"
+    )
+
+    failed = False
+    for module in FORBIDDEN_STARTUP_MODULES:
+        if module in imported_modules:
+            print(f"FAIL: {module} is imported at CLI startup")
+            failed = True
+
+    if median_ms > args.threshold_ms:
+        print(f"FAIL: import time exceeds threshold of {args.threshold_ms:.1f} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+def _measure_import(module):
+    """Import a module in a fresh interpreter, returning its cumulative import time and all imported modules.
+
+    The baseline modules are imported first, so the cumulative import time of the module
+    excludes them.
+    """
+    imports = "; ".join(f"import {name}" for name in BASELINE_MODULES + (module,))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", imports],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+    cumulative_us = None
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            # Header line
+            continue
+
+        modules.append(name.strip())
+        if name.strip() == module:
+            cumulative_us = int(cumulative)
+
+    return cumulative_us, modules
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Replay a recorded build against a local stub to compare client settings.
+
+Usage: python benchmarks/replay_trace.py TRACE [--dashboards N] [--workers N,N,...]
+       [--adaptive-concurrency] [--hedge-lookups] [--requests-per-second N]
+       [--circuit-breaker-threshold N] [--speedup N]
+
+TRACE is a file recorded with nrdash build --record. Starts a stub of the API that replays
+the latency, status codes, Retry-After headers, and connection failures of the recorded
+requests, then deploys the given number of generated dashboards through it with each
+number of workers and the given client settings, printing how long each build took and
+how many deployments succeeded, failed, or were cancelled.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+# Import nrdash from the checkout the benchmark is run from, even if it is not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nrdash import (  # noqa: E402
+    concurrency,
+    deployment,
+    models,
+    new_relic_api,
+    recording,
+    replay,
+)
+
+DEFAULT_DASHBOARDS = 200
+
+DEFAULT_WORKERS = "1,4,16"
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace")
+    parser.add_argument("--dashboards", type=int, default=DEFAULT_DASHBOARDS)
+    parser.add_argument("--workers", default=DEFAULT_WORKERS)
+    parser.add_argument("--adaptive-concurrency", action="store_true")
+    parser.add_argument("--hedge-lookups", action="store_true")
+    parser.add_argument("--requests-per-second", type=float)
+    parser.add_argument("--circuit-breaker-threshold", type=int, default=10)
+    parser.add_argument("--speedup", type=float, default=1.0)
+    args = parser.parse_args()
+
+    entries = recording.read_trace(args.trace)
+    statuses = sorted(
+        {str(entry.status_code or entry.error.value) for entry in entries}
+    )
+    print(
+        f"Replaying {len(entries)} recorded requests ({', '.join(statuses)}) "
+        f"at {args.speedup:g}x speed, {args.dashboards} dashboards per build"
+    )
+    print(
+        f"{'workers':>7} {'elapsed s':>10} {'deployed':>9} {'failed':>7} {'cancelled':>10}"
+    )
+    payloads = [
+        new_relic_api.render_dashboard_payload(_create_dashboard(index))
+        for index in range(args.dashboards)
+    ]
+    for workers in [int(value) for value in args.workers.split(",")]:
+        with replay.TraceStub(entries, speedup=args.speedup) as stub:
+            with contextlib.closing(stub.create_transport()) as transport:
+                elapsed, report = _build(payloads, transport, workers, args)
+
+        failed = len(report.failures)
+        cancelled = len(report.cancellations)
+        deployed = len(report.results) - failed - cancelled
+        print(
+            f"{workers:>7} {elapsed:>10.2f} {deployed:>9} {failed:>7} {cancelled:>10}"
+        )
+
+
+def _build(payloads, transport, workers, args):
+    """Deploy payloads with the given settings, returns the elapsed time and the report."""
+    limiter = None
+    if args.adaptive_concurrency:
+        limiter = concurrency.AdaptiveConcurrencyLimiter(
+            initial_limit=min(4, workers), max_limit=workers
+        )
+    hedger = None
+    if args.hedge_lookups:
+        hedger = concurrency.RequestHedger(max_workers=workers * 2)
+    client = new_relic_api.NewRelicApiClient(
+        "API_KEY",
+        1,
+        args.requests_per_second,
+        limiter=limiter,
+        circuit_breaker=concurrency.CircuitBreaker(args.circuit_breaker_threshold),
+        hedger=hedger,
+        transport=transport,
+    )
+    start_time = time.perf_counter()
+    report = deployment.deploy_payloads(payloads, [client], max_workers=workers)
+    return time.perf_counter() - start_time, report
+
+
+def _create_dashboard(index):
+    """Create a dashboard with a single widget."""
+    return models.Dashboard(
+        name=f"dashboard-{index}",
+        title=f"Dashboard {index}",
+        widgets=[
+            models.Widget(
+                title="Transactions",
+                query="SELECT count(*) FROM Transaction",
+                visualization=models.WidgetVisualization.BILLBOARD,
+                row=1,
+                column=1,
+                width=1,
+                height=1,
+            )
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
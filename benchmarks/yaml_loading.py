@@ -0,0 +1,119 @@
+"""Benchmark loading configuration with the pure Python and libyaml YAML backends.
+
+Usage: python benchmarks/yaml_loading.py [--dashboards N] [--widgets N] [--runs N]
+
+Generates a configuration with the given number of dashboards sharing a set of queries,
+then times loading it with each available backend, in full, in full while checking the
+default configuration limits, and with a single dashboard selected so that the
+configuration of every other dashboard is skipped.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import yaml
+
+# Import nrdash from the checkout the benchmark is run from, even if it is not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nrdash import loading, models  # noqa: E402
+
+DEFAULT_DASHBOARDS = 1000
+
+DEFAULT_WIDGETS = 10
+
+DEFAULT_RUNS = 3
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dashboards", type=int, default=DEFAULT_DASHBOARDS)
+    parser.add_argument("--widgets", type=int, default=DEFAULT_WIDGETS)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    args = parser.parse_args()
+
+    if "libyaml" not in loading.LOADERS:
+        print("PyYAML was built without libyaml, only the pure Python backend is timed")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = os.path.join(temp_dir, "dashboards.yml")
+        with open(config_path, "w") as config_file:
+            yaml.safe_dump(
+                _create_config(args.dashboards, args.widgets),
+                config_file,
+                sort_keys=False,
+            )
+
+        size_mb = os.path.getsize(config_path) / 1024 / 1024
+        print(
+            f"{args.dashboards} dashboards of {args.widgets} widgets, {size_mb:.1f} MiB, "
+            f"median of {args.runs} runs"
+        )
+        print(
+            f"{'backend':<8} {'full s':>8} {'with limits s':>14} {'one dashboard s':>16}"
+        )
+        selected = {"dashboards": ["dashboard-0"]}
+        for name, loader in sorted(loading.LOADERS.items()):
+            full = _time(config_path, args.runs, loader=loader)
+            limited = _time(
+                config_path, args.runs, limits=models.ParseLimits(), loader=loader
+            )
+            partial = _time(
+                config_path,
+                args.runs,
+                sections=["queries", "dashboards"],
+                entries=selected,
+                loader=loader,
+            )
+            print(f"{name:<8} {full:>8.2f} {limited:>14.2f} {partial:>16.2f}")
+
+
+def _create_config(dashboard_count, widget_count):
+    """Create a configuration of dashboards that share queries."""
+    query_count = max(1, dashboard_count // 10)
+    return {
+        "queries": {
+            f"query-{index}": {
+                "title": f"Query {index}",
+                "nrql": f"SELECT count(*) FROM Transaction WHERE appName = 'app-{index}'",
+                "visualization": "billboard",
+            }
+            for index in range(query_count)
+        },
+        "dashboards": {
+            f"dashboard-{index}": {
+                "title": f"Dashboard {index}",
+                "widgets": [
+                    {
+                        "query": f"query-{(index + widget) % query_count}",
+                        "row": widget // 3 + 1,
+                        "column": widget % 3 + 1,
+                        "width": 1,
+                        "height": 1,
+                    }
+                    for widget in range(widget_count)
+                ],
+            }
+            for index in range(dashboard_count)
+        },
+    }
+
+
+def _time(config_path, runs, **kwargs):
+    """Time loading a configuration file, returns the median number of seconds."""
+    timings = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        with open(config_path) as config_file:
+            loading.load(config_file, **kwargs)
+        timings.append(time.perf_counter() - start_time)
+
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Compiled configuration artifacts holding pre-rendered dashboard payloads.
+
+An artifact is a single binary file laid out as
+
+    header:  magic (4 bytes), format version (uint16), reserved (uint16), entry count (uint32)
+    index:   one entry per dashboard of body offset (uint64), body length (uint32),
+             dashboard offset (uint64), dashboard length (uint32), SHA-256 of body (32 bytes)
+    data:    the request body and the resolved dashboard definition of every dashboard
+
+All integers are little-endian. Request bodies are exactly the account-independent bodies
+produced by render_dashboard_payload, so their hashes match the payload content hashes
+recorded in build journals. Resolved dashboard definitions are compact JSON.
+"""
+import hashlib
+import json
+import mmap
+import struct
+from typing import Iterable, Iterator
+
+from .models import (
+    Dashboard,
+    InvalidCompiledArtifactException,
+    Widget,
+    WidgetVisualization,
+)
+from .new_relic_api import DashboardPayload, render_dashboard_payload
+
+
+# Version 2 bodies mark dashboards as managed by nrdash so that prune can find them
+FORMAT_VERSION = 2
+
+_MAGIC = b"NRDC"
+_HEADER = struct.Struct("<4sHHI")
+_INDEX_ENTRY = struct.Struct("<QIQI32s")
+
+
+def read_artifact(file_path: str) -> Iterator[DashboardPayload]:
+    """Read the dashboard payloads in an artifact, in the order they were compiled.
+
+    The artifact is memory-mapped and each payload is only read and verified against its
+    hash when it is reached.
+    """
+    with open(file_path, "rb") as artifact_file:
+        try:
+            data = mmap.mmap(artifact_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be memory-mapped
+            raise InvalidCompiledArtifactException(
+                f"{file_path} is not a compiled artifact"
+            )
+
+        with data:
+            entry_count = _read_header(data, file_path)
+            for index in range(entry_count):
+                yield _read_entry(data, index, file_path)
+
+
+def write_artifact(file_path: str, dashboards: Iterable[Dashboard]) -> int:
+    """Render dashboards and write them to an artifact, returns the number of dashboards."""
+    entries = []
+    for dashboard in dashboards:
+        payload = render_dashboard_payload(dashboard)
+        dashboard_json = json.dumps(
+            _dashboard_to_record(dashboard), separators=(",", ":")
+        ).encode()
+        entries.append((payload.body, dashboard_json))
+
+    offset = _HEADER.size + _INDEX_ENTRY.size * len(entries)
+    index = []
+    for body, dashboard_json in entries:
+        digest = hashlib.sha256(body).digest()
+        index.append(
+            _INDEX_ENTRY.pack(
+                offset,
+                len(body),
+                offset + len(body),
+                len(dashboard_json),
+                digest,
+            )
+        )
+        offset += len(body) + len(dashboard_json)
+
+    with open(file_path, "wb") as artifact_file:
+        artifact_file.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, 0, len(entries)))
+        artifact_file.writelines(index)
+        for body, dashboard_json in entries:
+            artifact_file.write(body)
+            artifact_file.write(dashboard_json)
+
+    return len(entries)
+
+
+def _dashboard_from_record(record):
+    """Create a dashboard from its artifact record."""
+    widgets = [
+        Widget(
+            title=widget["title"],
+            query=widget["query"],
+            visualization=WidgetVisualization(widget["visualization"]),
+            row=widget["row"],
+            column=widget["column"],
+            width=widget["width"],
+            height=widget["height"],
+            notes=widget["notes"],
+        )
+        for widget in record["widgets"]
+    ]
+    return Dashboard(
+        name=record["name"],
+        title=record["title"],
+        widgets=widgets,
+        priority=record.get("priority", 0),
+    )
+
+
+def _dashboard_to_record(dashboard):
+    """Convert a dashboard into its artifact record."""
+    return {
+        "name": dashboard.name,
+        "title": dashboard.title,
+        "priority": dashboard.priority,
+        "widgets": [
+            {
+                "title": widget.title,
+                "query": widget.query,
+                "visualization": widget.visualization.value,
+                "row": widget.row,
+                "column": widget.column,
+                "width": widget.width,
+                "height": widget.height,
+                "notes": widget.notes,
+            }
+            for widget in dashboard.widgets
+        ],
+    }
+
+
+def _read_entry(data, index, file_path):
+    """Read and verify a single dashboard payload."""
+    entry_offset = _HEADER.size + _INDEX_ENTRY.size * index
+    (
+        body_offset,
+        body_length,
+        dashboard_offset,
+        dashboard_length,
+        digest,
+    ) = _INDEX_ENTRY.unpack_from(data, entry_offset)
+
+    body_end = body_offset + body_length
+    dashboard_end = dashboard_offset + dashboard_length
+    body = data[body_offset:body_end]
+    dashboard_json = data[dashboard_offset:dashboard_end]
+    if len(body) != body_length or hashlib.sha256(body).digest() != digest:
+        raise InvalidCompiledArtifactException(
+            f"Dashboard {index} in {file_path} is corrupt"
+        )
+
+    try:
+        dashboard = _dashboard_from_record(json.loads(dashboard_json))
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCompiledArtifactException(
+            f"Dashboard {index} in {file_path} is corrupt"
+        )
+
+    return DashboardPayload(dashboard=dashboard, body=body)
+
+
+def _read_header(data, file_path):
+    """Read and validate the artifact header, returns the number of dashboards."""
+    if len(data) < _HEADER.size:
+        raise InvalidCompiledArtifactException(
+            f"{file_path} is not a compiled artifact"
+        )
+
+    magic, version, _, entry_count = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC:
+        raise InvalidCompiledArtifactException(
+            f"{file_path} is not a compiled artifact"
+        )
+
+    if version != FORMAT_VERSION:
+        raise InvalidCompiledArtifactException(
+            f"{file_path} has format version {version}, but only version {FORMAT_VERSION} is supported"
+        )
+
+    if len(data) < _HEADER.size + _INDEX_ENTRY.size * entry_count:
+        raise InvalidCompiledArtifactException(f"{file_path} is truncated")
+
+    return entry_count
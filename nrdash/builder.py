@@ -0,0 +1,256 @@
+"""Library interface for building dashboards from a long-running process.
+
+A Builder keeps its API client, connections, and parsed configuration between calls, so a
+service deploying dashboards on request does not pay for starting the CLI on every call.
+"""
+import collections
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Collection, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+import attr
+import yaml
+
+from . import parsing
+from .defaults import DEFAULT_CONNECT_TIMEOUT, DEFAULT_MAX_WORKERS, DEFAULT_READ_TIMEOUT
+from .deployment import DeploymentAction, DeploymentReport, deploy_payloads
+from .http_cache import ResponseCache
+from .models import NrDashException, ParseLimits
+from .new_relic_api import DashboardPayload, NewRelicApiClient, render_dashboard_payload
+from .transport import create_transport
+
+# A file path or configuration already loaded from YAML
+ConfigSource = Union[str, "os.PathLike[str]", Mapping]
+
+DEFAULT_CONFIG_CACHE_SIZE = 64
+
+
+@attr.s(frozen=True)
+class LintResult:
+    """The result of validating a configuration."""
+
+    valid: bool = attr.ib()
+    dashboard_names: List[str] = attr.ib(factory=list)
+    error: Optional[str] = attr.ib(default=None)
+
+
+@attr.s(frozen=True)
+class PlannedDeployment:
+    """The change building a configuration would make to a single dashboard."""
+
+    dashboard_name: str = attr.ib()
+    title: str = attr.ib()
+    action: DeploymentAction = attr.ib()
+    dashboard_id: Optional[int] = attr.ib(default=None)
+
+
+class Builder:
+    """Builds dashboards on a single account, safe to share between threads.
+
+    Configuration may be given as the path of a YAML file, as configuration already
+    loaded from YAML, or as a YAML document passed with the text keyword. Parsed and
+    rendered configuration is cached, keyed by the file's path, size, and modification
+    time or by a hash of the content, so building unchanged configuration again does not
+    parse it again. Loaded configuration that cannot be hashed, such as a mapping with
+    keys of different types, is parsed on every call.
+
+    Builds of configurations defining dashboards with the same title are run one after
+    the other, so that concurrent builds never create the same dashboard twice. All other
+    calls run concurrently.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        account_id: int,
+        limits: Optional[ParseLimits] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        requests_per_second: Optional[float] = None,
+        timeout: Tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        http2: bool = False,
+        cache_size: int = DEFAULT_CONFIG_CACHE_SIZE,
+    ) -> None:
+        """Initialize builder with the account to build on and how to build."""
+        self._limits = limits or ParseLimits()
+        self._max_workers = max_workers
+        self._cache_size = cache_size
+        self._transport = create_transport(http2, pool_size=max_workers)
+        self._client = NewRelicApiClient(
+            api_key,
+            account_id,
+            requests_per_second,
+            response_cache=ResponseCache(),
+            timeout=timeout,
+            transport=self._transport,
+        )
+        self._payloads: "collections.OrderedDict[str, List[DashboardPayload]]" = (
+            collections.OrderedDict()
+        )
+        self._cache_lock = threading.Lock()
+        self._building_titles: set = set()
+        self._building_changed = threading.Condition()
+
+    def __enter__(self) -> "Builder":
+        """Enter context."""
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        """Close the builder when exiting context."""
+        self.close()
+
+    @property
+    def client(self) -> NewRelicApiClient:
+        """Get the API client used by the builder."""
+        return self._client
+
+    def build(
+        self, config: Optional[ConfigSource] = None, text: Optional[str] = None
+    ) -> DeploymentReport:
+        """Create or update every dashboard in a configuration.
+
+        Raises NrDashException if the configuration is invalid, in which case nothing is
+        deployed.
+        """
+        payloads = self._load_payloads(config, text)
+        titles = {payload.dashboard.title for payload in payloads}
+        with self._claim_titles(titles):
+            return deploy_payloads(
+                payloads,
+                [self._client],
+                max_workers=self._max_workers,
+                # Payloads are already held in memory, but sorting is only needed if the
+                # configuration sets any priorities
+                schedule=any(payload.dashboard.priority for payload in payloads),
+            )
+
+    def close(self) -> None:
+        """Close all connections to the New Relic API."""
+        self._transport.close()
+
+    def lint(
+        self, config: Optional[ConfigSource] = None, text: Optional[str] = None
+    ) -> LintResult:
+        """Validate a configuration without making any API requests."""
+        try:
+            payloads = self._load_payloads(config, text)
+        except (NrDashException, OSError, yaml.YAMLError) as error:
+            return LintResult(valid=False, error=str(error))
+
+        return LintResult(
+            valid=True,
+            dashboard_names=[payload.dashboard.name for payload in payloads],
+        )
+
+    def plan(
+        self, config: Optional[ConfigSource] = None, text: Optional[str] = None
+    ) -> List[PlannedDeployment]:
+        """Determine which dashboards in a configuration would be created or updated.
+
+        Raises NrDashException if the configuration is invalid or a dashboard cannot be
+        looked up.
+        """
+        dashboards = [
+            payload.dashboard for payload in self._load_payloads(config, text)
+        ]
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            dashboard_ids = list(
+                executor.map(
+                    lambda dashboard: self._client.get_dashboard_id_by_title(
+                        dashboard.title
+                    ),
+                    dashboards,
+                )
+            )
+
+        return [
+            PlannedDeployment(
+                dashboard_name=dashboard.name,
+                title=dashboard.title,
+                action=(
+                    DeploymentAction.UPDATED
+                    if dashboard_id
+                    else DeploymentAction.CREATED
+                ),
+                dashboard_id=dashboard_id,
+            )
+            for dashboard, dashboard_id in zip(dashboards, dashboard_ids)
+        ]
+
+    @contextmanager
+    def _claim_titles(self, titles: Collection[str]) -> Iterator[None]:
+        """Wait until no other build deploys any of the titles and claim them until exit."""
+        with self._building_changed:
+            self._building_changed.wait_for(
+                lambda: self._building_titles.isdisjoint(titles)
+            )
+            self._building_titles.update(titles)
+
+        try:
+            yield
+        finally:
+            with self._building_changed:
+                self._building_titles.difference_update(titles)
+                self._building_changed.notify_all()
+
+    def _load_payloads(
+        self, config: Optional[ConfigSource], text: Optional[str]
+    ) -> List[DashboardPayload]:
+        """Parse and render a configuration, using the cache if it was already parsed."""
+        if (config is None) == (text is None):
+            raise ValueError("Exactly one of config and text must be given")
+
+        cache_key = _create_cache_key(config, text)
+        with self._cache_lock:
+            payloads = self._payloads.get(cache_key) if cache_key else None
+            if payloads is not None:
+                self._payloads.move_to_end(cache_key)
+                return payloads
+
+        # Parse outside of the lock so that different configurations are parsed concurrently
+        payloads = [
+            render_dashboard_payload(dashboard)
+            for dashboard in _parse_config(config, text, self._limits).values()
+        ]
+        if cache_key is None:
+            return payloads
+
+        with self._cache_lock:
+            self._payloads[cache_key] = payloads
+            while len(self._payloads) > self._cache_size:
+                self._payloads.popitem(last=False)
+
+        return payloads
+
+
+def _create_cache_key(config, text):
+    """Create the key under which a parsed configuration is cached, None if it cannot be."""
+    if text is not None:
+        return "text:" + hashlib.sha256(text.encode()).hexdigest()
+
+    if isinstance(config, Mapping):
+        try:
+            content = json.dumps(config, sort_keys=True, default=str).encode()
+        except TypeError:
+            # Keys of different types cannot be sorted
+            return None
+        return "dict:" + hashlib.sha256(content).hexdigest()
+
+    # A changed file is parsed again since its size or modification time changes
+    file_path = os.path.abspath(config)
+    status = os.stat(file_path)
+    return f"file:{file_path}:{status.st_size}:{status.st_mtime_ns}"
+
+
+def _parse_config(config, text, limits) -> Dict:
+    """Parse dashboards from any configuration source."""
+    if text is not None:
+        return parsing.parse_string(text, limits)
+
+    if isinstance(config, Mapping):
+        return parsing.parse_dashboards(config, limits)
+
+    return parsing.parse_file(os.fspath(config), limits)
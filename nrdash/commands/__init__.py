@@ -0,0 +1 @@
+"""Implementations of CLI commands, each imported only when its command is run."""
@@ -0,0 +1,265 @@
+"""Implementation of the build command."""
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import click
+
+from nrdash import (
+    artifact,
+    concurrency,
+    defaults,
+    deployment,
+    http_cache,
+    id_cache,
+    journal,
+    new_relic_api,
+    parsing,
+    recording,
+    sharding,
+    transport,
+)
+from nrdash.commands import common
+from nrdash.models import ParseLimits
+
+
+def run(
+    config_files: Sequence[str],
+    *,
+    compiled_file: Optional[str],
+    dashboard_names: Sequence[str],
+    shard: Optional[Tuple[int, int]],
+    shard_results_path: Optional[str],
+    api_key: Optional[str],
+    account_id: Optional[int],
+    extra_accounts: List[Tuple[int, str]],
+    accounts_file: Optional[str],
+    workers: int,
+    adaptive_concurrency: bool,
+    circuit_breaker_threshold: int,
+    requests_per_second: Optional[float],
+    cache_dir: Optional[str],
+    cache_ttl: float,
+    id_cache_path: Optional[str],
+    id_cache_ttl: float,
+    journal_path: Optional[str],
+    resume: bool,
+    max_condition_length: int,
+    max_condition_depth: int,
+    max_aliases: int,
+    max_nodes: int,
+    max_nesting_depth: int,
+    max_nrql_length: int,
+    connect_timeout: float,
+    read_timeout: float,
+    deadline: Optional[float],
+    hedge_lookups: bool,
+    http2: bool,
+    record_path: Optional[str],
+) -> None:
+    """Build New Relic dashboards based on YAML configuration files or a compiled artifact.
+
+    All configuration files are built together, sharing the API clients, connections, and
+    push workers. A single file is deployed while it is parsed, reordering nearby
+    dashboards by priority and estimated cost. With a deadline, or when building several
+    files, every file is parsed before anything is deployed, so the order holds across all
+    dashboards. When building several files, dashboards are looked up in an index of each
+    account built up front. If dashboard names or a shard are provided, only those
+    dashboards are built. Each shard has its own default journal path. If a record path is
+    provided, every API request is recorded to a trace file at that path.
+    """
+    if bool(config_files) == (compiled_file is not None):
+        raise click.UsageError("Exactly one of CONFIG_FILES or --compiled is required")
+
+    limits = ParseLimits(
+        max_condition_length,
+        max_condition_depth,
+        max_aliases,
+        max_nodes,
+        max_nesting_depth,
+        max_nrql_length,
+    )
+    build_shard = sharding.Shard(*shard) if shard else None
+    payloads = _iter_payloads(
+        config_files,
+        compiled_file,
+        limits,
+        _select_dashboards(dashboard_names, build_shard),
+    )
+
+    build_deadline = concurrency.Deadline(deadline) if deadline else None
+    # Every push worker may have a lookup and its duplicate in flight
+    hedger = (
+        concurrency.RequestHedger(max_workers=workers * 2) if hedge_lookups else None
+    )
+    accounts = common.collect_accounts(
+        api_key, account_id, extra_accounts, accounts_file
+    )
+    circuit_breaker = concurrency.CircuitBreaker(circuit_breaker_threshold)
+    response_cache = http_cache.ResponseCache(ttl=cache_ttl, directory=cache_dir)
+    with contextlib.ExitStack() as stack:
+        dashboard_id_cache = None
+        if id_cache_path:
+            dashboard_id_cache = stack.enter_context(
+                id_cache.DashboardIdCache(id_cache_path, id_cache_ttl)
+            )
+
+        recorder = None
+        if record_path:
+            recorder = stack.enter_context(recording.TraceRecorder(record_path))
+
+        # All accounts share one connection pool, or one HTTP/2 connection
+        shared_transport = stack.enter_context(
+            contextlib.closing(transport.create_transport(http2, pool_size=workers))
+        )
+        clients = [
+            new_relic_api.NewRelicApiClient(
+                account.api_key,
+                account.account_id,
+                requests_per_second,
+                limiter=_create_limiter(workers) if adaptive_concurrency else None,
+                circuit_breaker=circuit_breaker,
+                response_cache=response_cache,
+                id_cache=dashboard_id_cache,
+                timeout=(connect_timeout, read_timeout),
+                deadline=build_deadline,
+                hedger=hedger,
+                transport=shared_transport,
+                recorder=recorder,
+            )
+            for account in accounts
+        ]
+
+        if len(config_files) > 1:
+            _load_title_indexes(clients, workers)
+
+        build_journal = stack.enter_context(
+            journal.BuildJournal(
+                journal_path or _get_default_journal_path(build_shard), resume=resume
+            )
+        )
+        report = deployment.deploy_payloads(
+            payloads,
+            clients,
+            max_workers=workers,
+            on_result=_print_result,
+            journal=build_journal,
+            deadline=build_deadline,
+            schedule=True,
+            # A deadline only leaves time for the most important dashboards if the order
+            # holds across all of them, otherwise deployment starts while parsing
+            schedule_window=(
+                None if build_deadline else deployment.DEFAULT_SCHEDULE_WINDOW
+            ),
+        )
+
+    if shard_results_path:
+        sharding.write_results(
+            shard_results_path, build_shard or sharding.Shard(1, 1), report
+        )
+
+    _report(report, len(clients) > 1, build_deadline)
+
+
+def _create_limiter(workers):
+    """Create an adaptive concurrency limiter allowing at most the given number of workers."""
+    return concurrency.AdaptiveConcurrencyLimiter(
+        initial_limit=min(4, workers), max_limit=workers
+    )
+
+
+def _get_default_journal_path(build_shard):
+    """Get the default journal path of a build, which is different for each shard."""
+    if build_shard is None:
+        return defaults.DEFAULT_JOURNAL_PATH
+
+    return defaults.DEFAULT_SHARD_JOURNAL_PATH.format(
+        index=build_shard.index, count=build_shard.count
+    )
+
+
+def _iter_payloads(config_files, compiled_file, limits, dashboard_names):
+    """Iterate the payloads of all dashboards to build, only the named ones if names are provided."""
+    if compiled_file:
+        payloads = artifact.read_artifact(compiled_file)
+        if dashboard_names is None:
+            return payloads
+
+        return (
+            payload for payload in payloads if payload.dashboard.name in dashboard_names
+        )
+
+    if len(config_files) == 1:
+        dashboards = parsing.iter_file(config_files[0], limits, dashboard_names)
+    else:
+        dashboards = parsing.parse_files(config_files, limits, dashboard_names).values()
+
+    return (
+        new_relic_api.render_dashboard_payload(dashboard) for dashboard in dashboards
+    )
+
+
+def _load_title_indexes(clients, workers):
+    """Load the title index of every account concurrently."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(client.load_title_index) for client in clients]
+
+    for client, future in zip(clients, futures):
+        error = future.exception()
+        if error:
+            raise click.ClickException(
+                f"Failed listing dashboards on account {client.account_id}: {error}"
+            )
+
+
+def _print_result(result):
+    """Print the result of deploying a single dashboard."""
+    if result.action is deployment.DeploymentAction.CANCELLED:
+        print(
+            f"Cancelled deploying {result.dashboard_name} to account {result.account_id}: {result.error}"
+        )
+    elif result.error:
+        print(
+            f"Failed deploying {result.dashboard_name} to account {result.account_id}: {result.error}"
+        )
+    else:
+        print(
+            f"{result.action.value.capitalize()} {result.dashboard_name} on account {result.account_id}"
+        )
+
+
+def _select_dashboards(dashboard_names, shard):
+    """Combine the names and shard of the dashboards to build, returns None to build all."""
+    if dashboard_names and shard:
+        return {name for name in dashboard_names if name in shard}
+
+    return set(dashboard_names) or shard or None
+
+
+def _report(report, multiple_accounts, build_deadline):
+    """Print a summary of a build, raising ClickException if any dashboard was not deployed."""
+    deadline_passed = bool(build_deadline and build_deadline.expired)
+    if multiple_accounts or deadline_passed:
+        for summary in report.summarize_by_account():
+            print(
+                f"Account {summary.account_id}: {summary.created} created, "
+                f"{summary.updated} updated, {summary.skipped} skipped, {summary.failed} failed, "
+                f"{summary.cancelled} cancelled"
+            )
+
+    if report.cancellations and deadline_passed:
+        raise click.ClickException(
+            f"Build deadline passed, {len(report.cancellations)} dashboard deployments were not applied, "
+            "rerun with --resume to deploy them"
+        )
+
+    if report.cancellations:
+        raise click.ClickException(
+            f"Build stopped because the New Relic API is unhealthy, {len(report.cancellations)} dashboard deployments "
+            "were cancelled, rerun with --resume to retry them"
+        )
+
+    if report.failures:
+        raise click.ClickException(
+            f"{len(report.failures)} dashboard deployments failed, rerun with --resume to retry them"
+        )
@@ -0,0 +1,37 @@
+"""Helpers shared by the implementations of several commands."""
+from typing import List, Optional, Tuple
+
+import click
+
+from nrdash import parsing
+from nrdash.models import Account
+
+
+def collect_accounts(
+    api_key: Optional[str],
+    account_id: Optional[int],
+    extra_accounts: List[Tuple[int, str]],
+    accounts_file: Optional[str],
+) -> List[Account]:
+    """Collect all accounts specified on the command line."""
+    if (api_key is None) != (account_id is None):
+        raise click.UsageError("--api-key and --account-id must be used together")
+
+    accounts = []
+    if api_key is not None and account_id is not None:
+        accounts.append(Account(account_id=account_id, api_key=api_key))
+
+    accounts.extend(
+        Account(account_id=extra_account_id, api_key=extra_api_key)
+        for extra_account_id, extra_api_key in extra_accounts
+    )
+
+    if accounts_file:
+        accounts.extend(parsing.parse_accounts_file(accounts_file))
+
+    if not accounts:
+        raise click.UsageError(
+            "At least one account is required, use --api-key and --account-id, --account, or --accounts-file"
+        )
+
+    return accounts
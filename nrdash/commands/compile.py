@@ -0,0 +1,31 @@
+"""Implementation of the compile command."""
+from nrdash import artifact, parsing
+from nrdash.models import ParseLimits
+
+
+def run(
+    config_file: str,
+    *,
+    output_file: str,
+    max_condition_length: int,
+    max_condition_depth: int,
+    max_aliases: int,
+    max_nodes: int,
+    max_nesting_depth: int,
+    max_nrql_length: int,
+) -> None:
+    """Compile YAML configuration into an artifact that can be built without parsing."""
+    limits = ParseLimits(
+        max_condition_length,
+        max_condition_depth,
+        max_aliases,
+        max_nodes,
+        max_nesting_depth,
+        max_nrql_length,
+    )
+    dashboard_count = artifact.write_artifact(
+        output_file, parsing.iter_file(config_file, limits)
+    )
+    print(
+        f"Compiled {dashboard_count} dashboards from {config_file} into {output_file}"
+    )
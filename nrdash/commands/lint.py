@@ -0,0 +1,28 @@
+"""Implementation of the lint command."""
+from nrdash import parsing
+from nrdash.models import ParseLimits
+
+
+def run(
+    config_file: str,
+    *,
+    max_condition_length: int,
+    max_condition_depth: int,
+    max_aliases: int,
+    max_nodes: int,
+    max_nesting_depth: int,
+    max_nrql_length: int,
+) -> None:
+    """Lint New Relic dashboard YAML configuration."""
+    parsing.parse_file(
+        config_file,
+        ParseLimits(
+            max_condition_length,
+            max_condition_depth,
+            max_aliases,
+            max_nodes,
+            max_nesting_depth,
+            max_nrql_length,
+        ),
+    )
+    print(f"{config_file} is valid")
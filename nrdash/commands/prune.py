@@ -0,0 +1,77 @@
+"""Implementation of the prune command."""
+from typing import List, Optional, Sequence, Tuple
+
+import click
+
+from nrdash import new_relic_api, parsing, pruning
+from nrdash.commands import common
+from nrdash.models import ParseLimits
+
+
+def run(
+    config_files: Sequence[str],
+    *,
+    api_key: Optional[str],
+    account_id: Optional[int],
+    extra_accounts: List[Tuple[int, str]],
+    accounts_file: Optional[str],
+    workers: int,
+    requests_per_second: Optional[float],
+    delete: bool,
+    max_condition_length: int,
+    max_condition_depth: int,
+    max_aliases: int,
+    max_nodes: int,
+    max_nesting_depth: int,
+    max_nrql_length: int,
+) -> None:
+    """Delete dashboards created by nrdash that are no longer defined in configuration."""
+    limits = ParseLimits(
+        max_condition_length,
+        max_condition_depth,
+        max_aliases,
+        max_nodes,
+        max_nesting_depth,
+        max_nrql_length,
+    )
+    titles = {
+        dashboard.title
+        for dashboard in parsing.parse_files(config_files, limits).values()
+    }
+    accounts = common.collect_accounts(
+        api_key, account_id, extra_accounts, accounts_file
+    )
+    clients = [
+        new_relic_api.NewRelicApiClient(
+            account.api_key, account.account_id, requests_per_second
+        )
+        for account in accounts
+    ]
+
+    results = pruning.prune_dashboards(
+        clients,
+        titles,
+        dry_run=not delete,
+        max_workers=workers,
+        on_result=_print_result,
+    )
+
+    failures = [result for result in results if result.error]
+    if failures:
+        raise click.ClickException(f"Failed deleting {len(failures)} dashboards")
+
+    if not delete and results:
+        print(f"Dry run, rerun with --delete to delete {len(results)} dashboards")
+
+
+def _print_result(result):
+    """Print the result of pruning a single dashboard."""
+    description = (
+        f"'{result.title}' ({result.dashboard_id}) on account {result.account_id}"
+    )
+    if result.error:
+        print(f"Failed deleting {description}: {result.error}")
+    elif result.deleted:
+        print(f"Deleted {description}")
+    else:
+        print(f"Would delete {description}")
@@ -0,0 +1,29 @@
+"""Implementation of the shard-report command."""
+from typing import Sequence
+
+import click
+
+from nrdash import sharding
+
+
+def run(result_files: Sequence[str]) -> None:
+    """Merge the results written by every shard of a build into one summary."""
+    report = sharding.merge_results(result_files)
+    for result in report.failures + report.cancellations:
+        print(
+            f"{result.action.value.capitalize()} deploying {result.dashboard_name} to account {result.account_id}: "
+            f"{result.error}"
+        )
+
+    for summary in report.summarize_by_account():
+        print(
+            f"Account {summary.account_id}: {summary.created} created, "
+            f"{summary.updated} updated, {summary.skipped} skipped, {summary.failed} failed, "
+            f"{summary.cancelled} cancelled"
+        )
+
+    if report.failures or report.cancellations:
+        raise click.ClickException(
+            f"{len(report.failures)} dashboard deployments failed and {len(report.cancellations)} were cancelled "
+            f"across {len(result_files)} shards"
+        )
@@ -0,0 +1,89 @@
+"""Implementation of the verify command."""
+import contextlib
+from typing import Optional, Sequence
+
+import click
+
+from nrdash import http_cache, parsing, transport, verification
+from nrdash.models import ParseLimits
+
+
+def run(
+    config_files: Sequence[str],
+    *,
+    query_key: str,
+    account_id: int,
+    query_url: str,
+    workers: int,
+    requests_per_second: Optional[float],
+    window_minutes: int,
+    cache_dir: Optional[str],
+    cache_ttl: float,
+    allow_no_data: bool,
+    max_condition_length: int,
+    max_condition_depth: int,
+    max_aliases: int,
+    max_nodes: int,
+    max_nesting_depth: int,
+    max_nrql_length: int,
+) -> None:
+    """Run every distinct widget query against the query API to catch broken queries."""
+    limits = ParseLimits(
+        max_condition_length,
+        max_condition_depth,
+        max_aliases,
+        max_nodes,
+        max_nesting_depth,
+        max_nrql_length,
+    )
+    queries = verification.collect_queries(
+        parsing.parse_files(config_files, limits).values()
+    )
+    widget_count = sum(len(widgets) for widgets in queries.values())
+    print(f"Verifying {len(queries)} distinct queries used by {widget_count} widgets")
+
+    response_cache = http_cache.ResponseCache(ttl=cache_ttl, directory=cache_dir)
+    with contextlib.closing(
+        transport.RequestsTransport(pool_size=workers)
+    ) as query_transport:
+        client = verification.NrqlQueryClient(
+            query_key,
+            account_id,
+            query_url,
+            requests_per_second,
+            response_cache=response_cache,
+            transport=query_transport,
+        )
+        results = verification.verify_queries(
+            client,
+            queries,
+            window_minutes=window_minutes,
+            max_workers=workers,
+            on_result=_print_result,
+        )
+
+    failed_statuses = {verification.QueryStatus.ERROR}
+    if not allow_no_data:
+        failed_statuses.add(verification.QueryStatus.NO_DATA)
+
+    failures = [result for result in results if result.status in failed_statuses]
+    if failures:
+        broken_widgets = sum(len(result.widgets) for result in failures)
+        raise click.ClickException(
+            f"{len(failures)} queries failed verification, breaking {broken_widgets} widgets"
+        )
+
+
+def _print_result(result):
+    """Print the result of verifying a single query that failed."""
+    if result.status is verification.QueryStatus.OK:
+        return
+
+    if result.status is verification.QueryStatus.ERROR:
+        print(f"Query failed: {result.error}")
+    else:
+        print("Query returned no data")
+
+    print(f"  {result.nrql}")
+    for dashboard_name, widget_title in result.widgets:
+        print(f"  used by '{widget_title}' on dashboard {dashboard_name}")
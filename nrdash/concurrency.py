@@ -0,0 +1,312 @@
+"""Adaptive concurrency limiting and circuit breaking for New Relic API requests."""
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from enum import Enum, unique
+from typing import Callable, Iterator, Optional, TypeVar
+
+from .models import CircuitOpenException, DeadlineExceededException
+
+_T = TypeVar("_T")
+
+
+@unique
+class RequestOutcome(Enum):
+    """The outcome of a single API request, as far as API health is concerned."""
+
+    SUCCESS = "success"
+    THROTTLED = "throttled"
+    TIMEOUT = "timeout"
+    SERVER_ERROR = "server_error"
+
+
+class AdaptiveConcurrencyLimiter:
+    """Limits the number of requests in flight, adapting the limit to API health (AIMD).
+
+    The limit grows additively, by roughly one request per round of limit requests, while
+    recent p95 latency stays close to the lowest p95 observed. It is cut multiplicatively
+    when a request is throttled, times out, or p95 latency rises past the tolerance.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 2.0,
+        window_size: int = 20,
+    ) -> None:
+        """Initialize limiter."""
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                "Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit"
+            )
+
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._backoff_ratio = backoff_ratio
+        self._latency_tolerance = latency_tolerance
+        self._latencies: collections.deque = collections.deque(maxlen=window_size)
+        self._baseline_p95: Optional[float] = None
+        self._last_backoff_time = float("-inf")
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Get the current number of requests allowed in flight."""
+        with self._condition:
+            return int(self._limit)
+
+    @contextmanager
+    def slot(self) -> Iterator["_Slot"]:
+        """Wait for a free slot and hold it for the duration of a request.
+
+        The outcome of the request must be reported through the slot, requests that raise
+        without reporting an outcome are treated as timeouts.
+        """
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+        slot = _Slot()
+        try:
+            yield slot
+        finally:
+            if slot.outcome is None:
+                slot.outcome = RequestOutcome.TIMEOUT
+
+            with self._condition:
+                self._in_flight -= 1
+                self._on_outcome(slot.outcome, slot.start_time)
+                self._condition.notify_all()
+
+    def _back_off(self, start_time: float) -> None:
+        """Cut the limit multiplicatively and start measuring latency afresh."""
+        # Requests sent before the last back off were sent under the old limit, so they
+        # must not cut the limit again.
+        if start_time < self._last_backoff_time:
+            return
+
+        self._limit = max(self._min_limit, self._limit * self._backoff_ratio)
+        self._latencies.clear()
+        self._last_backoff_time = time.monotonic()
+
+    def _on_outcome(self, outcome: RequestOutcome, start_time: float) -> None:
+        """Adjust the limit based on a completed request, must hold the condition lock."""
+        if outcome is not RequestOutcome.SUCCESS:
+            if outcome is not RequestOutcome.SERVER_ERROR:
+                self._back_off(start_time)
+            return
+
+        self._latencies.append(time.monotonic() - start_time)
+        if len(self._latencies) == self._latencies.maxlen:
+            p95 = _percentile(self._latencies, 0.95)
+            if self._baseline_p95 is None or p95 < self._baseline_p95:
+                self._baseline_p95 = p95
+            elif p95 > self._baseline_p95 * self._latency_tolerance:
+                self._back_off(start_time)
+                return
+
+        self._limit = min(self._max_limit, self._limit + 1.0 / self._limit)
+
+
+class CircuitBreaker:
+    """Stops sending requests once the API appears to be unhealthy.
+
+    The circuit opens after failure_threshold consecutive throttled, timed out, or failed
+    requests. While open, requests fail immediately with CircuitOpenException. After
+    reset_timeout seconds a single trial request is let through, closing the circuit again
+    if it succeeds.
+    """
+
+    def __init__(
+        self, failure_threshold: int = 10, reset_timeout: float = 30.0
+    ) -> None:
+        """Initialize circuit breaker."""
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Determine whether the circuit is currently open."""
+        with self._lock:
+            return self._opened_at is not None
+
+    def check(self) -> None:
+        """Raise CircuitOpenException if a request should not be sent now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed >= self._reset_timeout and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return
+
+        raise CircuitOpenException(
+            f"New Relic API appears unhealthy after {self._consecutive_failures} consecutive failures"
+        )
+
+    def record(self, outcome: RequestOutcome) -> None:
+        """Record the outcome of a request."""
+        with self._lock:
+            self._trial_in_progress = False
+            if outcome is RequestOutcome.SUCCESS:
+                self._consecutive_failures = 0
+                self._opened_at = None
+                return
+
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self._failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class Deadline:
+    """A point in time by which a build must be finished."""
+
+    def __init__(self, seconds: float) -> None:
+        """Initialize deadline the given number of seconds from now."""
+        self._seconds = seconds
+        self._expires_at = time.monotonic() + seconds
+
+    @property
+    def expired(self) -> bool:
+        """Determine whether the deadline has passed."""
+        return time.monotonic() >= self._expires_at
+
+    def check(self) -> None:
+        """Raise DeadlineExceededException if the deadline has passed."""
+        if self.expired:
+            raise DeadlineExceededException(
+                f"Build deadline of {self._seconds:g} seconds has passed"
+            )
+
+    def remaining(self) -> float:
+        """Get the number of seconds left until the deadline."""
+        return max(0.0, self._expires_at - time.monotonic())
+
+
+class RequestHedger:
+    """Cuts tail latency of idempotent requests by sending a duplicate of slow requests.
+
+    If a request has not completed within the given percentile of recent request
+    latencies, counted from when it is sent, a duplicate is sent and whichever completes
+    first is used. Requests are sent without hedging until min_samples latencies have been
+    observed. Each hedged request needs up to two of max_workers threads.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        window_size: int = 100,
+        min_samples: int = 20,
+        max_workers: int = 32,
+    ) -> None:
+        """Initialize hedger."""
+        self._percentile = percentile
+        self._min_samples = min_samples
+        self._latencies: collections.deque = collections.deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="nrdash-hedge"
+        )
+
+    @property
+    def delay(self) -> Optional[float]:
+        """Get the seconds to wait before sending a duplicate, None until enough latencies are known."""
+        with self._lock:
+            if len(self._latencies) < self._min_samples:
+                return None
+            return _percentile(self._latencies, self._percentile)
+
+    def send(self, request: Callable[[], _T]) -> _T:
+        """Send a request, hedging it if it is slow, returns the first successful response."""
+        delay = self.delay
+        if delay is None:
+            return self._timed(request)
+
+        started = threading.Event()
+        primary = self._executor.submit(self._timed, request, started)
+        # A request waiting for a busy executor is not slow, only one that was sent is
+        started.wait()
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        pending = {primary, self._executor.submit(self._timed, request)}
+        failed = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                failed.append(future)
+
+        # Both requests failed, getting the result raises the error of the first one
+        return failed[0].result()
+
+    def _timed(self, request, started=None):
+        """Send a request, recording its latency if it succeeds."""
+        if started:
+            started.set()
+        start_time = time.monotonic()
+        response = request()
+        with self._lock:
+            self._latencies.append(time.monotonic() - start_time)
+        return response
+
+
+class RequestThrottle:
+    """Limits the rate at which requests are made, safe to share between threads."""
+
+    def __init__(self, requests_per_second: Optional[float]) -> None:
+        """Initialize throttle, no throttling is done if requests_per_second is None."""
+        if requests_per_second is not None and requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+
+        if requests_per_second:
+            self._interval = 1.0 / requests_per_second
+        else:
+            self._interval = 0.0
+
+        self._lock = threading.Lock()
+        self._next_request_time = 0.0
+
+    def wait(self) -> None:
+        """Block until the next request is allowed to be made."""
+        if not self._interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            request_time = max(now, self._next_request_time)
+            self._next_request_time = request_time + self._interval
+
+        if request_time > now:
+            time.sleep(request_time - now)
+
+
+class _Slot:
+    """A slot held by a single in-flight request."""
+
+    def __init__(self) -> None:
+        """Initialize slot, starting its latency timer."""
+        self.start_time = time.monotonic()
+        self.outcome: Optional[RequestOutcome] = None
+
+
+def _percentile(values, fraction):
+    """Get the given percentile of a collection of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(fraction * len(ordered)))
+    return ordered[index]
@@ -0,0 +1,45 @@
+"""Default settings shared by the CLI and the modules implementing it.
+
+This module must stay free of imports so that the CLI can use it without slowing startup.
+"""
+
+# Limits on the rendered NRQL of a single condition and on how deeply conditions extend
+# other conditions, generous enough for any realistic condition hierarchy
+DEFAULT_MAX_CONDITION_DEPTH = 64
+
+DEFAULT_MAX_CONDITION_LENGTH = 100_000
+
+# Limits on the YAML of a configuration, with every alias counted as a copy of the node
+# it refers to, and on the NRQL rendered for all widgets. A configuration of a hundred
+# thousand widgets stays well within them, a document whose aliases expand exponentially
+# does not
+DEFAULT_MAX_ALIASES = 100_000
+
+DEFAULT_MAX_NESTING_DEPTH = 64
+
+DEFAULT_MAX_NODES = 10_000_000
+
+DEFAULT_MAX_NRQL_LENGTH = 100_000_000
+
+# Seconds to wait for a connection to the New Relic API and then for each response
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
+DEFAULT_READ_TIMEOUT = 60.0
+
+# Dashboard ids almost never change, a deleted dashboard is detected when updating it
+DEFAULT_ID_CACHE_TTL = 24 * 60 * 60.0
+
+DEFAULT_JOURNAL_PATH = ".nrdash-journal.jsonl"
+
+# Shards built from the same working directory must not clear each other's journal
+DEFAULT_SHARD_JOURNAL_PATH = ".nrdash-journal.{index}-of-{count}.jsonl"
+
+DEFAULT_MAX_WORKERS = 8
+
+DEFAULT_QUERY_URL = "https://insights-api.newrelic.com/v1/accounts/{account_id}/query"
+
+# Queries are verified over a short window so that they return quickly, and the result of
+# each query is reused for an hour since whether a query has data rarely changes
+DEFAULT_VERIFY_WINDOW_MINUTES = 5
+
+DEFAULT_VERIFY_CACHE_TTL = 60 * 60.0
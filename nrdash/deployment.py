@@ -0,0 +1,465 @@
+"""Deploys parsed dashboards to one or more New Relic accounts."""
+import heapq
+import itertools
+import queue
+import threading
+from enum import Enum, unique
+from typing import Callable, Dict, Iterable, List, Optional
+
+import attr
+
+from . import tracing
+from .concurrency import Deadline
+from .defaults import DEFAULT_MAX_WORKERS
+from .journal import BuildJournal, JournalEntry
+from .models import (
+    CircuitOpenException,
+    Dashboard,
+    DashboardNotFoundException,
+    DeadlineExceededException,
+    NewRelicApiException,
+)
+from .new_relic_api import DashboardPayload, NewRelicApiClient, render_dashboard_payload
+
+
+@unique
+class DeploymentAction(Enum):
+    """The outcome of deploying a single dashboard to a single account."""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@attr.s(frozen=True)
+class DashboardResult:
+    """The result of deploying a single dashboard to a single account."""
+
+    account_id: int = attr.ib()
+    dashboard_name: str = attr.ib()
+    action: DeploymentAction = attr.ib()
+    error: Optional[str] = attr.ib(default=None)
+    dashboard_id: Optional[int] = attr.ib(default=None)
+
+
+@attr.s(frozen=True)
+class AccountSummary:
+    """Counts of deployment outcomes for a single account."""
+
+    account_id: int = attr.ib()
+    created: int = attr.ib()
+    updated: int = attr.ib()
+    failed: int = attr.ib()
+    skipped: int = attr.ib(default=0)
+    cancelled: int = attr.ib(default=0)
+
+
+@attr.s(frozen=True)
+class DeploymentReport:
+    """The results of deploying dashboards to all accounts."""
+
+    results: List[DashboardResult] = attr.ib()
+
+    @property
+    def cancellations(self) -> List[DashboardResult]:
+        """Get all results for dashboards that were not attempted because the build stopped."""
+        return [
+            result
+            for result in self.results
+            if result.action is DeploymentAction.CANCELLED
+        ]
+
+    @property
+    def failures(self) -> List[DashboardResult]:
+        """Get all results for dashboards that failed to deploy."""
+        return [
+            result
+            for result in self.results
+            if result.action is DeploymentAction.FAILED
+        ]
+
+    def summarize_by_account(self) -> List[AccountSummary]:
+        """Summarize results for each account, ordered by account id."""
+        counts: Dict[int, Dict[DeploymentAction, int]] = {}
+        for result in self.results:
+            account_counts = counts.setdefault(
+                result.account_id, {action: 0 for action in DeploymentAction}
+            )
+            account_counts[result.action] += 1
+
+        return [
+            AccountSummary(
+                account_id=account_id,
+                created=account_counts[DeploymentAction.CREATED],
+                updated=account_counts[DeploymentAction.UPDATED],
+                failed=account_counts[DeploymentAction.FAILED],
+                skipped=account_counts[DeploymentAction.SKIPPED],
+                cancelled=account_counts[DeploymentAction.CANCELLED],
+            )
+            for account_id, account_counts in sorted(counts.items())
+        ]
+
+
+def deploy_dashboards(
+    dashboards: Iterable[Dashboard],
+    clients: List[NewRelicApiClient],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    on_result: Optional[Callable[[DashboardResult], None]] = None,
+    queue_size: Optional[int] = None,
+    journal: Optional[BuildJournal] = None,
+    deadline: Optional[Deadline] = None,
+    schedule: bool = False,
+    schedule_window: Optional[int] = None,
+) -> DeploymentReport:
+    """Create or update dashboards on every account, pushing to accounts concurrently.
+
+    Dashboards are consumed lazily and each is rendered once into a payload shared by all
+    accounts, see deploy_payloads.
+    """
+    payloads = (render_dashboard_payload(dashboard) for dashboard in dashboards)
+    return deploy_payloads(
+        payloads,
+        clients,
+        max_workers=max_workers,
+        on_result=on_result,
+        queue_size=queue_size,
+        journal=journal,
+        deadline=deadline,
+        schedule=schedule,
+        schedule_window=schedule_window,
+    )
+
+
+def deploy_payloads(
+    payloads: Iterable[DashboardPayload],
+    clients: List[NewRelicApiClient],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    on_result: Optional[Callable[[DashboardResult], None]] = None,
+    queue_size: Optional[int] = None,
+    journal: Optional[BuildJournal] = None,
+    deadline: Optional[Deadline] = None,
+    schedule: bool = False,
+    schedule_window: Optional[int] = None,
+) -> DeploymentReport:
+    """Create or update rendered dashboards on every account, pushing to accounts concurrently.
+
+    Payloads are consumed lazily, so pushes start as soon as the first payload is
+    available, and handed to the push workers through a bounded queue, so at most
+    queue_size payloads are held in memory at a time. Throttling is done per account by
+    each client. The on_result callback, if provided, is called with each result as soon
+    as it is available.
+
+    If a journal is provided, every completed deployment is recorded in it and dashboards
+    the journal shows were already deployed with identical content are skipped.
+
+    If a client's circuit breaker opens, the build stops cleanly: no further payloads are
+    consumed and payloads that are already queued are reported as cancelled.
+
+    If a deadline is provided, no requests are sent once it passes and requests in flight
+    are cut short. Every payload not deployed by then, including those not yet consumed,
+    is reported as cancelled, so the report lists exactly what was and was not deployed.
+
+    If schedule is True, dashboards are pushed in order of priority, highest first, and
+    among dashboards of the same priority in order of estimated cost, cheapest first, see
+    estimate_cost. Without a schedule_window, every payload is consumed before anything is
+    pushed, so the order holds across all dashboards. With a schedule_window, payloads
+    are still consumed lazily: pushes are held back only while the queue is full, at most
+    schedule_window of them, and the first of them in that order is queued whenever the
+    queue has room, so the order only holds among dashboards that are close together. Otherwise dashboards are pushed in the
+    order they are consumed.
+    """
+    if queue_size is None:
+        queue_size = max_workers * 2
+
+    work_queue: "queue.Queue[Optional[_PushTask]]" = queue.Queue(maxsize=queue_size)
+    collector = _ResultCollector(on_result, journal)
+    stop_event = threading.Event()
+    workers = [
+        threading.Thread(
+            target=_push_worker,
+            args=(work_queue, collector, stop_event, deadline),
+            daemon=True,
+        )
+        for _ in range(max_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        if schedule and schedule_window:
+            _enqueue_windowed(
+                payloads,
+                clients,
+                work_queue,
+                collector,
+                journal,
+                deadline,
+                stop_event,
+                schedule_window,
+            )
+        elif schedule:
+            _enqueue_scheduled(payloads, clients, work_queue, collector, journal)
+        else:
+            for payload in payloads:
+                if stop_event.is_set():
+                    break
+
+                _enqueue_payload(
+                    payload, clients, work_queue, collector, journal, deadline
+                )
+    finally:
+        # Let workers finish everything already queued, even if parsing failed part way.
+        for _ in workers:
+            work_queue.put(None)
+
+        for worker in workers:
+            worker.join()
+
+    return DeploymentReport(results=collector.results)
+
+
+def estimate_cost(client: NewRelicApiClient, payload: DashboardPayload) -> float:
+    """Estimate the time taken to deploy a dashboard to an account, in API round trips.
+
+    Every dashboard takes one request to push, plus one to look it up unless its id is
+    already known, plus time for the API to receive and store the payload and widgets.
+    """
+    dashboard = payload.dashboard
+    requests = 2 if client.needs_lookup(dashboard.title) else 1
+    return (
+        requests
+        + len(payload.body) / _BYTES_PER_ROUND_TRIP
+        + len(dashboard.widgets) / _WIDGETS_PER_ROUND_TRIP
+    )
+
+
+# Number of pushes held back to be reordered when scheduling a stream of dashboards
+DEFAULT_SCHEDULE_WINDOW = 256
+
+_DEADLINE_PASSED = "Build deadline passed"
+
+# Rough amounts of payload and widgets that take as long to process as one round trip
+_BYTES_PER_ROUND_TRIP = 256 * 1024
+
+_WIDGETS_PER_ROUND_TRIP = 100
+
+
+@attr.s(frozen=True)
+class _PushTask:
+    """A rendered dashboard waiting to be pushed to a single account."""
+
+    client: NewRelicApiClient = attr.ib()
+    payload: DashboardPayload = attr.ib()
+
+
+class _ResultCollector:
+    """Collects results reported by push workers."""
+
+    def __init__(
+        self,
+        on_result: Optional[Callable[[DashboardResult], None]],
+        journal: Optional[BuildJournal],
+    ) -> None:
+        """Initialize collector with an optional callback for each result and journal."""
+        self.results: List[DashboardResult] = []
+        self._on_result = on_result
+        self._journal = journal
+        self._lock = threading.Lock()
+
+    def add(self, result: DashboardResult, payload: DashboardPayload) -> None:
+        """Record the result of deploying a payload."""
+        if self._journal and result.action is not DeploymentAction.SKIPPED:
+            self._journal.record(
+                JournalEntry(
+                    account_id=result.account_id,
+                    dashboard_name=result.dashboard_name,
+                    action=result.action.value,
+                    payload_hash=payload.content_hash,
+                    dashboard_id=result.dashboard_id,
+                )
+            )
+
+        with self._lock:
+            self.results.append(result)
+            if self._on_result:
+                self._on_result(result)
+
+
+def _cancelled_result(task, error):
+    """Create the result for a dashboard that was not deployed because the build stopped."""
+    return DashboardResult(
+        account_id=task.client.account_id,
+        dashboard_name=task.payload.dashboard.name,
+        action=DeploymentAction.CANCELLED,
+        error=error,
+    )
+
+
+def _create_tasks(payload, clients, collector, journal):
+    """Create tasks pushing a payload to every account it was not already deployed to."""
+    dashboard = payload.dashboard
+    payload_hash = payload.content_hash if journal else None
+    tasks = []
+    for client in clients:
+        if journal and journal.is_complete(
+            client.account_id, dashboard.name, payload_hash
+        ):
+            collector.add(_skipped_result(client, dashboard), payload)
+        else:
+            tasks.append(_PushTask(client=client, payload=payload))
+
+    return tasks
+
+
+def _enqueue_payload(payload, clients, work_queue, collector, journal, deadline):
+    """Queue a payload to be pushed to every account it was not already deployed to."""
+    # Interleave accounts so that throttling on one account does not hold up the others.
+    for task in _create_tasks(payload, clients, collector, journal):
+        _enqueue_task(task, work_queue, collector, deadline)
+
+
+def _enqueue_scheduled(payloads, clients, work_queue, collector, journal):
+    """Queue every payload in order of priority and then of estimated cost.
+
+    Workers report queued tasks as cancelled once the build stops or the deadline passes.
+    """
+    tasks = [
+        task
+        for payload in payloads
+        for task in _create_tasks(payload, clients, collector, journal)
+    ]
+    # Sorting is stable, so dashboards that tie stay in configuration order
+    tasks.sort(key=_schedule_key)
+    for task in tasks:
+        work_queue.put(task)
+
+
+def _enqueue_task(task, work_queue, collector, deadline):
+    """Queue a task to be pushed, or report it as cancelled if the deadline has passed."""
+    if deadline and deadline.expired:
+        collector.add(_cancelled_result(task, _DEADLINE_PASSED), task.payload)
+    else:
+        work_queue.put(task)
+
+
+def _enqueue_windowed(
+    payloads, clients, work_queue, collector, journal, deadline, stop_event, window
+):
+    """Queue payloads as they are consumed, reordering pushes held while the queue is full."""
+    held_tasks = []
+    # Breaks ties in configuration order, like the stable sort of a full schedule
+    sequence = itertools.count()
+    for payload in payloads:
+        if stop_event.is_set():
+            break
+
+        for task in _create_tasks(payload, clients, collector, journal):
+            heapq.heappush(held_tasks, (_schedule_key(task), next(sequence), task))
+        # Tasks wait to be reordered only while the workers are busy, and at most window
+        while held_tasks and (len(held_tasks) > window or not work_queue.full()):
+            _enqueue_task(
+                heapq.heappop(held_tasks)[-1], work_queue, collector, deadline
+            )
+
+    while held_tasks:
+        _enqueue_task(heapq.heappop(held_tasks)[-1], work_queue, collector, deadline)
+
+
+def _deploy_dashboard(
+    client: NewRelicApiClient, payload: DashboardPayload
+) -> DashboardResult:
+    """Create or update a single dashboard on the client's account."""
+    dashboard = payload.dashboard
+    with tracing.span(
+        "deploy_dashboard",
+        account_id=client.account_id,
+        dashboard=dashboard.name,
+        payload_bytes=len(payload.body),
+        retries=0,
+    ) as span:
+        try:
+            try:
+                dashboard_id, action = _push_dashboard(client, payload)
+            except DashboardNotFoundException:
+                # A cached dashboard id was stale, it is no longer cached so look it up again
+                span.set_attribute("retries", 1)
+                dashboard_id, action = _push_dashboard(client, payload)
+        except (CircuitOpenException, DeadlineExceededException):
+            raise
+        except NewRelicApiException as error:
+            span.set_attribute("action", DeploymentAction.FAILED.value)
+            return DashboardResult(
+                account_id=client.account_id,
+                dashboard_name=dashboard.name,
+                action=DeploymentAction.FAILED,
+                error=str(error),
+            )
+
+        span.set_attribute("action", action.value)
+        return DashboardResult(
+            account_id=client.account_id,
+            dashboard_name=dashboard.name,
+            action=action,
+            dashboard_id=dashboard_id,
+        )
+
+
+def _push_dashboard(client, payload):
+    """Update the dashboard if it exists or create it, returns its id and the action taken."""
+    dashboard = payload.dashboard
+    dashboard_id = client.get_dashboard_id_by_title(dashboard.title)
+    if dashboard_id:
+        client.update_dashboard(dashboard_id, dashboard, payload)
+        return dashboard_id, DeploymentAction.UPDATED
+
+    return client.create_dashboard(dashboard, payload), DeploymentAction.CREATED
+
+
+def _push_worker(work_queue, collector, stop_event, deadline):
+    """Push dashboards taken from the work queue until a stop sentinel is received."""
+    while True:
+        task = work_queue.get()
+        if task is None:
+            return
+
+        if stop_event.is_set():
+            collector.add(_cancelled_result(task, "Build stopped"), task.payload)
+            continue
+
+        if deadline and deadline.expired:
+            collector.add(_cancelled_result(task, _DEADLINE_PASSED), task.payload)
+            continue
+
+        try:
+            result = _deploy_dashboard(task.client, task.payload)
+        except CircuitOpenException as error:
+            stop_event.set()
+            result = _cancelled_result(task, str(error))
+        except DeadlineExceededException as error:
+            result = _cancelled_result(task, str(error))
+        except Exception as error:  # pylint: disable=broad-except
+            # Keep the worker alive so the remaining dashboards are still pushed.
+            result = DashboardResult(
+                account_id=task.client.account_id,
+                dashboard_name=task.payload.dashboard.name,
+                action=DeploymentAction.FAILED,
+                error=repr(error),
+            )
+
+        collector.add(result, task.payload)
+
+
+def _schedule_key(task):
+    """Get the key ordering a push by priority, highest first, and then by estimated cost."""
+    return -task.payload.dashboard.priority, estimate_cost(task.client, task.payload)
+
+
+def _skipped_result(client, dashboard):
+    """Create the result for a dashboard that was already deployed."""
+    return DashboardResult(
+        account_id=client.account_id,
+        dashboard_name=dashboard.name,
+        action=DeploymentAction.SKIPPED,
+    )
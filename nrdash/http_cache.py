@@ -0,0 +1,133 @@
+"""Cache of New Relic API GET responses, held in memory and optionally on disk."""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+import attr
+
+
+@attr.s(frozen=True)
+class CachedResponse:
+    """A cached API response."""
+
+    status_code: int = attr.ib()
+    content: bytes = attr.ib()
+    stored_at: float = attr.ib()
+    etag: Optional[str] = attr.ib(default=None)
+    last_modified: Optional[str] = attr.ib(default=None)
+
+    @property
+    def can_revalidate(self) -> bool:
+        """Determine whether the response can be revalidated with a conditional request."""
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Get the headers used to revalidate the response."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def json(self):
+        """Decode the response content as JSON."""
+        return json.loads(self.content)
+
+
+class ResponseCache:
+    """Thread-safe cache of API responses.
+
+    Responses with an ETag or Last-Modified header are revalidated with a conditional
+    request each time they are used. Responses without them are used as-is for ttl
+    seconds. If a directory is provided, responses are also persisted there so that they
+    are reused across runs.
+    """
+
+    def __init__(self, ttl: float = 0.0, directory: Optional[str] = None) -> None:
+        """Initialize cache."""
+        self._ttl = ttl
+        self._directory = directory
+        self._entries: Dict[str, CachedResponse] = {}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Get a cached response, returns None if there is none."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is None and self._directory:
+            entry = self._read_entry(key)
+            if entry:
+                with self._lock:
+                    self._entries[key] = entry
+
+        return entry
+
+    def invalidate(self, key: str) -> None:
+        """Remove a cached response."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+        if self._directory:
+            try:
+                os.remove(self._entry_path(key))
+            except FileNotFoundError:
+                pass
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        """Determine whether a response can be used without contacting the API."""
+        return time.time() - entry.stored_at < self._ttl
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        """Store a response."""
+        with self._lock:
+            self._entries[key] = entry
+
+        if self._directory:
+            self._write_entry(key, entry)
+
+    def _entry_path(self, key):
+        """Get the path of the file a response is persisted to."""
+        file_name = hashlib.sha256(key.encode()).hexdigest() + ".json"
+        return os.path.join(self._directory, file_name)
+
+    def _read_entry(self, key):
+        """Read a persisted response, returns None if there is none or it is unreadable."""
+        try:
+            with open(self._entry_path(key), "r") as entry_file:
+                entry_dict = json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+
+        if entry_dict.pop("key", None) != key:
+            return None
+
+        entry_dict["content"] = entry_dict["content"].encode("latin-1")
+        try:
+            return CachedResponse(**entry_dict)
+        except TypeError:
+            return None
+
+    def _write_entry(self, key, entry):
+        """Persist a response, atomically replacing any previous one."""
+        entry_dict = attr.asdict(entry)
+        # Latin-1 maps every byte to a character, so any content survives the round trip
+        entry_dict["content"] = entry.content.decode("latin-1")
+        entry_dict["key"] = key
+
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self._directory)
+        with os.fdopen(file_descriptor, "w") as entry_file:
+            json.dump(entry_dict, entry_file)
+        os.replace(temp_path, self._entry_path(key))
+
+
+def create_cache_key(*parts) -> str:
+    """Create a cache key from its parts."""
+    return json.dumps(parts, sort_keys=True, separators=(",", ":"))
@@ -0,0 +1,81 @@
+"""Persistent cache of dashboard ids by title, shared by concurrently running builds."""
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from .defaults import DEFAULT_ID_CACHE_TTL
+
+
+# Seconds to wait for another process to release its lock on the cache database
+_BUSY_TIMEOUT = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dashboard_ids (
+    account_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    dashboard_id INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (account_id, title)
+)
+"""
+
+
+class DashboardIdCache:
+    """Cache of dashboard ids by account and title, stored in a SQLite database.
+
+    The database uses write-ahead logging and every read and write is a single statement
+    in its own transaction, so any number of threads and nrdash processes can share the
+    same cache file. Entries are used for ttl seconds after they were stored.
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_ID_CACHE_TTL) -> None:
+        """Open a cache, creating its database if it does not exist."""
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=_BUSY_TIMEOUT, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(_SCHEMA)
+
+    def __enter__(self) -> "DashboardIdCache":
+        """Enter context, the cache is closed on exit."""
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        """Close the cache on exiting context."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the cache database."""
+        with self._lock:
+            self._connection.close()
+
+    def get(self, account_id: int, title: str) -> Optional[int]:
+        """Get the id of the dashboard with a title, returns None if it is not cached or expired."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT dashboard_id FROM dashboard_ids "
+                "WHERE account_id = ? AND title = ? AND stored_at > ?",
+                (account_id, title, time.time() - self._ttl),
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def invalidate(self, account_id: int, dashboard_id: int) -> None:
+        """Remove every entry for a dashboard id, used once the dashboard no longer exists."""
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM dashboard_ids WHERE account_id = ? AND dashboard_id = ?",
+                (account_id, dashboard_id),
+            )
+
+    def put(self, account_id: int, title: str, dashboard_id: int) -> None:
+        """Store the id of the dashboard with a title."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO dashboard_ids "
+                "(account_id, title, dashboard_id, stored_at) VALUES (?, ?, ?, ?)",
+                (account_id, title, dashboard_id, time.time()),
+            )
@@ -0,0 +1,95 @@
+"""Journal of completed dashboard deployments used to resume failed builds."""
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import attr
+
+from .defaults import DEFAULT_JOURNAL_PATH
+
+
+@attr.s(frozen=True)
+class JournalEntry:
+    """A record of deploying a single dashboard to a single account."""
+
+    account_id: int = attr.ib()
+    dashboard_name: str = attr.ib()
+    action: str = attr.ib()
+    payload_hash: str = attr.ib()
+    dashboard_id: Optional[int] = attr.ib(default=None)
+
+    @property
+    def is_complete(self) -> bool:
+        """Determine whether the dashboard was successfully created or updated."""
+        return self.action in _COMPLETED_ACTIONS
+
+
+_COMPLETED_ACTIONS = ("created", "updated")
+
+
+class BuildJournal:
+    """Append-only journal of dashboard deployments, safe to share between threads.
+
+    Each deployment is appended to the journal file as a single JSON line as soon as it
+    finishes, so the journal survives the build being interrupted at any point. When
+    resuming, the latest entry for each account and dashboard wins.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH, resume: bool = False) -> None:
+        """Open a journal, keeping previous entries only if resuming."""
+        self._entries: Dict[Tuple[int, str], JournalEntry] = {}
+        if resume and os.path.exists(path):
+            self._entries = _read_entries(path)
+            mode = "a"
+        else:
+            mode = "w"
+
+        self._lock = threading.Lock()
+        self._file = open(path, mode)
+        if mode == "a" and self._file.tell() > 0:
+            # Terminate a line left partially written by an interrupted build
+            self._file.write("\n")
+
+    def __enter__(self) -> "BuildJournal":
+        """Enter context, the journal is closed on exit."""
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        """Close the journal on exiting context."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the journal file."""
+        with self._lock:
+            self._file.close()
+
+    def is_complete(
+        self, account_id: int, dashboard_name: str, payload_hash: str
+    ) -> bool:
+        """Determine whether this exact dashboard payload was already deployed to the account."""
+        entry = self._entries.get((account_id, dashboard_name))
+        return bool(entry and entry.is_complete and entry.payload_hash == payload_hash)
+
+    def record(self, entry: JournalEntry) -> None:
+        """Record a deployment, writing it through to the journal file."""
+        line = json.dumps(attr.asdict(entry), separators=(",", ":"))
+        with self._lock:
+            self._entries[(entry.account_id, entry.dashboard_name)] = entry
+            self._file.write(line + "\n")
+            self._file.flush()
+
+
+def _read_entries(path):
+    """Read all entries from a journal file, ignoring a partially written last line."""
+    entries = {}
+    with open(path, "r") as journal_file:
+        for line in journal_file:
+            try:
+                entry = JournalEntry(**json.loads(line))
+            except (ValueError, TypeError):
+                continue
+
+            entries[(entry.account_id, entry.dashboard_name)] = entry
+
+    return entries
@@ -0,0 +1,208 @@
+"""Places widgets on the grid of a dashboard and checks that they fit without overlapping.
+
+Dashboards are a grid three columns wide that grows downwards. The taken rows of every
+column are kept as sorted, disjoint intervals, so checking a widget takes a binary search
+in each column it spans however tall it is, and searching for free space skips over taken
+intervals instead of stepping through their rows.
+"""
+import bisect
+from typing import Dict, List, Sequence, Tuple
+
+import attr
+
+from .models import InvalidWidgetConfigurationException, Widget
+
+# Number of columns in the grid of every dashboard
+GRID_COLUMNS = 3
+
+# Row of widgets that are placed in the first free space that fits them
+AUTO = "auto"
+
+
+class _OccupancyGrid:
+    """The cells of a dashboard grid taken by widgets, as intervals of rows per column."""
+
+    def __init__(self) -> None:
+        """Initialize empty grid."""
+        # The first and past the last row of each interval of taken rows, by column
+        self._starts: List[List[int]] = [[] for _ in range(GRID_COLUMNS)]
+        self._ends: List[List[int]] = [[] for _ in range(GRID_COLUMNS)]
+        # Free space for a widget of a given shape is only ever found further down the
+        # grid as it fills up, so every search starts where the last one of that shape
+        # ended
+        self._search_start: Dict[Tuple[int, int, int], int] = {}
+
+    def fits(self, row: int, column: int, width: int, height: int) -> bool:
+        """Determine whether every cell of an area is free."""
+        return self._find_blocking_end(row, column, width, height) is None
+
+    def find_free(self, column: int, width: int, height: int) -> Tuple[int, int]:
+        """Find the topmost, then leftmost, free area of a size, returns its row and column.
+
+        If column is 0, the area may start in any column, otherwise only in that column.
+        """
+        shape = (column, width, height)
+        start_row = self._search_start.get(shape, 1)
+        columns = [column] if column else range(1, GRID_COLUMNS - width + 2)
+        row, column = min(
+            (self._find_free_row(start_row, candidate, width, height), candidate)
+            for candidate in columns
+        )
+        self._search_start[shape] = row
+        return row, column
+
+    def take(self, row: int, column: int, width: int, height: int) -> None:
+        """Mark every cell of an area as occupied, which must be free."""
+        for grid_column in range(column - 1, column - 1 + width):
+            _insert_interval(
+                self._starts[grid_column], self._ends[grid_column], row, row + height
+            )
+
+    def _find_blocking_end(self, row, column, width, height):
+        """Find the end of the taken intervals an area overlaps, None if it is free."""
+        blocking_end = None
+        for grid_column in range(column - 1, column - 1 + width):
+            starts, ends = self._starts[grid_column], self._ends[grid_column]
+            # Only the last interval starting above the bottom of the area can overlap it
+            index = bisect.bisect_left(starts, row + height) - 1
+            if index >= 0 and ends[index] > row:
+                blocking_end = max(blocking_end or 0, ends[index])
+
+        return blocking_end
+
+    def _find_free_row(self, row, column, width, height):
+        """Find the topmost free area of a size starting in a column from a row on."""
+        # Every row before the end of a blocking interval overlaps that interval too
+        blocking_end = self._find_blocking_end(row, column, width, height)
+        while blocking_end is not None:
+            row = blocking_end
+            blocking_end = self._find_blocking_end(row, column, width, height)
+
+        return row
+
+
+def arrange_widgets(widgets: Sequence[Widget], dashboard_name: str) -> List[Widget]:
+    """Check the layout of a dashboard's widgets and place those whose row is auto.
+
+    Widgets with a fixed row and column must lie within the grid and must not overlap,
+    otherwise InvalidWidgetConfigurationException is raised naming both widgets. Widgets
+    whose row is auto are then placed in order, each in the topmost and then leftmost free
+    space that fits it, in its column if it has one. The same widgets always produce the
+    same layout. Returns the widgets with every row and column filled in.
+    """
+    grid = _OccupancyGrid()
+    auto_indexes = []
+    for index, widget in enumerate(widgets):
+        if widget.row == AUTO:
+            auto_indexes.append(index)
+            continue
+
+        _check_position(widget, index, dashboard_name)
+        if not grid.fits(widget.row, widget.column, widget.width, widget.height):
+            raise InvalidWidgetConfigurationException(
+                _describe_overlap(widgets, index, dashboard_name)
+            )
+        grid.take(widget.row, widget.column, widget.width, widget.height)
+
+    if not auto_indexes:
+        return list(widgets)
+
+    arranged = list(widgets)
+    for index in auto_indexes:
+        widget = widgets[index]
+        _check_size(widget, index, dashboard_name)
+        if widget.column is not None:
+            _check_column(widget, index, dashboard_name)
+        row, column = grid.find_free(widget.column or 0, widget.width, widget.height)
+        grid.take(row, column, widget.width, widget.height)
+        arranged[index] = attr.evolve(widget, row=row, column=column)
+
+    return arranged
+
+
+def _check_column(widget, index, dashboard_name):
+    """Check that a widget starts in a column of the grid and does not extend past it."""
+    if not _is_integer(widget.column) or not 1 <= widget.column <= GRID_COLUMNS:
+        raise InvalidWidgetConfigurationException(
+            f"{_describe_widget(widget, index, dashboard_name)} must have a column from 1 to {GRID_COLUMNS}, "
+            f"got {widget.column!r}"
+        )
+
+    if widget.column + widget.width - 1 > GRID_COLUMNS:
+        raise InvalidWidgetConfigurationException(
+            f"{_describe_widget(widget, index, dashboard_name)} extends past column {GRID_COLUMNS}, "
+            f"it starts in column {widget.column} and is {widget.width} columns wide"
+        )
+
+
+def _check_position(widget, index, dashboard_name):
+    """Check that a widget with a fixed position lies within the grid."""
+    if not _is_integer(widget.row) or widget.row < 1:
+        raise InvalidWidgetConfigurationException(
+            f"{_describe_widget(widget, index, dashboard_name)} must have a row of at least 1 or {AUTO}, "
+            f"got {widget.row!r}"
+        )
+
+    _check_size(widget, index, dashboard_name)
+    _check_column(widget, index, dashboard_name)
+
+
+def _check_size(widget, index, dashboard_name):
+    """Check that the width and height of a widget fit the grid."""
+    if not _is_integer(widget.width) or not 1 <= widget.width <= GRID_COLUMNS:
+        raise InvalidWidgetConfigurationException(
+            f"{_describe_widget(widget, index, dashboard_name)} must have a width from 1 to {GRID_COLUMNS}, "
+            f"got {widget.width!r}"
+        )
+
+    if not _is_integer(widget.height) or widget.height < 1:
+        raise InvalidWidgetConfigurationException(
+            f"{_describe_widget(widget, index, dashboard_name)} must have a height of at least 1, "
+            f"got {widget.height!r}"
+        )
+
+
+def _describe_overlap(widgets, index, dashboard_name):
+    """Describe which earlier widget a widget overlaps and the first cell they share."""
+    widget = widgets[index]
+    for other_index in range(index):
+        other = widgets[other_index]
+        if other.row == AUTO:
+            continue
+
+        row = max(widget.row, other.row)
+        column = max(widget.column, other.column)
+        if row < min(widget.row + widget.height, other.row + other.height) and (
+            column < min(widget.column + widget.width, other.column + other.width)
+        ):
+            return (
+                f"{_describe_widget(widget, index, dashboard_name)} overlaps "
+                f"widget {other_index + 1} ({other.title}) at row {row}, column {column}"
+            )
+
+    return f"{_describe_widget(widget, index, dashboard_name)} overlaps another widget"
+
+
+def _describe_widget(widget, index, dashboard_name):
+    """Describe a widget by its position in the configuration and its title."""
+    return f"Widget {index + 1} ({widget.title}) on dashboard {dashboard_name}"
+
+
+def _insert_interval(starts, ends, start, end):
+    """Insert an interval into sorted, disjoint intervals, merging those that touch it."""
+    index = bisect.bisect_left(starts, start)
+    # Merged intervals are skipped in a single step when searching for free space
+    if index < len(starts) and starts[index] == end:
+        end = ends[index]
+        del starts[index], ends[index]
+
+    if index and ends[index - 1] == start:
+        ends[index - 1] = end
+    else:
+        starts.insert(index, start)
+        ends.insert(index, end)
+
+
+def _is_integer(value):
+    """Determine whether a value is an integer, YAML booleans are not."""
+    return isinstance(value, int) and not isinstance(value, bool)
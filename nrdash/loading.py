@@ -0,0 +1,364 @@
+"""Loads YAML configuration, using libyaml when PyYAML was built with it."""
+import io
+from typing import IO, Any, Collection, Container, Dict, Mapping, Optional, Union
+
+import yaml
+from yaml.composer import ComposerError
+from yaml.events import (
+    AliasEvent,
+    CollectionStartEvent,
+    MappingEndEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceEndEvent,
+    StreamEndEvent,
+)
+from yaml.nodes import MappingNode, Node, ScalarNode, SequenceNode
+
+from .models import ConfigurationLimitExceededException, ParseLimits
+
+# The safe loaders available by backend, libyaml is an optional part of PyYAML
+LOADERS: Dict[str, type] = {"python": yaml.SafeLoader}
+if getattr(yaml, "CSafeLoader", None):
+    LOADERS["libyaml"] = yaml.CSafeLoader
+
+# The fastest safe loader available
+SafeLoader = LOADERS.get("libyaml", yaml.SafeLoader)
+
+_UNLIMITED = ParseLimits(max_aliases=None, max_nodes=None, max_nesting_depth=None)
+
+
+class _Composer:
+    """Composes the selected parts of a document from the event stream of a loader.
+
+    Every alias is counted as a copy of the node it refers to, so that the node count and
+    nesting depth limits bound the size of the document once its aliases are expanded.
+    """
+
+    def __init__(self, yaml_loader, limits: ParseLimits) -> None:
+        """Initialize composer reading the events of a loader."""
+        self._loader = yaml_loader
+        self._limits = limits
+        self._anchors: dict = {}
+        # The expanded node count and height of each anchored node that was composed
+        self._anchor_sizes: dict = {}
+        self._alias_count = 0
+        self._node_count = 0
+        self._deepest = 0
+
+    def compose_document(self, sections, entries) -> Optional[Node]:
+        """Compose the single document in the stream, returns None if there is none."""
+        # Drop the stream start event
+        self._loader.get_event()
+        if self._loader.check_event(StreamEndEvent):
+            return None
+
+        # Drop the document start event
+        self._loader.get_event()
+        if self._loader.check_event(MappingStartEvent):
+            node = self._compose_mapping(sections, entries, 1)
+        else:
+            node = self._compose_node(1)
+
+        # Drop the document end event
+        self._loader.get_event()
+        if not self._loader.check_event(StreamEndEvent):
+            event = self._loader.get_event()
+            raise ComposerError(
+                "expected a single document in the stream",
+                node.start_mark,
+                "but found another document",
+                event.start_mark,
+            )
+
+        return node
+
+    def count_composed(self, node) -> None:
+        """Count the nodes of a document composed by the loader, which has no aliases."""
+        stack = [(node, 1)]
+        while stack:
+            node, depth = stack.pop()
+            self._count_nodes(1, depth, node.start_mark)
+            if isinstance(node, MappingNode):
+                children = [child for pair in node.value for child in pair]
+            elif isinstance(node, SequenceNode):
+                children = node.value
+            else:
+                continue
+
+            stack.extend((child, depth + 1) for child in reversed(children))
+
+    def _check_anchor(self, event):
+        """Raise ComposerError if the anchor of an event is already defined."""
+        if event.anchor in self._anchors:
+            raise ComposerError(
+                f"found duplicate anchor {event.anchor!r}; first occurrence",
+                self._anchors[event.anchor].start_mark,
+                "second occurrence",
+                event.start_mark,
+            )
+
+    def _compose_alias(self, event, depth):
+        """Compose an alias, counting it as a copy of the node it refers to."""
+        if event.anchor not in self._anchors:
+            raise ComposerError(
+                None, None, f"found undefined alias {event.anchor!r}", event.start_mark
+            )
+
+        self._alias_count += 1
+        _check_limit(
+            self._alias_count, self._limits.max_aliases, "aliases", event.start_mark
+        )
+        # A node containing an alias to itself is not composed yet and counted only once
+        size, height = self._anchor_sizes.get(event.anchor, (1, 0))
+        self._count_nodes(size, depth + height, event.start_mark)
+        return self._anchors[event.anchor]
+
+    def _compose_children(self, node, depth):
+        """Compose the items of a sequence or the keys and values of a mapping."""
+        if isinstance(node, SequenceNode):
+            while not self._loader.check_event(SequenceEndEvent):
+                node.value.append(self._compose_node(depth))
+        else:
+            while not self._loader.check_event(MappingEndEvent):
+                key = self._compose_node(depth)
+                node.value.append((key, self._compose_node(depth)))
+
+        node.end_mark = self._loader.get_event().end_mark
+
+    def _compose_mapping(self, selected_keys, selected_entries, depth):
+        """Compose a mapping, skipping the values of keys which are not selected.
+
+        All keys are selected if selected_keys is None. Values of keys in selected_entries
+        are mappings composed with only the keys it lists.
+        """
+        event = self._loader.peek_event()
+        if event.anchor is not None:
+            # An alias must refer to the whole mapping, not just the selected part
+            return self._compose_node(depth)
+
+        self._loader.get_event()
+        self._count_nodes(1, depth, event.start_mark)
+        node = MappingNode(
+            _resolve_tag(self._loader, MappingNode, None, event),
+            [],
+            event.start_mark,
+            None,
+            flow_style=event.flow_style,
+        )
+        while not self._loader.check_event(MappingEndEvent):
+            key = self._compose_node(depth + 1)
+            name = key.value if _is_string(key) else None
+            if (
+                selected_keys is not None
+                and name is not None
+                and name not in selected_keys
+            ):
+                self._skip_node(depth + 1)
+                continue
+
+            if name in selected_entries and self._loader.check_event(MappingStartEvent):
+                value = self._compose_mapping(selected_entries[name], {}, depth + 1)
+            else:
+                value = self._compose_node(depth + 1)
+            node.value.append((key, value))
+
+        node.end_mark = self._loader.get_event().end_mark
+        return node
+
+    def _compose_node(self, depth):
+        """Compose the next node in the stream with all of its children."""
+        event = self._loader.get_event()
+        if isinstance(event, AliasEvent):
+            return self._compose_alias(event, depth)
+
+        self._check_anchor(event)
+        self._count_nodes(1, depth, event.start_mark)
+        if isinstance(event, ScalarEvent):
+            node = ScalarNode(
+                _resolve_tag(self._loader, ScalarNode, event.value, event),
+                event.value,
+                event.start_mark,
+                event.end_mark,
+                style=event.style,
+            )
+        else:
+            node_class = (
+                MappingNode if isinstance(event, MappingStartEvent) else SequenceNode
+            )
+            node = node_class(
+                _resolve_tag(self._loader, node_class, None, event),
+                [],
+                event.start_mark,
+                None,
+                flow_style=event.flow_style,
+            )
+
+        if event.anchor is None:
+            if isinstance(event, CollectionStartEvent):
+                self._compose_children(node, depth + 1)
+            return node
+
+        # Anchored before its children are composed, so that a node can contain itself
+        self._anchors[event.anchor] = node
+        start_count = self._node_count
+        outer_deepest, self._deepest = self._deepest, depth
+        if isinstance(event, CollectionStartEvent):
+            self._compose_children(node, depth + 1)
+        self._anchor_sizes[event.anchor] = (
+            self._node_count - start_count + 1,
+            self._deepest - depth,
+        )
+        self._deepest = max(outer_deepest, self._deepest)
+        return node
+
+    def _count_nodes(self, count, depth, mark):
+        """Count composed nodes, raising an exception if a limit is exceeded."""
+        self._node_count += count
+        self._deepest = max(self._deepest, depth)
+        _check_limit(
+            self._node_count,
+            self._limits.max_nodes,
+            "nodes, counting each alias as a copy of the node it refers to",
+            mark,
+        )
+        _check_limit(depth, self._limits.max_nesting_depth, "levels of nesting", mark)
+
+    def _skip_node(self, depth):
+        """Read past the next node in the stream without composing it."""
+        skipped_depth = 0
+        while True:
+            event = self._loader.peek_event()
+            anchored = isinstance(event, (CollectionStartEvent, ScalarEvent))
+            if anchored and event.anchor is not None:
+                # Aliases in selected nodes may refer to anchors in skipped ones
+                self._compose_node(depth + skipped_depth)
+            else:
+                self._loader.get_event()
+                if isinstance(event, CollectionStartEvent):
+                    skipped_depth += 1
+                elif isinstance(event, (MappingEndEvent, SequenceEndEvent)):
+                    skipped_depth -= 1
+
+            if not skipped_depth:
+                return
+
+
+def load(
+    stream: Union[str, IO],
+    sections: Optional[Collection[str]] = None,
+    entries: Optional[Mapping[str, Container[str]]] = None,
+    limits: Optional[ParseLimits] = None,
+    loader: type = SafeLoader,
+) -> Any:
+    """Load a single YAML document, like yaml.safe_load.
+
+    If sections is provided, only those keys of a top level mapping are loaded. If entries
+    is provided, only the listed keys of the mappings under the sections it names are
+    loaded, for example entries={"dashboards": ["my-dashboard"]} loads a single dashboard.
+    Skipped values are never built, only read through the parser's event stream.
+
+    If limits are provided, loading stops with ConfigurationLimitExceededException, naming
+    the line and column at which the document exceeds the limit on aliases, nodes, or
+    nesting depth, before anything is built. A whole document without anchors, and so
+    without aliases, is composed by the loader and its nodes are counted before it is
+    built, which is faster than composing it event by event when libyaml is used.
+    """
+    if limits is None and sections is None and not entries:
+        return yaml.load(stream, Loader=loader)
+
+    if sections is None and not entries:
+        stream = _buffer_stream(stream)
+        if not _may_contain_aliases(stream):
+            return _load_without_aliases(stream, limits or _UNLIMITED, loader)
+
+    yaml_loader = loader(stream)
+    try:
+        composer = _Composer(yaml_loader, limits or _UNLIMITED)
+        node = composer.compose_document(sections, entries or {})
+        return None if node is None else yaml_loader.construct_document(node)
+    finally:
+        yaml_loader.dispose()
+
+
+def _buffer_stream(stream):
+    """Read a file into a buffer of the same name, so that it can be searched and loaded."""
+    if isinstance(stream, (str, bytes)):
+        return stream
+
+    content = stream.read()
+    buffer = io.StringIO(content) if isinstance(content, str) else io.BytesIO(content)
+    buffer.name = getattr(stream, "name", "<file>")
+    return buffer
+
+
+def _check_limit(value, limit, description, mark):
+    """Raise ConfigurationLimitExceededException if a value exceeds a limit."""
+    if _exceeds(value, limit):
+        raise ConfigurationLimitExceededException(
+            f"{mark.name}, line {mark.line + 1}, column {mark.column + 1}: "
+            f"configuration exceeds the limit of {limit} {description}"
+        )
+
+
+def _exceeds(value, limit):
+    """Determine whether a value exceeds a limit, which is None if there is no limit."""
+    return limit is not None and value > limit
+
+
+def _is_string(node):
+    """Determine whether a node is a string scalar."""
+    return isinstance(node, ScalarNode) and node.tag == "tag:yaml.org,2002:str"
+
+
+def _load_without_aliases(stream, limits, loader):
+    """Load a document which has no aliases, checking its composed nodes against limits."""
+    yaml_loader = loader(stream)
+    try:
+        node = yaml_loader.get_single_node()
+        if node is None:
+            return None
+
+        node_count, height = _measure(node)
+        if _exceeds(node_count, limits.max_nodes) or _exceeds(
+            height, limits.max_nesting_depth
+        ):
+            # Count the nodes in document order to find where a limit is exceeded
+            _Composer(yaml_loader, limits).count_composed(node)
+
+        return yaml_loader.construct_document(node)
+    finally:
+        yaml_loader.dispose()
+
+
+def _may_contain_aliases(stream):
+    """Determine whether a buffered document may contain aliases, which need anchors."""
+    content = stream if isinstance(stream, (str, bytes)) else stream.getvalue()
+    return ("&" if isinstance(content, str) else b"&") in content
+
+
+def _measure(node):
+    """Count the nodes and levels of nesting of a composed document without aliases."""
+    node_count = height = 0
+    level = [node]
+    while level:
+        node_count += len(level)
+        height += 1
+        children = []
+        for node in level:
+            if isinstance(node, MappingNode):
+                for pair in node.value:
+                    children.extend(pair)
+            elif isinstance(node, SequenceNode):
+                children.extend(node.value)
+        level = children
+
+    return node_count, height
+
+
+def _resolve_tag(yaml_loader, node_class, value, event):
+    """Determine the tag of a node, resolving implicit tags like the loader's composer."""
+    if event.tag is None or event.tag == "!":
+        return yaml_loader.resolve(node_class, value, event.implicit)
+
+    return event.tag
@@ -1,39 +1,543 @@
-"""Main entry point for New Relic dashboard builder CLI tool."""
+"""Main entry point for New Relic dashboard builder CLI tool.
+
+Commands are implemented in the nrdash.commands package and each command module is only
+imported when its command runs, so that startup, --help, and lightweight commands such as
+lint do not pay for importing the HTTP client and everything else the other commands use.
+"""
+# pylint: disable=import-outside-toplevel
 import click
 
-from nrdash import new_relic_api, parsing
+from nrdash import defaults
 
 
 @click.group()
-def main():
+@click.option(
+    "--trace",
+    "trace_path",
+    type=str,
+    help="Write tracing spans in the OTLP JSON format to this file, - for standard output",
+)
+def main(trace_path):
     """Build New Relic dashboards."""
+    if trace_path:
+        from nrdash import tracing
+
+        tracing.configure(tracing.OtlpJsonExporter(trace_path))
+        click.get_current_context().call_on_close(tracing.shutdown)
+
+
+def _account_options(command):
+    """Add options specifying the accounts a command operates on."""
+    command = click.option(
+        "--accounts-file",
+        type=str,
+        help="YAML file listing accounts, each with an account-id and api-key",
+    )(command)
+    command = click.option(
+        "--account",
+        "extra_accounts",
+        multiple=True,
+        callback=_parse_account_option,
+        help="Additional account as ACCOUNT_ID:API_KEY, may be repeated",
+    )(command)
+    command = click.option("--account-id", type=int, help="New Relic account id")(
+        command
+    )
+    return click.option("--api-key", type=str, help="New Relic admin API key")(command)
+
+
+def _parse_account_option(_context, _param, values):
+    """Parse --account options given as ACCOUNT_ID:API_KEY into (account id, API key) pairs."""
+    accounts = []
+    for value in values:
+        account_id, separator, api_key = value.partition(":")
+        if not separator or not account_id.isdigit() or not api_key:
+            raise click.BadParameter(f"expected ACCOUNT_ID:API_KEY, got {value}")
+
+        accounts.append((int(account_id), api_key))
+
+    return accounts
+
+
+def _parse_limit_options(command):
+    """Add options limiting the size of configuration and rendered NRQL to a command that parses configuration."""
+    command = click.option(
+        "--max-condition-depth",
+        type=click.IntRange(min=1),
+        default=defaults.DEFAULT_MAX_CONDITION_DEPTH,
+        show_default=True,
+        help="Maximum number of levels of conditions extending other conditions",
+    )(command)
+    command = click.option(
+        "--max-condition-length",
+        type=click.IntRange(min=1),
+        default=defaults.DEFAULT_MAX_CONDITION_LENGTH,
+        show_default=True,
+        help="Maximum number of characters of NRQL a single condition may render to",
+    )(command)
+    command = click.option(
+        "--max-aliases",
+        type=click.IntRange(min=0),
+        default=defaults.DEFAULT_MAX_ALIASES,
+        show_default=True,
+        help="Maximum number of YAML aliases in a configuration file",
+    )(command)
+    command = click.option(
+        "--max-nodes",
+        type=click.IntRange(min=1),
+        default=defaults.DEFAULT_MAX_NODES,
+        show_default=True,
+        help="Maximum number of YAML nodes in a configuration file, counting each alias as a copy of the node it refers to",
+    )(command)
+    command = click.option(
+        "--max-nesting-depth",
+        type=click.IntRange(min=1),
+        default=defaults.DEFAULT_MAX_NESTING_DEPTH,
+        show_default=True,
+        help="Maximum number of levels of nesting in a configuration file",
+    )(command)
+    return click.option(
+        "--max-nrql-length",
+        type=click.IntRange(min=1),
+        default=defaults.DEFAULT_MAX_NRQL_LENGTH,
+        show_default=True,
+        help="Maximum total number of characters of NRQL rendered for all widgets",
+    )(command)
+
+
+def _parse_shard_option(_context, _param, value):
+    """Parse the --shard option given as I/N into a (shard index, shard count) pair."""
+    if value is None:
+        return None
+
+    index, separator, count = value.partition("/")
+    if (
+        not separator
+        or not index.isdigit()
+        or not count.isdigit()
+        or not 1 <= int(index) <= int(count)
+    ):
+        raise click.BadParameter(f"expected I/N with 1 <= I <= N, got {value}")
+
+    return int(index), int(count)
 
 
 @main.command()
+@click.argument("config-files", type=str, nargs=-1)
+@click.option(
+    "--compiled",
+    "compiled_file",
+    type=str,
+    help="Build from an artifact created by the compile command instead of CONFIG_FILES",
+)
+@click.option(
+    "--dashboard",
+    "dashboard_names",
+    type=str,
+    multiple=True,
+    help="Only build the dashboard with this name, may be repeated, other dashboards are not loaded",
+)
+@click.option(
+    "--shard",
+    type=str,
+    metavar="I/N",
+    callback=_parse_shard_option,
+    help="Only build shard I of N, the dashboards whose names hash to it, other dashboards are not loaded",
+)
+@click.option(
+    "--shard-results",
+    "shard_results_path",
+    type=str,
+    help="Write the result of every deployment to this file, to be merged by the shard-report command",
+)
+@_account_options
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=defaults.DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="Maximum number of dashboards pushed concurrently",
+)
+@click.option(
+    "--adaptive-concurrency",
+    is_flag=True,
+    help="Adapt the number of requests in flight to each account, up to --workers, based on API latency and throttling",
+)
+@click.option(
+    "--circuit-breaker-threshold",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="Stop the build after this many consecutive throttled, timed out, or failed API requests",
+)
+@click.option(
+    "--requests-per-second",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Maximum API requests per second made to each account",
+)
+@click.option(
+    "--cache-dir",
+    type=str,
+    help="Directory in which API responses are cached across runs",
+)
+@click.option(
+    "--cache-ttl",
+    type=click.FloatRange(min=0),
+    default=0,
+    show_default=True,
+    help="Seconds to reuse cached API responses that cannot be revalidated with the API",
+)
+@click.option(
+    "--id-cache",
+    "id_cache_path",
+    type=str,
+    help="SQLite database in which dashboard ids are cached across runs, may be shared by concurrent builds",
+)
+@click.option(
+    "--id-cache-ttl",
+    type=click.FloatRange(min=0),
+    default=defaults.DEFAULT_ID_CACHE_TTL,
+    show_default=True,
+    help="Seconds to use cached dashboard ids without looking them up",
+)
+@click.option(
+    "--journal",
+    "journal_path",
+    type=str,
+    help=(
+        "File recording each completed dashboard deployment  [default: "
+        f"{defaults.DEFAULT_JOURNAL_PATH}, or "
+        f"{defaults.DEFAULT_SHARD_JOURNAL_PATH.format(index='I', count='N')} with --shard]"
+    ),
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Skip dashboards the journal shows were already deployed unchanged",
+)
+@click.option(
+    "--connect-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=defaults.DEFAULT_CONNECT_TIMEOUT,
+    show_default=True,
+    help="Seconds to wait for a connection to the New Relic API",
+)
+@click.option(
+    "--read-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=defaults.DEFAULT_READ_TIMEOUT,
+    show_default=True,
+    help="Seconds to wait for each response from the New Relic API",
+)
+@click.option(
+    "--deadline",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds the whole build may take, dashboards not deployed by then are reported and skipped",
+)
+@click.option(
+    "--hedge-lookups",
+    is_flag=True,
+    help="Send a duplicate of dashboard lookups that take longer than the 95th percentile lookup",
+)
+@click.option(
+    "--http2",
+    is_flag=True,
+    help="Multiplex all requests over a single HTTP/2 connection, requires nrdash[http2]",
+)
+@click.option(
+    "--record",
+    "record_path",
+    type=str,
+    help="Record the timing, size, and status of every API request to this trace file, without API keys",
+)
+@_parse_limit_options
+def build(
+    config_files,
+    compiled_file,
+    dashboard_names,
+    shard,
+    shard_results_path,
+    api_key,
+    account_id,
+    extra_accounts,
+    accounts_file,
+    workers,
+    adaptive_concurrency,
+    circuit_breaker_threshold,
+    requests_per_second,
+    cache_dir,
+    cache_ttl,
+    id_cache_path,
+    id_cache_ttl,
+    journal_path,
+    resume,
+    connect_timeout,
+    read_timeout,
+    deadline,
+    hedge_lookups,
+    http2,
+    record_path,
+    max_condition_length,
+    max_condition_depth,
+    max_aliases,
+    max_nodes,
+    max_nesting_depth,
+    max_nrql_length,
+):
+    """Build New Relic dashboards based on YAML configuration files or a compiled artifact."""
+    from nrdash.commands import build as build_command
+
+    build_command.run(
+        config_files=config_files,
+        compiled_file=compiled_file,
+        dashboard_names=dashboard_names,
+        shard=shard,
+        shard_results_path=shard_results_path,
+        api_key=api_key,
+        account_id=account_id,
+        extra_accounts=extra_accounts,
+        accounts_file=accounts_file,
+        workers=workers,
+        adaptive_concurrency=adaptive_concurrency,
+        circuit_breaker_threshold=circuit_breaker_threshold,
+        requests_per_second=requests_per_second,
+        cache_dir=cache_dir,
+        cache_ttl=cache_ttl,
+        id_cache_path=id_cache_path,
+        id_cache_ttl=id_cache_ttl,
+        journal_path=journal_path,
+        resume=resume,
+        max_condition_length=max_condition_length,
+        max_condition_depth=max_condition_depth,
+        max_aliases=max_aliases,
+        max_nodes=max_nodes,
+        max_nesting_depth=max_nesting_depth,
+        max_nrql_length=max_nrql_length,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        deadline=deadline,
+        hedge_lookups=hedge_lookups,
+        http2=http2,
+        record_path=record_path,
+    )
+
+
+@main.command(name="compile")
 @click.argument("config-file", type=str, required=True)
-@click.option("--api-key", type=str, required=True, help="New Relic admin API key")
-@click.option("--account-id", type=int, required=True, help="New Relic account id")
-def build(config_file, api_key, account_id):
-    """Build New Relic dashboards based on YAML configuration."""
-    dashboards = parsing.parse_file(config_file)
-    client = new_relic_api.NewRelicApiClient(api_key, account_id)
+@click.option(
+    "-o",
+    "--output",
+    "output_file",
+    type=str,
+    required=True,
+    help="Path of the compiled artifact to write",
+)
+@_parse_limit_options
+def compile_config(
+    config_file,
+    output_file,
+    max_condition_length,
+    max_condition_depth,
+    max_aliases,
+    max_nodes,
+    max_nesting_depth,
+    max_nrql_length,
+):
+    """Compile YAML configuration into an artifact that can be built without parsing."""
+    from nrdash.commands import compile as compile_command
 
-    for dashboard in dashboards.values():
-        dashboard_id = client.get_dashboard_id_by_title(dashboard.title)
-        if dashboard_id:
-            print(f"Updating {dashboard.name}")
-            client.update_dashboard(dashboard_id, dashboard)
-        else:
-            print(f"Creating {dashboard.name}")
-            client.create_dashboard(dashboard)
+    compile_command.run(
+        config_file=config_file,
+        output_file=output_file,
+        max_condition_length=max_condition_length,
+        max_condition_depth=max_condition_depth,
+        max_aliases=max_aliases,
+        max_nodes=max_nodes,
+        max_nesting_depth=max_nesting_depth,
+        max_nrql_length=max_nrql_length,
+    )
 
 
 @main.command()
 @click.argument("config-file", type=str, required=True)
-def lint(config_file):
+@_parse_limit_options
+def lint(
+    config_file,
+    max_condition_length,
+    max_condition_depth,
+    max_aliases,
+    max_nodes,
+    max_nesting_depth,
+    max_nrql_length,
+):
     """Lint New Relic dashboard YAML configuration."""
-    parsing.parse_file(config_file)
-    print(f"{config_file} is valid")
+    from nrdash.commands import lint as lint_command
+
+    lint_command.run(
+        config_file=config_file,
+        max_condition_length=max_condition_length,
+        max_condition_depth=max_condition_depth,
+        max_aliases=max_aliases,
+        max_nodes=max_nodes,
+        max_nesting_depth=max_nesting_depth,
+        max_nrql_length=max_nrql_length,
+    )
+
+
+@main.command()
+@click.argument("config-files", type=str, nargs=-1, required=True)
+@_account_options
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=defaults.DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="Maximum number of dashboards deleted concurrently",
+)
+@click.option(
+    "--requests-per-second",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Maximum API requests per second made to each account",
+)
+@click.option(
+    "--delete",
+    is_flag=True,
+    help="Delete orphaned dashboards instead of only listing them",
+)
+@_parse_limit_options
+def prune(
+    config_files,
+    api_key,
+    account_id,
+    extra_accounts,
+    accounts_file,
+    workers,
+    requests_per_second,
+    delete,
+    max_condition_length,
+    max_condition_depth,
+    max_aliases,
+    max_nodes,
+    max_nesting_depth,
+    max_nrql_length,
+):
+    """Delete dashboards created by nrdash that are no longer in any of CONFIG_FILES."""
+    from nrdash.commands import prune as prune_command
+
+    prune_command.run(
+        config_files=config_files,
+        api_key=api_key,
+        account_id=account_id,
+        extra_accounts=extra_accounts,
+        accounts_file=accounts_file,
+        workers=workers,
+        requests_per_second=requests_per_second,
+        delete=delete,
+        max_condition_length=max_condition_length,
+        max_condition_depth=max_condition_depth,
+        max_aliases=max_aliases,
+        max_nodes=max_nodes,
+        max_nesting_depth=max_nesting_depth,
+        max_nrql_length=max_nrql_length,
+    )
+
+
+@main.command()
+@click.argument("config-files", type=str, nargs=-1, required=True)
+@click.option("--query-key", type=str, required=True, help="New Relic query API key")
+@click.option("--account-id", type=int, required=True, help="New Relic account id")
+@click.option(
+    "--query-url",
+    type=str,
+    default=defaults.DEFAULT_QUERY_URL,
+    show_default=True,
+    help="URL of the NRQL query API, {account_id} is replaced with the account id",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=defaults.DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="Maximum number of queries run concurrently",
+)
+@click.option(
+    "--requests-per-second",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Maximum queries per second",
+)
+@click.option(
+    "--window-minutes",
+    type=click.IntRange(min=1),
+    default=defaults.DEFAULT_VERIFY_WINDOW_MINUTES,
+    show_default=True,
+    help="Minutes of data each query is run over, unless it sets its own SINCE",
+)
+@click.option(
+    "--cache-dir",
+    type=str,
+    help="Directory in which query results are kept across runs",
+)
+@click.option(
+    "--cache-ttl",
+    type=click.FloatRange(min=0),
+    default=defaults.DEFAULT_VERIFY_CACHE_TTL,
+    show_default=True,
+    help="Seconds for which the result of a query is reused",
+)
+@click.option(
+    "--allow-no-data",
+    is_flag=True,
+    help="Only fail on queries the API rejects, not on queries returning no data",
+)
+@_parse_limit_options
+def verify(
+    config_files,
+    query_key,
+    account_id,
+    query_url,
+    workers,
+    requests_per_second,
+    window_minutes,
+    cache_dir,
+    cache_ttl,
+    allow_no_data,
+    max_condition_length,
+    max_condition_depth,
+    max_aliases,
+    max_nodes,
+    max_nesting_depth,
+    max_nrql_length,
+):
+    """Run every distinct widget query in CONFIG_FILES against the NRQL query API."""
+    from nrdash.commands import verify as verify_command
+
+    verify_command.run(
+        config_files=config_files,
+        query_key=query_key,
+        account_id=account_id,
+        query_url=query_url,
+        workers=workers,
+        requests_per_second=requests_per_second,
+        window_minutes=window_minutes,
+        cache_dir=cache_dir,
+        cache_ttl=cache_ttl,
+        allow_no_data=allow_no_data,
+        max_condition_length=max_condition_length,
+        max_condition_depth=max_condition_depth,
+        max_aliases=max_aliases,
+        max_nodes=max_nodes,
+        max_nesting_depth=max_nesting_depth,
+        max_nrql_length=max_nrql_length,
+    )
+
+
+@main.command(name="shard-report")
+@click.argument("result-files", type=str, nargs=-1, required=True)
+def shard_report(result_files):
+    """Merge the results written by every shard of a build with --shard-results into one summary."""
+    from nrdash.commands import shard_report as shard_report_command
+
+    shard_report_command.run(result_files)
 
 
 if __name__ == "__main__":
@@ -1,18 +1,52 @@
 """Model defintions."""
+import itertools
 from enum import Enum, unique
-from typing import Optional, List
+from typing import Dict, Iterator, Optional, List, Tuple
 
 import attr
 
+from .defaults import (
+    DEFAULT_MAX_ALIASES,
+    DEFAULT_MAX_CONDITION_DEPTH,
+    DEFAULT_MAX_CONDITION_LENGTH,
+    DEFAULT_MAX_NESTING_DEPTH,
+    DEFAULT_MAX_NODES,
+    DEFAULT_MAX_NRQL_LENGTH,
+)
+
 
 class NrDashException(Exception):
     """Base class for all application-specific exceptions."""
 
 
+class ConfigurationLimitExceededException(NrDashException):
+    """Configuration exceeds the configured size or nesting limit exception."""
+
+
+class DuplicateDashboardException(NrDashException):
+    """Dashboard name or title is defined by more than one configuration file."""
+
+
+class InvalidAccountConfigurationException(NrDashException):
+    """Invalid account configuration exception."""
+
+
+class InvalidCompiledArtifactException(NrDashException):
+    """Invalid compiled configuration artifact exception."""
+
+
+class InvalidDashboardConfigurationException(NrDashException):
+    """Invalid dashboard configuration exception."""
+
+
 class InvalidExtendingConditionException(NrDashException):
     """Invalid extending condition exception."""
 
 
+class ConditionLimitExceededException(InvalidExtendingConditionException):
+    """Extending condition exceeds the configured size or depth limit exception."""
+
+
 class InvalidOutputConfigurationException(NrDashException):
     """Invalid output selection configuration exception."""
 
@@ -21,6 +55,14 @@ class InvalidQueryConfigurationException(NrDashException):
     """Invalid query configuration exception."""
 
 
+class InvalidShardResultsException(NrDashException):
+    """Shard results file is invalid or does not complete the other shards exception."""
+
+
+class InvalidTemplateConfigurationException(NrDashException):
+    """Invalid dashboard template configuration exception."""
+
+
 class InvalidWidgetVisualizationException(NrDashException):
     """Invalid widget visualization exception."""
 
@@ -33,6 +75,26 @@ class NewRelicApiException(NrDashException):
     """New Relic API exception."""
 
 
+class CircuitOpenException(NewRelicApiException):
+    """New Relic API is unhealthy and requests are no longer being sent."""
+
+
+class DashboardNotFoundException(NewRelicApiException):
+    """Dashboard does not exist in New Relic."""
+
+
+class DeadlineExceededException(NewRelicApiException):
+    """Build deadline passed before a request could be completed."""
+
+
+class TransportException(NrDashException):
+    """HTTP request could not be sent or its response could not be received."""
+
+
+class TransportTimeoutException(TransportException):
+    """HTTP request timed out."""
+
+
 @unique
 class WidgetVisualization(Enum):
     """Specifices the visualization type to use for a widget."""
@@ -69,6 +131,26 @@ class WidgetVisualization(Enum):
             raise InvalidWidgetVisualizationException(str_value)
 
 
+@attr.s(frozen=True)
+class Account:
+    """A New Relic account that dashboards are deployed to."""
+
+    account_id: int = attr.ib()
+    api_key: str = attr.ib()
+
+
+@attr.s(frozen=True)
+class ParseLimits:
+    """Limits on parsed configuration, None disables a limit."""
+
+    max_condition_length: Optional[int] = attr.ib(default=DEFAULT_MAX_CONDITION_LENGTH)
+    max_condition_depth: Optional[int] = attr.ib(default=DEFAULT_MAX_CONDITION_DEPTH)
+    max_aliases: Optional[int] = attr.ib(default=DEFAULT_MAX_ALIASES)
+    max_nodes: Optional[int] = attr.ib(default=DEFAULT_MAX_NODES)
+    max_nesting_depth: Optional[int] = attr.ib(default=DEFAULT_MAX_NESTING_DEPTH)
+    max_nrql_length: Optional[int] = attr.ib(default=DEFAULT_MAX_NRQL_LENGTH)
+
+
 @attr.s(frozen=True)
 class QueryCondition:
     """A query condition."""
@@ -150,3 +232,90 @@ class Dashboard:
     name: str = attr.ib()
     title: str = attr.ib()
     widgets: List[Widget] = attr.ib()
+    # Dashboards with higher priority are deployed first
+    priority: int = attr.ib(default=0)
+
+
+@attr.s(frozen=True)
+class TemplateString:
+    """A string with ${parameter} placeholders, pre-split into literal text and parameter names.
+
+    There is always one more literal than there are parameters, the parameters go between
+    consecutive literals.
+    """
+
+    literals: Tuple[str, ...] = attr.ib()
+    parameters: Tuple[str, ...] = attr.ib()
+
+    def render(self, values: Dict[str, str]) -> str:
+        """Render the string with the given parameter values substituted in."""
+        if not self.parameters:
+            return self.literals[0]
+
+        parts = [self.literals[0]]
+        for parameter, literal in zip(self.parameters, self.literals[1:]):
+            parts.append(values[parameter])
+            parts.append(literal)
+
+        return "".join(parts)
+
+
+@attr.s(frozen=True)
+class WidgetTemplate:
+    """A widget whose title, query, and notes may contain template parameters."""
+
+    title: TemplateString = attr.ib()
+    query: TemplateString = attr.ib()
+    visualization: WidgetVisualization = attr.ib()
+    row: int = attr.ib()
+    column: int = attr.ib()
+    width: int = attr.ib()
+    height: int = attr.ib()
+    notes: Optional[TemplateString] = attr.ib(default=None)
+
+    def render(self, values: Dict[str, str]) -> Widget:
+        """Render a widget with the given parameter values."""
+        return Widget(
+            title=self.title.render(values),
+            query=self.query.render(values),
+            visualization=self.visualization,
+            row=self.row,
+            column=self.column,
+            width=self.width,
+            height=self.height,
+            notes=self.notes.render(values) if self.notes else None,
+        )
+
+
+@attr.s(frozen=True)
+class DashboardTemplate:
+    """A dashboard definition expanded once for every combination of parameter values."""
+
+    name: str = attr.ib()
+    title: TemplateString = attr.ib()
+    widgets: List[WidgetTemplate] = attr.ib()
+    matrix: Dict[str, List[str]] = attr.ib()
+    priority: int = attr.ib(default=0)
+
+    def expand(self) -> Iterator[Dashboard]:
+        """Create a dashboard for every combination of parameter values in the matrix."""
+        for name, values in self._iter_combinations():
+            yield Dashboard(
+                name=name,
+                title=self.title.render(values),
+                widgets=[widget.render(values) for widget in self.widgets],
+                priority=self.priority,
+            )
+
+    def expand_titles(self) -> Iterator[Tuple[str, str]]:
+        """Get the name and title of every dashboard in the matrix, without creating them."""
+        for name, values in self._iter_combinations():
+            yield name, self.title.render(values)
+
+    def _iter_combinations(self):
+        """Iterate the dashboard names and parameter values of every matrix combination."""
+        parameters = list(self.matrix)
+        for combination in itertools.product(*self.matrix.values()):
+            yield "-".join((self.name,) + combination), dict(
+                zip(parameters, combination)
+            )
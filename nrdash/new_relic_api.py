@@ -1,33 +1,173 @@
 """New Relic API client."""
-from typing import Dict, Optional
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
 
-import requests
-
-from .models import Dashboard, Widget, NewRelicApiException
+import attr
 
+from . import tracing
+from .concurrency import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    Deadline,
+    RequestHedger,
+    RequestOutcome,
+    RequestThrottle,
+)
+from .defaults import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from .http_cache import CachedResponse, ResponseCache, create_cache_key
+from .id_cache import DashboardIdCache
+from .models import (
+    Dashboard,
+    DashboardNotFoundException,
+    DeadlineExceededException,
+    TransportException,
+    TransportTimeoutException,
+    Widget,
+    NewRelicApiException,
+)
+from .recording import RecordedError, TraceRecorder
+from .transport import RequestsTransport, Transport
 
 BASE_URL = "https://api.newrelic.com/v2/"
 DASHBOARDS_URL = BASE_URL + "dashboards.json"
 
+# Marks dashboards created by nrdash, so that only they are ever pruned
+_MANAGED_BY = "nrdash"
+
+# Stands in for the account id in rendered payloads so that a dashboard only has to be
+# serialized once no matter how many accounts it is pushed to.
+_ACCOUNT_ID_PLACEHOLDER = "__nrdash_account_id__"
+_ACCOUNT_ID_PLACEHOLDER_JSON = json.dumps(_ACCOUNT_ID_PLACEHOLDER).encode()
+
+
+@attr.s(frozen=True)
+class DashboardPayload:
+    """A dashboard serialized into a request body that is independent of the account."""
+
+    dashboard: Dashboard = attr.ib()
+    body: bytes = attr.ib()
+
+    @property
+    def content_hash(self) -> str:
+        """Get a hash of the payload content that changes whenever the dashboard changes."""
+        return hashlib.sha256(self.body).hexdigest()
+
+    def for_account(self, account_id: int) -> bytes:
+        """Get the request body for the given account."""
+        return self.body.replace(_ACCOUNT_ID_PLACEHOLDER_JSON, str(account_id).encode())
+
 
 class NewRelicApiClient:
     """New Relic API client."""
 
-    def __init__(self, api_key: str, account_id: int) -> None:
-        """Initialize API accessor with API key and account id."""
+    def __init__(
+        self,
+        api_key: str,
+        account_id: int,
+        requests_per_second: Optional[float] = None,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        response_cache: Optional[ResponseCache] = None,
+        id_cache: Optional[DashboardIdCache] = None,
+        timeout: Tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        deadline: Optional[Deadline] = None,
+        hedger: Optional[RequestHedger] = None,
+        transport: Optional[Transport] = None,
+        recorder: Optional[TraceRecorder] = None,
+    ) -> None:
+        """Initialize API accessor with API key and account id.
+
+        If requests_per_second is provided, requests made by this client are throttled to
+        at most that rate, regardless of how many threads share the client. If a limiter is
+        provided, it adapts the number of requests in flight to the observed API latency
+        and throttling. If a circuit breaker is provided, requests fail fast with
+        CircuitOpenException once the API appears unhealthy. If a response cache is
+        provided, dashboard lookups are served from it or revalidated against it. If an id
+        cache is provided, dashboard ids it holds are used without looking them up.
+
+        Every request is given timeout, a tuple of connect and read timeouts in seconds.
+        If a deadline is provided, requests are cut short when it passes and no requests
+        are sent after it has passed, raising DeadlineExceededException. If a hedger is
+        provided, slow dashboard lookups are hedged with a duplicate request.
+
+        Requests are sent with the given transport, which may be shared by several
+        clients, or with a new requests transport if none is provided. If a recorder is
+        provided, the timing, size, and outcome of every request sent is recorded to it.
+        """
         self._api_key = api_key
         self._account_id = account_id
+        self._transport = transport or RequestsTransport()
+        self._throttle = RequestThrottle(requests_per_second)
+        self._limiter = limiter
+        self._circuit_breaker = circuit_breaker
+        self._response_cache = response_cache
+        self._id_cache = id_cache
+        self._timeout = timeout
+        self._deadline = deadline
+        self._hedger = hedger
+        self._recorder = recorder
+        self._title_index: Optional[_TitleIndex] = None
+
+    @property
+    def account_id(self) -> int:
+        """Get the id of the account this client operates on."""
+        return self._account_id
 
-    def create_dashboard(self, dashboard: Dashboard) -> None:
-        """Create a new dashboard."""
-        self._send_dashboard_data(requests.post, DASHBOARDS_URL, dashboard)
+    def create_dashboard(
+        self, dashboard: Dashboard, payload: Optional[DashboardPayload] = None
+    ) -> Optional[int]:
+        """Create a new dashboard, optionally from an already rendered payload.
+
+        Returns the id of the new dashboard if the API reported it.
+        """
+        response = self._send_dashboard_data("POST", DASHBOARDS_URL, dashboard, payload)
+        self._invalidate_title_lookup(dashboard.title)
+        try:
+            dashboard_id = response.json()["dashboard"]["id"]
+        except (ValueError, KeyError, TypeError):
+            return None
+
+        if self._title_index:
+            self._title_index.add(dashboard.title, dashboard_id)
+        if self._id_cache:
+            self._id_cache.put(self._account_id, dashboard.title, dashboard_id)
+        return dashboard_id
+
+    def delete_dashboard(self, dashboard_id: int) -> None:
+        """Delete the dashboard with the given id, doing nothing if it does not exist."""
+        url = f"{BASE_URL}dashboards/{dashboard_id}.json"
+        response = self._request("DELETE", url)
+        if response.status_code not in (200, 204, 404):
+            raise NewRelicApiException(
+                f"Failed deleting dashboard {dashboard_id} with status = {response.status_code}, response = {response.content}"
+            )
+
+        if self._title_index:
+            self._title_index.remove(dashboard_id)
+        if self._id_cache:
+            self._id_cache.invalidate(self._account_id, dashboard_id)
 
     def get_dashboard_id_by_title(self, dashboard_title: str) -> Optional[int]:
-        """Get dashboard id by title, returns None if there is no dashboard with the provided name."""
+        """Get dashboard id by title, returns None if there is no dashboard with the provided name.
+
+        Once the title index is loaded, dashboards are found in it without any request.
+        """
+        if self._title_index:
+            return _single_dashboard_id(
+                dashboard_title, self._title_index.find(dashboard_title)
+            )
+
+        if self._id_cache:
+            dashboard_id = self._id_cache.get(self._account_id, dashboard_title)
+            if dashboard_id is not None:
+                return dashboard_id
+
         params = {"filter[title]": dashboard_title}
-        response = requests.get(
-            DASHBOARDS_URL, headers=self._auth_headers(), params=params
-        )
+        response = self._get(DASHBOARDS_URL, params)
         if response.status_code != 200:
             raise NewRelicApiException(
                 f"Failed getting dashboard {dashboard_title} with status = {response.status_code}, response = {response.content}"
@@ -38,67 +178,373 @@ class NewRelicApiClient:
         # The API call returns all dashboards whose titles contain the string provided to the filter.
         # Find the single dashboard with the same name. This assumes that dashboard names are unique when
         # using this tool.
-        matching_dashboards = [
-            dashboard
+        matching_dashboard_ids = [
+            dashboard["id"]
             for dashboard in dashboards["dashboards"]
             if dashboard["title"] == dashboard_title
         ]
 
-        if not matching_dashboards:
-            return None
+        dashboard_id = _single_dashboard_id(dashboard_title, matching_dashboard_ids)
+        if dashboard_id is not None and self._id_cache:
+            self._id_cache.put(self._account_id, dashboard_title, dashboard_id)
+        return dashboard_id
 
-        if len(matching_dashboards) > 1:
-            raise NewRelicApiException(
-                f"Multiple dashboards found with title '{dashboard_title}'"
-            )
+    def list_dashboards(self) -> List[Dict]:
+        """List every dashboard on the account, following all pages of the listing."""
+        dashboards: List[Dict] = []
+        page = 1
+        while True:
+            response = self._request("GET", DASHBOARDS_URL, params={"page": page})
+            if response.status_code != 200:
+                raise NewRelicApiException(
+                    f"Failed listing dashboards with status = {response.status_code}, response = {response.content}"
+                )
+
+            page_dashboards = response.json()["dashboards"]
+            if not page_dashboards:
+                return dashboards
+
+            dashboards.extend(page_dashboards)
+            page += 1
+
+    def load_title_index(self) -> None:
+        """List every dashboard on the account once to look up dashboards by title without requests.
+
+        The index is kept up to date with the dashboards this client creates, so it must
+        only be used while no one else creates dashboards on the account.
+        """
+        title_index = _TitleIndex()
+        for dashboard in self.list_dashboards():
+            title_index.add(dashboard["title"], dashboard["id"])
+
+        self._title_index = title_index
+
+    def needs_lookup(self, dashboard_title: str) -> bool:
+        """Determine whether finding the id of a dashboard requires an API request."""
+        if self._title_index:
+            return False
+
+        return not (
+            self._id_cache
+            and self._id_cache.get(self._account_id, dashboard_title) is not None
+        )
 
-        return matching_dashboards[0]["id"]
+    def update_dashboard(
+        self,
+        dashboard_id: int,
+        dashboard: Dashboard,
+        payload: Optional[DashboardPayload] = None,
+    ) -> None:
+        """Update an existing dashboard with the given id, optionally from an already rendered payload.
 
-    def update_dashboard(self, dashboard_id: int, dashboard: Dashboard) -> None:
-        """Update an existing dashboard with the given id."""
+        Raises DashboardNotFoundException if there is no dashboard with the given id.
+        """
         url = f"{BASE_URL}dashboards/{dashboard_id}.json"
-        self._send_dashboard_data(requests.put, url, dashboard)
+        try:
+            self._send_dashboard_data("PUT", url, dashboard, payload)
+        except DashboardNotFoundException:
+            # The dashboard was deleted since its id was cached or indexed
+            if self._title_index:
+                self._title_index.remove(dashboard_id)
+            if self._id_cache:
+                self._id_cache.invalidate(self._account_id, dashboard_id)
+            self._invalidate_title_lookup(dashboard.title)
+            raise
+
+        self._invalidate_title_lookup(dashboard.title)
 
     def _auth_headers(self):
         """Get headers for making authenticated requests."""
         return {"X-Api-Key": self._api_key}
 
-    def _dashboard_to_dict(self, dashboard: Dashboard) -> Dict:
-        """Convert a dashboard into a dictionary that can be posted to the New Relic API."""
-        widgets = [self._widget_to_dict(widget) for widget in dashboard.widgets]
-        return {
-            "dashboard": {
-                "metadata": {"version": 1},
-                "title": dashboard.title,
-                "icon": "usd",
-                "visibility": "all",
-                "editable": "editable_by_all",
-                "filter": {},
-                "widgets": widgets,
-            }
-        }
+    def _request(self, method, url, **kwargs):
+        """Make a throttled, authenticated request to the New Relic API."""
+        headers = self._auth_headers()
+        headers.update(kwargs.pop("headers", {}))
+
+        if self._deadline:
+            self._deadline.check()
+
+        if self._circuit_breaker:
+            self._circuit_breaker.check()
+
+        # Waiting for the throttle is not API latency, so it happens before taking a slot
+        self._throttle.wait()
+        if not self._limiter:
+            return self._send_request(method, url, headers, kwargs, slot=None)
+
+        with self._limiter.slot() as slot:
+            return self._send_request(method, url, headers, kwargs, slot)
+
+    def _get(self, url, params):
+        """Make a GET request, using the response cache if there is one."""
+        if not self._response_cache:
+            return self._send_get(url, params, headers={})
+
+        cache_key = create_cache_key(self._account_id, url, params)
+        cached = self._response_cache.get(cache_key)
+        if cached and cached.can_revalidate:
+            headers = cached.conditional_headers()
+        elif cached and self._response_cache.is_fresh(cached):
+            return cached
+        else:
+            headers = {}
+
+        response = self._send_get(url, params, headers)
+        if response.status_code == 304 and cached:
+            cached = attr.evolve(cached, stored_at=time.time())
+            self._response_cache.put(cache_key, cached)
+            return cached
+
+        if response.status_code == 200:
+            self._response_cache.put(
+                cache_key,
+                CachedResponse(
+                    status_code=response.status_code,
+                    content=response.content,
+                    stored_at=time.time(),
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                ),
+            )
 
-    def _send_dashboard_data(self, http_call, url, dashboard):
+        return response
+
+    def _invalidate_title_lookup(self, dashboard_title):
+        """Remove the cached lookup of a dashboard title after the dashboard changed."""
+        if self._response_cache:
+            params = {"filter[title]": dashboard_title}
+            self._response_cache.invalidate(
+                create_cache_key(self._account_id, DASHBOARDS_URL, params)
+            )
+
+    def _record_outcome(self, outcome, slot):
+        """Record the outcome of a request with the limiter and circuit breaker."""
+        if slot:
+            slot.outcome = outcome
+
+        if self._circuit_breaker:
+            self._circuit_breaker.record(outcome)
+
+    def _record_trace(
+        self, started_at, method, url, headers, kwargs, response=None, error=None
+    ):
+        """Record a request to the trace recorder if there is one."""
+        if not self._recorder:
+            return
+
+        if kwargs.get("params"):
+            url = f"{url}?{urlencode(kwargs['params'])}"
+
+        self._recorder.record(
+            started_at,
+            self._account_id,
+            method,
+            url,
+            headers,
+            request_bytes=len(kwargs.get("data") or b""),
+            response=response,
+            error=error,
+            secrets=[self._api_key],
+        )
+
+    def _request_timeout(self):
+        """Get the connect and read timeouts of a request, cut short by the deadline."""
+        if not self._deadline:
+            return self._timeout
+
+        self._deadline.check()
+        remaining = self._deadline.remaining()
+        connect_timeout, read_timeout = self._timeout
+        return min(connect_timeout, remaining), min(read_timeout, remaining)
+
+    def _send_get(self, url, params, headers):
+        """Send a GET request, hedging it if there is a hedger."""
+        if not self._hedger:
+            return self._request("GET", url, params=params, headers=headers)
+
+        return self._hedger.send(
+            lambda: self._request("GET", url, params=params, headers=headers)
+        )
+
+    def _send_request(self, method, url, headers, kwargs, slot):
+        """Send a request, recording its outcome."""
+        timeout = self._request_timeout()
+        with tracing.span(
+            f"HTTP {method}",
+            kind=tracing.SpanKind.CLIENT,
+            account_id=self._account_id,
+            **{"http.method": method, "http.url": url},
+        ) as span:
+            if "data" in kwargs:
+                span.set_attribute("http.request_content_length", len(kwargs["data"]))
+            started_at = time.perf_counter()
+            try:
+                response = self._transport.request(
+                    method, url, headers, timeout, **kwargs
+                )
+            except TransportTimeoutException as error:
+                self._record_trace(
+                    started_at,
+                    method,
+                    url,
+                    headers,
+                    kwargs,
+                    error=RecordedError.TIMEOUT,
+                )
+                self._record_outcome(RequestOutcome.TIMEOUT, slot)
+                if self._deadline and self._deadline.expired:
+                    raise DeadlineExceededException(
+                        f"Build deadline passed while sending {method} {url}"
+                    )
+                raise NewRelicApiException(f"Timed out sending {method} {url}: {error}")
+            except TransportException as error:
+                self._record_trace(
+                    started_at,
+                    method,
+                    url,
+                    headers,
+                    kwargs,
+                    error=RecordedError.TRANSPORT,
+                )
+                self._record_outcome(RequestOutcome.SERVER_ERROR, slot)
+                raise NewRelicApiException(f"Failed sending {method} {url}: {error}")
+
+            span.set_attribute("http.status_code", response.status_code)
+            self._record_trace(
+                started_at, method, url, headers, kwargs, response=response
+            )
+            self._record_outcome(_classify_response(response), slot)
+            return response
+
+    def _send_dashboard_data(self, method, url, dashboard, payload):
         """Send dashboard data to New Relic API."""
-        dashboard_dict = self._dashboard_to_dict(dashboard)
-        response = http_call(url, headers=self._auth_headers(), json=dashboard_dict)
+        if payload is None:
+            payload = render_dashboard_payload(dashboard)
+
+        response = self._request(
+            method,
+            url,
+            headers={"Content-Type": "application/json"},
+            data=payload.for_account(self._account_id),
+        )
+
+        if response.status_code == 404:
+            raise DashboardNotFoundException(
+                f"Failed updating dashboard {dashboard.name}, it does not exist at {url}"
+            )
 
         if response.status_code not in (200, 201):
             raise NewRelicApiException(
                 f"Failed creating dashboard {dashboard.name} with status = {response.status_code}, response = {response.content}"
             )
 
-    def _widget_to_dict(self, widget: Widget) -> Dict:
-        """Convert a widget into a dictionary that can be posted to the New Relic API."""
-        return {
-            "account_id": self._account_id,
-            "visualization": widget.visualization.value,
-            "data": [{"nrql": widget.query}],
-            "presentation": {"title": widget.title, "notes": widget.notes},
-            "layout": {
-                "width": widget.width,
-                "height": widget.height,
-                "row": widget.row,
-                "column": widget.column,
-            },
+        return response
+
+
+class _TitleIndex:
+    """Ids of every dashboard on an account by title, safe to share between threads."""
+
+    def __init__(self) -> None:
+        """Initialize empty index."""
+        self._ids: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, title: str, dashboard_id: int) -> None:
+        """Add a dashboard to the index."""
+        with self._lock:
+            self._ids.setdefault(title, []).append(dashboard_id)
+
+    def find(self, title: str) -> List[int]:
+        """Get the ids of all dashboards with a title."""
+        with self._lock:
+            return list(self._ids.get(title, ()))
+
+    def remove(self, dashboard_id: int) -> None:
+        """Remove a dashboard from the index."""
+        with self._lock:
+            for ids in self._ids.values():
+                if dashboard_id in ids:
+                    ids.remove(dashboard_id)
+
+
+def is_managed_dashboard(listed_dashboard: Dict) -> bool:
+    """Determine whether a dashboard from a dashboard listing was created by nrdash."""
+    metadata = listed_dashboard.get("metadata") or {}
+    return metadata.get("managed_by") == _MANAGED_BY
+
+
+def render_dashboard_payload(dashboard: Dashboard) -> DashboardPayload:
+    """Render a dashboard into a request body that can be sent to any account."""
+    with tracing.span("render_dashboard_payload", dashboard=dashboard.name) as span:
+        dashboard_dict = _dashboard_to_dict(dashboard, _ACCOUNT_ID_PLACEHOLDER)
+        body = json.dumps(dashboard_dict, separators=(",", ":")).encode()
+        span.set_attribute("payload_bytes", len(body))
+
+    return DashboardPayload(dashboard=dashboard, body=body)
+
+
+def _classify_response(response) -> RequestOutcome:
+    """Classify a response by what it indicates about the health of the API."""
+    if response.status_code == 429:
+        return RequestOutcome.THROTTLED
+
+    if response.status_code in (503, 504):
+        # The API is overloaded or did not respond in time
+        return RequestOutcome.TIMEOUT
+
+    if response.status_code >= 500:
+        return RequestOutcome.SERVER_ERROR
+
+    return RequestOutcome.SUCCESS
+
+
+def _dashboard_to_dict(dashboard: Dashboard, account_id) -> Dict:
+    """Convert a dashboard into a dictionary that can be posted to the New Relic API."""
+    with tracing.span(
+        "dashboard_to_dict",
+        dashboard=dashboard.name,
+        widget_count=len(dashboard.widgets),
+    ):
+        widgets = [_widget_to_dict(widget, account_id) for widget in dashboard.widgets]
+
+    return {
+        "dashboard": {
+            "metadata": {"version": 1, "managed_by": _MANAGED_BY},
+            "title": dashboard.title,
+            "icon": "usd",
+            "visibility": "all",
+            "editable": "editable_by_all",
+            "filter": {},
+            "widgets": widgets,
         }
+    }
+
+
+def _single_dashboard_id(dashboard_title, dashboard_ids):
+    """Get the id of the only dashboard with a title, None if there is none."""
+    if not dashboard_ids:
+        return None
+
+    if len(dashboard_ids) > 1:
+        raise NewRelicApiException(
+            f"Multiple dashboards found with title '{dashboard_title}'"
+        )
+
+    return dashboard_ids[0]
+
+
+def _widget_to_dict(widget: Widget, account_id) -> Dict:
+    """Convert a widget into a dictionary that can be posted to the New Relic API."""
+    return {
+        "account_id": account_id,
+        "visualization": widget.visualization.value,
+        "data": [{"nrql": widget.query}],
+        "presentation": {"title": widget.title, "notes": widget.notes},
+        "layout": {
+            "width": widget.width,
+            "height": widget.height,
+            "row": widget.row,
+            "column": widget.column,
+        },
+    }
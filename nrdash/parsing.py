@@ -1,22 +1,41 @@
 """Parses input configuration files."""
+import collections
+import re
 from enum import Enum
-from typing import Dict, Iterable
+from typing import (
+    Container,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
 
 import attr
-import yaml
 
+from . import layout, loading, schema, tracing
 from .models import (
+    Account,
     ComponentizedQuery,
     Dashboard,
+    DashboardTemplate,
     Widget,
+    ConditionLimitExceededException,
+    ConfigurationLimitExceededException,
+    DuplicateDashboardException,
     InvalidExtendingConditionException,
-    InvalidOutputConfigurationException,
     InvalidQueryConfigurationException,
+    InvalidTemplateConfigurationException,
     InvalidWidgetConfigurationException,
+    ParseLimits,
     Query,
     QueryDisplay,
     QueryCondition,
     QueryOutputSelection,
+    TemplateString,
+    WidgetTemplate,
     WidgetVisualization,
 )
 
@@ -28,6 +47,24 @@ class _ExtendingConditionOperator(Enum):
     OR = "OR"
 
 
+# Top level sections of a configuration file which are used to parse dashboards
+_CONFIG_SECTIONS = tuple(schema.CONFIG_SECTIONS)
+
+# Validators of the sections each public parse function reads, compiled once
+_validate_config = schema.compile_config_validator()
+_validate_conditions = schema.compile_config_validator(["conditions"])
+_validate_displays = schema.compile_config_validator(["displays"])
+_validate_output_selections = schema.compile_config_validator(
+    ["conditions", "output-selections"]
+)
+_validate_queries = schema.compile_config_validator(
+    ["conditions", "output-selections", "displays", "queries"]
+)
+_validate_accounts = schema.compile_schema(schema.ACCOUNTS)
+
+_TEMPLATE_PARAMETER_PATTERN = re.compile(r"\$\{([\w-]+)\}")
+
+
 @attr.s(frozen=True)
 class _ExtendingQueryCondition:
     """A query condition that extends another query condition."""
@@ -38,132 +75,364 @@ class _ExtendingQueryCondition:
     nrql_conditions: Iterable[str] = attr.ib()
 
 
-def parse_conditions(config: Dict) -> Dict[str, QueryCondition]:
-    """Parse conditions from configuration."""
-    condition_configs = config.get("conditions")
-    if not condition_configs:
-        return {}
+class _ConditionGraph(Mapping[str, QueryCondition]):
+    """Parsed conditions, rendering extending conditions lazily and at most once."""
 
-    base_conditions = {}
-    extending_conditions = {}
-    for name, condition_config in condition_configs.items():
-        if isinstance(condition_config, str):
-            base_conditions[name] = QueryCondition(name=name, nrql=condition_config)
-        else:
-            extending_conditions[name] = _parse_extending_condition(
-                name, condition_config
-            )
+    def __init__(self, base_conditions, extending_conditions, limits):
+        """Initialize graph, validating that every condition resolves within the limits."""
+        self._resolved = dict(base_conditions)
+        self._extending_conditions = extending_conditions
+        self._names = list(base_conditions) + list(extending_conditions)
 
-    return _resolve_all_extending_conditions(base_conditions, extending_conditions)
+        order = _order_extending_conditions(base_conditions, extending_conditions)
+        _check_condition_limits(base_conditions, extending_conditions, order, limits)
 
+    def __getitem__(self, name: str) -> QueryCondition:
+        """Get a condition, rendering it and any conditions it extends if necessary."""
+        condition = self._resolved.get(name)
+        if condition is not None:
+            return condition
 
-def parse_dashboards(config: Dict) -> Dict[str, Dashboard]:
-    """Parse dashboards from configuration."""
-    dashboard_configs = config.get("dashboards")
-    if not dashboard_configs:
-        return {}
+        if name not in self._extending_conditions:
+            raise KeyError(name)
+
+        # Render depth first without recursion, since condition hierarchies can be deep
+        pending = [name]
+        while pending:
+            extending_condition = self._extending_conditions[pending[-1]]
+            unresolved = [
+                extended_name
+                for extended_name in extending_condition.extended_conditions
+                if extended_name not in self._resolved
+            ]
+            if unresolved:
+                pending.extend(unresolved)
+                continue
+
+            pending.pop()
+            self._resolved[extending_condition.name] = _resolve_extended_condition(
+                self._resolved, extending_condition
+            )
 
-    queries = parse_queries(config)
-    dashboards = {}
+        return self._resolved[name]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate condition names."""
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        """Get the number of conditions."""
+        return len(self._names)
+
+
+def iter_dashboards(
+    config: Mapping,
+    limits: Optional[ParseLimits] = None,
+    dashboard_names: Optional[Container[str]] = None,
+) -> Iterator[Dashboard]:
+    """Parse dashboards from configuration, yielding each dashboard as soon as it is parsed.
+
+    The whole configuration is validated against the schema before the first dashboard is
+    yielded, including dashboards that are not selected. Components shared by dashboards,
+    such as queries, are resolved once up front. Dashboard templates are compiled once and
+    then expanded into one dashboard per matrix entry. If dashboard_names is provided, only
+    the dashboards with those names are parsed.
+    """
+    _validate_config(config)
+    dashboard_configs = config.get("dashboards") or {}
+    template_configs = config.get("dashboard-templates") or {}
+    if not dashboard_configs and not template_configs:
+        return
+
+    limits = limits or ParseLimits()
+    queries = _parse_queries(config, limits)
+    nrql_length = 0
     for name, dashboard_config in dashboard_configs.items():
-        widgets = []
-        for widget_config in dashboard_config["widgets"]:
-            widgets.append(_parse_widget(widget_config, name, queries))
+        if dashboard_names is None or name in dashboard_names:
+            dashboard = _parse_dashboard(name, dashboard_config, queries)
+            nrql_length = _check_nrql_length(dashboard, nrql_length, limits)
+            yield dashboard
+
+    defined_names = set(dashboard_configs)
+    for name, template_config in template_configs.items():
+        template = _compile_dashboard_template(name, template_config, queries)
+        _check_unique_template_titles(template)
+        for dashboard in template.expand():
+            if dashboard.name in defined_names:
+                raise InvalidTemplateConfigurationException(
+                    f"Dashboard template {name} creates dashboard {dashboard.name} which is already defined"
+                )
+
+            defined_names.add(dashboard.name)
+            if dashboard_names is None or dashboard.name in dashboard_names:
+                nrql_length = _check_nrql_length(dashboard, nrql_length, limits)
+                yield dashboard
+
+
+def iter_file(
+    file_path: str,
+    limits: Optional[ParseLimits] = None,
+    dashboard_names: Optional[Container[str]] = None,
+) -> Iterator[Dashboard]:
+    """Parse a dashboard configuration file, yielding each dashboard as soon as it is parsed.
+
+    If dashboard_names is provided, only the dashboards with those names are parsed and the
+    configuration of every other dashboard is skipped without being loaded.
+    """
+    return iter_dashboards(
+        _load_file(file_path, limits, dashboard_names), limits, dashboard_names
+    )
+
+
+def parse_accounts_file(file_path: str) -> List[Account]:
+    """Parse a file listing the accounts that dashboards are deployed to."""
+    with open(file_path, "r") as accounts_file:
+        config = loading.load(
+            accounts_file, sections=["accounts"], limits=ParseLimits()
+        )
 
-        dashboards[name] = Dashboard(
-            name=name, title=dashboard_config["title"], widgets=widgets
+    _validate_accounts(config, file_path)
+    return [
+        Account(
+            account_id=int(account_config["account-id"]),
+            api_key=account_config["api-key"],
         )
+        for account_config in config["accounts"]
+    ]
+
+
+def parse_conditions(
+    config: Dict, limits: Optional[ParseLimits] = None
+) -> Mapping[str, QueryCondition]:
+    """Parse conditions from configuration.
+
+    Conditions that extend other conditions are kept as a graph that shares the extended
+    conditions rather than copying them. Their NRQL is only rendered when a condition is
+    looked up, and each condition is rendered at most once. The size and depth that every
+    condition would have once rendered are checked against the limits up front.
+    """
+    _validate_conditions(config)
+    return _parse_conditions(config, limits)
+
+
+def parse_dashboards(
+    config: Mapping,
+    limits: Optional[ParseLimits] = None,
+    dashboard_names: Optional[Container[str]] = None,
+) -> Dict[str, Dashboard]:
+    """Parse dashboards from configuration, only the named dashboards if names are provided."""
+    with tracing.span("parse_dashboards") as span:
+        dashboards = {
+            dashboard.name: dashboard
+            for dashboard in iter_dashboards(config, limits, dashboard_names)
+        }
+        span.set_attribute("dashboard_count", len(dashboards))
 
     return dashboards
 
 
 def parse_displays(config: Dict) -> Dict[str, QueryDisplay]:
     """Parse display options from configuration."""
-    display_configs = config.get("displays")
-    if not display_configs:
-        return {}
-
-    displays = {}
-    for name, display_config in display_configs.items():
-        displays[name] = QueryDisplay(
-            name=name,
-            nrql=display_config.get("nrql"),
-            visualization=WidgetVisualization.from_str(display_config["visualization"]),
+    _validate_displays(config)
+    return _parse_displays(config)
+
+
+def parse_file(
+    file_path: str,
+    limits: Optional[ParseLimits] = None,
+    dashboard_names: Optional[Container[str]] = None,
+) -> Dict[str, Dashboard]:
+    """Parse a dashboard configuration file.
+
+    If dashboard_names is provided, only the dashboards with those names are parsed and the
+    configuration of every other dashboard is skipped without being loaded.
+    """
+    with tracing.span("parse_file", file_path=file_path):
+        return parse_dashboards(
+            _load_file(file_path, limits, dashboard_names), limits, dashboard_names
         )
 
-    return displays
 
+def parse_files(
+    file_paths: Iterable[str],
+    limits: Optional[ParseLimits] = None,
+    dashboard_names: Optional[Container[str]] = None,
+) -> Dict[str, Dashboard]:
+    """Parse several dashboard configuration files that are built together.
+
+    Every file is parsed before anything is returned, so that a dashboard name or title
+    defined by more than one file is detected before any dashboard is deployed. If
+    dashboard_names is provided, only the dashboards with those names are parsed.
+    """
+    dashboards: Dict[str, Dashboard] = {}
+    name_files: Dict[str, Tuple[int, str]] = {}
+    title_files: Dict[str, Tuple[int, str]] = {}
+    for file_index, file_path in enumerate(file_paths):
+        source = (file_index, file_path)
+        for dashboard in iter_file(file_path, limits, dashboard_names):
+            _check_unique_dashboard_field("name", dashboard.name, source, name_files)
+            _check_unique_dashboard_field("title", dashboard.title, source, title_files)
+            dashboards[dashboard.name] = dashboard
 
-def parse_file(file_path: str) -> Dict[str, Dashboard]:
-    """Parse a dashboard configuration file."""
-    with open(file_path, "r") as config_file:
-        config = yaml.safe_load(config_file)
-
-    return parse_dashboards(config)
+    return dashboards
 
 
 def parse_output_selections(
-    config: Dict, conditions: Dict[str, QueryCondition]
+    config: Dict, conditions: Mapping[str, QueryCondition]
 ) -> Dict[str, QueryOutputSelection]:
     """Parse output selections from configuration."""
-    output_configs = config.get("output-selections")
-    if not output_configs:
-        return {}
+    _validate_output_selections(config)
+    return _parse_output_selections(config, conditions)
 
-    output_selections = {}
-    for name, output_config in output_configs.items():
-        if isinstance(output_config, str):
-            # Raw NRQL
-            output_selections[name] = QueryOutputSelection(
-                name=name, nrql=f"SELECT {output_config}"
-            )
-        elif isinstance(output_config, list):
-            nrql_components = [
-                _parse_output_selection_nrql_component(component_config, conditions)
-                for component_config in output_config
-            ]
 
-            output_selections[name] = QueryOutputSelection(
-                name=name, nrql=f"SELECT {', '.join(nrql_components)}"
+def parse_queries(
+    config: Dict, limits: Optional[ParseLimits] = None
+) -> Dict[str, Query]:
+    """Parse queries from configuration."""
+    _validate_queries(config)
+    return _parse_queries(config, limits)
+
+
+def parse_string(
+    config_text: str, limits: Optional[ParseLimits] = None
+) -> Dict[str, Dashboard]:
+    """Parse dashboard configuration held in a YAML string."""
+    with tracing.span("parse_string", size=len(config_text)):
+        config = loading.load(config_text, limits=limits or ParseLimits())
+        return parse_dashboards(config or {}, limits)
+
+
+def _check_condition_limits(base_conditions, extending_conditions, order, limits):
+    """Check the rendered length and depth of every condition without rendering any."""
+    lengths = {name: len(condition.nrql) for name, condition in base_conditions.items()}
+    depths = dict.fromkeys(base_conditions, 0)
+    for name in order:
+        extending_condition = extending_conditions[name]
+        operands = len(extending_condition.extended_conditions) + len(
+            extending_condition.nrql_conditions
+        )
+        # Each operand is wrapped in parentheses and operands are joined by " AND " or " OR "
+        length = (operands - 1) * (len(extending_condition.operator.value) + 2)
+        length += sum(
+            lengths[extended_name] + 2
+            for extended_name in extending_condition.extended_conditions
+        )
+        length += sum(len(nrql) + 2 for nrql in extending_condition.nrql_conditions)
+        depth = 1 + max(
+            depths[extended_name]
+            for extended_name in extending_condition.extended_conditions
+        )
+
+        if (
+            limits.max_condition_length is not None
+            and length > limits.max_condition_length
+        ):
+            raise ConditionLimitExceededException(
+                f"Condition {name} would render to {length} characters, exceeding the limit of {limits.max_condition_length}"
             )
-        elif isinstance(output_config, dict):
-            output_selections[name] = QueryOutputSelection(
-                name=name,
-                nrql=f"SELECT {_parse_output_selection_nrql_component(output_config, conditions)}",
+
+        if (
+            limits.max_condition_depth is not None
+            and depth > limits.max_condition_depth
+        ):
+            raise ConditionLimitExceededException(
+                f"Condition {name} extends conditions {depth} levels deep, exceeding the limit of {limits.max_condition_depth}"
             )
-        else:
-            raise InvalidOutputConfigurationException(output_config)
 
-    return output_selections
+        lengths[name] = length
+        depths[name] = depth
 
 
-def parse_queries(config: Dict) -> Dict[str, Query]:
-    """Parse queries from configuration."""
-    query_configs = config.get("queries")
-    if not query_configs:
-        return {}
+def _check_nrql_length(dashboard, nrql_length, limits):
+    """Add the NRQL of a dashboard's widgets to the total, raising an exception if it exceeds the limit."""
+    for widget in dashboard.widgets:
+        nrql_length += len(widget.query)
+        if limits.max_nrql_length is not None and nrql_length > limits.max_nrql_length:
+            raise ConfigurationLimitExceededException(
+                f"Widget {widget.title} of dashboard {dashboard.name} brings the NRQL of all widgets to "
+                f"{nrql_length} characters, exceeding the limit of {limits.max_nrql_length}"
+            )
+
+    return nrql_length
 
-    conditions = parse_conditions(config)
-    output_selections = parse_output_selections(config, conditions)
-    displays = parse_displays(config)
 
-    queries = {}
-    for name, query_config in query_configs.items():
-        queries[name] = _parse_query_config(
-            name, query_config, conditions, output_selections, displays
+def _check_unique_dashboard_field(field_name, value, source, value_sources):
+    """Check that no other file defines a dashboard with the same value of a field."""
+    other_source = value_sources.setdefault(value, source)
+    if other_source[0] != source[0]:
+        raise DuplicateDashboardException(
+            f"Dashboard {field_name} '{value}' is defined in both {other_source[1]} and {source[1]}"
         )
 
-    return queries
+
+def _check_unique_template_titles(template):
+    """Check that no two dashboards a template expands into have the same title."""
+    title_names = {}
+    for name, title in template.expand_titles():
+        other_name = title_names.setdefault(title, name)
+        if other_name != name:
+            raise InvalidTemplateConfigurationException(
+                f"Dashboard template {template.name} creates dashboards {other_name} and {name} "
+                f"with the same title '{title}'"
+            )
 
 
-def _can_condition_be_resolved(base_conditions, extending_condition):
-    """Determine whether an extending condition can be resolved."""
-    return all(
-        condition_name in base_conditions
-        for condition_name in extending_condition.extended_conditions
+def _compile_dashboard_template(template_name, template_config, queries):
+    """Compile a dashboard template so that it can be cheaply expanded for each matrix entry."""
+    matrix = {
+        str(parameter): [str(value) for value in values]
+        for parameter, values in template_config["matrix"].items()
+    }
+
+    widgets = [
+        _parse_widget(widget_config, template_name, queries)
+        for widget_config in template_config["widgets"]
+    ]
+    widget_templates = []
+    # Every dashboard a template expands into has the same layout
+    for widget in layout.arrange_widgets(widgets, template_name):
+        if widget.notes:
+            notes = _compile_template_string(widget.notes, template_name, matrix)
+        else:
+            notes = None
+
+        widget_templates.append(
+            WidgetTemplate(
+                title=_compile_template_string(widget.title, template_name, matrix),
+                query=_compile_template_string(widget.query, template_name, matrix),
+                notes=notes,
+                visualization=widget.visualization,
+                row=widget.row,
+                column=widget.column,
+                width=widget.width,
+                height=widget.height,
+            )
+        )
+
+    return DashboardTemplate(
+        name=template_name,
+        title=_compile_template_string(template_config["title"], template_name, matrix),
+        widgets=widget_templates,
+        matrix=matrix,
+        priority=template_config.get("priority", 0),
     )
 
 
+def _compile_template_string(text, template_name, matrix):
+    """Split a string into literal text and the template parameters placed between them."""
+    parts = _TEMPLATE_PARAMETER_PATTERN.split(text)
+    literals = tuple(parts[0::2])
+    parameters = tuple(parts[1::2])
+
+    for parameter in parameters:
+        if parameter not in matrix:
+            raise InvalidTemplateConfigurationException(
+                f"Unknown parameter {parameter} used in dashboard template {template_name}"
+            )
+
+    return TemplateString(literals=literals, parameters=parameters)
+
+
 def _create_grouped_output_selection_nrql(output_function, output_config, conditions):
     """Create a grouped output selection."""
     function = output_config["function"]
@@ -194,13 +463,25 @@ def _find_query_component(query_config, component_type, component_dict, query_na
     return component
 
 
+def _load_file(file_path, limits, dashboard_names):
+    """Load a YAML configuration file, skipping dashboards which are not named if names are provided."""
+    limits = limits or ParseLimits()
+    with open(file_path, "r") as config_file:
+        if dashboard_names is None:
+            return loading.load(config_file, limits=limits)
+
+        return loading.load(
+            config_file,
+            sections=_CONFIG_SECTIONS,
+            entries={"dashboards": dashboard_names},
+            limits=limits,
+        )
+
+
 def _parse_componentized_query_config(
     query_name, query_config, conditions, output_selections, displays
 ):
     """Parse a componentized query config."""
-    required_fields = ["output", "display", "title", "event"]
-    _validate_required_query_fields(required_fields, query_config, query_name)
-
     if "condition" in query_config:
         condition = _find_query_component(
             query_config, "condition", conditions, query_name
@@ -226,30 +507,81 @@ def _parse_componentized_query_config(
     )
 
 
+def _parse_conditions(config, limits=None):
+    """Parse conditions from configuration."""
+    condition_configs = config.get("conditions")
+    if not condition_configs:
+        return {}
+
+    with tracing.span("parse_conditions", condition_count=len(condition_configs)):
+        base_conditions = {}
+        extending_conditions = {}
+        for name, condition_config in condition_configs.items():
+            if isinstance(condition_config, str):
+                base_conditions[name] = QueryCondition(name=name, nrql=condition_config)
+            else:
+                extending_conditions[name] = _parse_extending_condition(
+                    name, condition_config
+                )
+
+        return _ConditionGraph(
+            base_conditions, extending_conditions, limits or ParseLimits()
+        )
+
+
+def _parse_dashboard(name, dashboard_config, queries):
+    """Parse a single dashboard from configuration."""
+    with tracing.span(
+        "parse_dashboard", dashboard=name, widget_count=len(dashboard_config["widgets"])
+    ):
+        widgets = []
+        for widget_config in dashboard_config["widgets"]:
+            widgets.append(_parse_widget(widget_config, name, queries))
+
+        return Dashboard(
+            name=name,
+            title=dashboard_config["title"],
+            widgets=layout.arrange_widgets(widgets, name),
+            priority=dashboard_config.get("priority", 0),
+        )
+
+
+def _parse_displays(config):
+    """Parse display options from configuration."""
+    display_configs = config.get("displays")
+    if not display_configs:
+        return {}
+
+    with tracing.span("parse_displays", display_count=len(display_configs)):
+        displays = {}
+        for name, display_config in display_configs.items():
+            displays[name] = QueryDisplay(
+                name=name,
+                nrql=display_config.get("nrql"),
+                visualization=WidgetVisualization.from_str(
+                    display_config["visualization"]
+                ),
+            )
+
+        return displays
+
+
 def _parse_extending_condition(condition_name, condition_config):
     """Parse an extending condition."""
     if "and" in condition_config:
         operator = _ExtendingConditionOperator.AND
         operand_configs = condition_config["and"]
-    elif "or" in condition_config:
+    else:
         operator = _ExtendingConditionOperator.OR
         operand_configs = condition_config["or"]
-    else:
-        raise InvalidExtendingConditionException(
-            f"Invalid operator for extending condition {condition_name}: {condition_config}"
-        )
 
     extended_conditions = []
     nrql_conditions = []
     for operand_config in operand_configs:
         if isinstance(operand_config, str):
             nrql_conditions.append(operand_config)
-        elif isinstance(operand_config, dict) and "condition" in operand_config:
-            extended_conditions.append(operand_config["condition"])
         else:
-            raise InvalidExtendingConditionException(
-                f"Invalid operands for extending condition {condition_name}: {condition_config}"
-            )
+            extended_conditions.append(operand_config["condition"])
 
     if not extended_conditions:
         raise InvalidExtendingConditionException(
@@ -266,9 +598,6 @@ def _parse_extending_condition(condition_name, condition_config):
 
 def _parse_inline_query_config(query_name, query_config):
     """Parse an inline query config."""
-    required_fields = ["title", "nrql", "visualization"]
-    _validate_required_query_fields(required_fields, query_config, query_name)
-
     return Query(
         name=query_name,
         title=query_config["title"],
@@ -278,26 +607,74 @@ def _parse_inline_query_config(query_name, query_config):
     )
 
 
+def _parse_output_selections(config, conditions):
+    """Parse output selections from configuration."""
+    output_configs = config.get("output-selections")
+    if not output_configs:
+        return {}
+
+    with tracing.span(
+        "parse_output_selections", output_selection_count=len(output_configs)
+    ):
+        output_selections = {}
+        for name, output_config in output_configs.items():
+            if isinstance(output_config, str):
+                # Raw NRQL
+                output_selections[name] = QueryOutputSelection(
+                    name=name, nrql=f"SELECT {output_config}"
+                )
+            elif isinstance(output_config, list):
+                nrql_components = [
+                    _parse_output_selection_nrql_component(component_config, conditions)
+                    for component_config in output_config
+                ]
+
+                output_selections[name] = QueryOutputSelection(
+                    name=name, nrql=f"SELECT {', '.join(nrql_components)}"
+                )
+            else:
+                output_selections[name] = QueryOutputSelection(
+                    name=name,
+                    nrql=f"SELECT {_parse_output_selection_nrql_component(output_config, conditions)}",
+                )
+
+        return output_selections
+
+
 def _parse_output_selection_nrql_component(output_config, conditions):
     """Parse an output selection configuration dictionary."""
     if isinstance(output_config, str):
         # Raw NRQL
         return output_config
 
-    if not isinstance(output_config, dict):
-        raise InvalidOutputConfigurationException(output_config)
-
     if "filter" in output_config:
         return _create_grouped_output_selection_nrql(
             "FILTER", output_config["filter"], conditions
         )
 
-    if "percentage" in output_config:
-        return _create_grouped_output_selection_nrql(
-            "PERCENTAGE", output_config["percentage"], conditions
-        )
+    return _create_grouped_output_selection_nrql(
+        "PERCENTAGE", output_config["percentage"], conditions
+    )
 
-    raise InvalidOutputConfigurationException(output_config)
+
+def _parse_queries(config, limits=None):
+    """Parse queries from configuration."""
+    query_configs = config.get("queries")
+    if not query_configs:
+        return {}
+
+    with tracing.span("parse_queries", query_count=len(query_configs)):
+        conditions = _parse_conditions(config, limits)
+        output_selections = _parse_output_selections(config, conditions)
+        displays = _parse_displays(config)
+
+        queries = {}
+        for name, query_config in query_configs.items():
+            queries[name] = _parse_query_config(
+                name, query_config, conditions, output_selections, displays
+            )
+
+        return queries
 
 
 def _parse_query_config(
@@ -314,80 +691,77 @@ def _parse_query_config(
 
 def _parse_widget(widget_config, dashboard_name, queries):
     """Parse dashboard widgets from configuration."""
-    required_fields = ["query", "row", "column", "width", "height"]
-    for field in required_fields:
-        _validate_required_widget_field(field, widget_config, dashboard_name)
-
-    query_config = widget_config["query"]
-
-    if isinstance(query_config, str):
-        # Refers to a query defined in the "queries" section
-        query = queries.get(query_config)
-        if not query:
-            raise InvalidWidgetConfigurationException(
-                f"Invalid query name, {query_config}, specified for widget on dashboard {dashboard_name}"
-            )
-    else:
-        query = _parse_inline_query_config(
-            f"{dashboard_name}-inline-query", query_config
-        )
-
-    widget = Widget(
-        title=query.title,
-        query=query.nrql,
-        notes=query.notes,
-        visualization=query.visualization,
-        row=widget_config["row"],
-        column=widget_config["column"],
-        width=widget_config["width"],
-        height=widget_config["height"],
-    )
-
-    return widget
-
-
-def _resolve_all_extending_conditions(base_conditions, extending_conditions):
-    """Resolve all conditions that extend other conditions."""
-    conditions_to_resolve = len(extending_conditions)
-    while conditions_to_resolve > 0:
-        unresolved_conditions = [
-            extending_condition
-            for condition_name, extending_condition in extending_conditions.items()
-            if condition_name not in base_conditions
-        ]
-
-        resolvable_conditions = [
-            extending_condition
-            for extending_condition in unresolved_conditions
-            if _can_condition_be_resolved(base_conditions, extending_condition)
-        ]
-
-        if not resolvable_conditions:
-            unresolved_names = ",".join(
-                (
-                    extending_condition.name
-                    for extending_condition in unresolved_conditions
+    with tracing.span("parse_widget", dashboard=dashboard_name):
+        query_config = widget_config["query"]
+
+        if isinstance(query_config, str):
+            # Refers to a query defined in the "queries" section
+            query = queries.get(query_config)
+            if not query:
+                raise InvalidWidgetConfigurationException(
+                    f"Invalid query name, {query_config}, specified for widget on dashboard {dashboard_name}"
                 )
-            )
-            raise InvalidExtendingConditionException(
-                f"Extending conditions do not reference valid conditions and cannot be resolved: {unresolved_names}"
+        else:
+            query = _parse_inline_query_config(
+                f"{dashboard_name}-inline-query", query_config
             )
 
-        for extending_condition in resolvable_conditions:
-            base_conditions[extending_condition.name] = _resolve_extended_condition(
-                base_conditions, extending_condition
-            )
+        widget = Widget(
+            title=query.title,
+            query=query.nrql,
+            notes=query.notes,
+            visualization=query.visualization,
+            row=widget_config["row"],
+            column=widget_config.get("column"),
+            width=widget_config["width"],
+            height=widget_config["height"],
+        )
 
-        conditions_to_resolve -= len(resolvable_conditions)
+        return widget
+
+
+def _order_extending_conditions(base_conditions, extending_conditions):
+    """Order extending conditions so that every condition comes after those it extends."""
+    remaining_references = {}
+    dependents = collections.defaultdict(list)
+    ready = collections.deque()
+    for name, extending_condition in extending_conditions.items():
+        references = 0
+        for extended_name in extending_condition.extended_conditions:
+            if extended_name not in base_conditions:
+                # Never satisfied if the extended condition is not defined at all
+                references += 1
+                dependents[extended_name].append(name)
+
+        remaining_references[name] = references
+        if not references:
+            ready.append(name)
+
+    order = []
+    while ready:
+        name = ready.popleft()
+        order.append(name)
+        for dependent in dependents[name]:
+            remaining_references[dependent] -= 1
+            if not remaining_references[dependent]:
+                ready.append(dependent)
+
+    if len(order) != len(extending_conditions):
+        unresolved_names = ",".join(
+            name for name, references in remaining_references.items() if references
+        )
+        raise InvalidExtendingConditionException(
+            f"Extending conditions do not reference valid conditions and cannot be resolved: {unresolved_names}"
+        )
 
-    return base_conditions
+    return order
 
 
-def _resolve_extended_condition(base_conditions, extending_condition):
-    """Resolve extended condition."""
+def _resolve_extended_condition(resolved_conditions, extending_condition):
+    """Resolve extended condition, all conditions it extends must already be resolved."""
     nrql_conditions = []
     for condition_name in extending_condition.extended_conditions:
-        nrql_conditions.append(f"({base_conditions[condition_name].nrql})")
+        nrql_conditions.append(f"({resolved_conditions[condition_name].nrql})")
 
     for condition in extending_condition.nrql_conditions:
         nrql_conditions.append(f"({condition})")
@@ -396,30 +770,3 @@ def _resolve_extended_condition(base_conditions, extending_condition):
     condition_nrql = f" {operator} ".join(nrql_conditions)
 
     return QueryCondition(name=extending_condition.name, nrql=condition_nrql)
-
-
-def _validate_required_field(exception, config_type, field_name, config, config_name):
-    """Validate required field is present."""
-    if field_name not in config:
-        raise exception(
-            f"Field {field_name} is required for {config_type} {config_name}"
-        )
-
-
-def _validate_required_query_fields(field_names, config, query_name):
-    """Validate all required query fields are present."""
-    for field_name in field_names:
-        _validate_required_field(
-            InvalidQueryConfigurationException, "query", field_name, config, query_name
-        )
-
-
-def _validate_required_widget_field(field_name, config, dashboard_name):
-    """Validate required widget field is present."""
-    _validate_required_field(
-        InvalidWidgetConfigurationException,
-        "widget",
-        field_name,
-        config,
-        dashboard_name,
-    )
@@ -0,0 +1,87 @@
+"""Removal of dashboards that are no longer defined in configuration."""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Collection, Dict, List, Optional
+
+import attr
+
+from .defaults import DEFAULT_MAX_WORKERS
+from .models import NewRelicApiException
+from .new_relic_api import NewRelicApiClient, is_managed_dashboard
+
+
+@attr.s(frozen=True)
+class PruneResult:
+    """The result of pruning a single dashboard from a single account."""
+
+    account_id: int = attr.ib()
+    dashboard_id: int = attr.ib()
+    title: str = attr.ib()
+    deleted: bool = attr.ib()
+    error: Optional[str] = attr.ib(default=None)
+
+
+def find_orphaned_dashboards(
+    client: NewRelicApiClient, titles: Collection[str]
+) -> List[Dict]:
+    """Find dashboards created by nrdash whose titles are no longer configured.
+
+    Every dashboard on the account is listed once. Dashboards not created by nrdash are
+    never considered orphaned, whatever their titles.
+    """
+    return [
+        dashboard
+        for dashboard in client.list_dashboards()
+        if is_managed_dashboard(dashboard) and dashboard["title"] not in titles
+    ]
+
+
+def prune_dashboards(
+    clients: List[NewRelicApiClient],
+    titles: Collection[str],
+    dry_run: bool = True,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    on_result: Optional[Callable[[PruneResult], None]] = None,
+) -> List[PruneResult]:
+    """Delete orphaned dashboards from every account, deleting concurrently.
+
+    Accounts are listed concurrently and then all orphaned dashboards are deleted
+    concurrently, throttled per account by each client. In a dry run, orphaned dashboards
+    are only reported. The on_result callback, if provided, is called with each result as
+    soon as it is available.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        orphans = executor.map(
+            lambda client: find_orphaned_dashboards(client, titles), clients
+        )
+        futures = [
+            executor.submit(_prune_dashboard, client, dashboard, dry_run)
+            for client, client_orphans in zip(clients, orphans)
+            for dashboard in client_orphans
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+    return results
+
+
+def _prune_dashboard(client, dashboard, dry_run):
+    """Delete a single dashboard unless this is a dry run."""
+    result = PruneResult(
+        account_id=client.account_id,
+        dashboard_id=dashboard["id"],
+        title=dashboard["title"],
+        deleted=False,
+    )
+    if dry_run:
+        return result
+
+    try:
+        client.delete_dashboard(dashboard["id"])
+    except NewRelicApiException as error:
+        return attr.evolve(result, error=str(error))
+
+    return attr.evolve(result, deleted=True)
@@ -0,0 +1,143 @@
+"""Records the timing, size, and outcome of API requests to a trace file.
+
+A trace holds no API keys or request and response bodies, so traces of production builds
+can be shared and replayed against a local stub of the API with nrdash.replay.
+"""
+import json
+import threading
+import time
+from enum import Enum, unique
+from typing import Dict, List, Mapping, Optional
+
+import attr
+
+# Headers whose values are secret, compared case-insensitively
+_SECRET_HEADERS = ("authorization", "x-api-key", "x-query-key")
+
+_REDACTED = "REDACTED"
+
+
+@unique
+class RecordedError(Enum):
+    """Why a recorded request did not receive a response."""
+
+    TIMEOUT = "timeout"
+    TRANSPORT = "transport"
+
+
+@attr.s(frozen=True)
+class TraceEntry:
+    """A single recorded API request."""
+
+    # Seconds from the start of the recording until the request was sent
+    offset: float = attr.ib()
+    duration: float = attr.ib()
+    account_id: int = attr.ib()
+    method: str = attr.ib()
+    url: str = attr.ib()
+    request_headers: Dict[str, str] = attr.ib(factory=dict)
+    request_bytes: int = attr.ib(default=0)
+    status_code: Optional[int] = attr.ib(default=None)
+    response_bytes: int = attr.ib(default=0)
+    retry_after: Optional[str] = attr.ib(default=None)
+    error: Optional[RecordedError] = attr.ib(
+        default=None, converter=attr.converters.optional(RecordedError)
+    )
+
+
+class TraceRecorder:
+    """Appends recorded requests to a trace file, safe to share between threads and clients.
+
+    Each request is written as a single JSON line as soon as it completes, in order of
+    completion, so the trace survives the build being interrupted.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Create a trace file, replacing any existing file, and start the recording."""
+        self._lock = threading.Lock()
+        self._file = open(path, "w")
+        self._started_at = time.perf_counter()
+
+    def __enter__(self) -> "TraceRecorder":
+        """Enter context, the recorder is closed on exit."""
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        """Close the recorder on exiting context."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the trace file."""
+        with self._lock:
+            self._file.close()
+
+    def record(
+        self,
+        started_at: float,
+        account_id: int,
+        method: str,
+        url: str,
+        request_headers: Mapping[str, str],
+        request_bytes: int = 0,
+        response=None,
+        error: Optional[RecordedError] = None,
+        secrets: Optional[List[str]] = None,
+    ) -> TraceEntry:
+        """Record a request that was sent at started_at, a time.perf_counter() value.
+
+        Secret headers and every occurrence of the given secrets, such as the API key, are
+        redacted. Returns the recorded entry.
+        """
+        completed_at = time.perf_counter()
+        entry = TraceEntry(
+            offset=started_at - self._started_at,
+            duration=completed_at - started_at,
+            account_id=account_id,
+            method=method,
+            url=_redact(url, secrets),
+            request_headers=_redact_headers(request_headers, secrets),
+            request_bytes=request_bytes,
+            status_code=response.status_code if response is not None else None,
+            response_bytes=len(response.content) if response is not None else 0,
+            retry_after=(
+                response.headers.get("Retry-After") if response is not None else None
+            ),
+            error=error,
+        )
+        line = json.dumps(
+            dict(attr.asdict(entry), error=error.value if error else None),
+            separators=(",", ":"),
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+        return entry
+
+
+def read_trace(path: str) -> List[TraceEntry]:
+    """Read every entry of a trace file in order of when its request was sent."""
+    entries = []
+    with open(path, "r") as trace_file:
+        for line in trace_file:
+            if line.strip():
+                entries.append(TraceEntry(**json.loads(line)))
+
+    return sorted(entries, key=lambda entry: entry.offset)
+
+
+def _redact(text, secrets):
+    """Replace every occurrence of the secrets in a text."""
+    for secret in secrets or ():
+        if secret:
+            text = text.replace(secret, _REDACTED)
+
+    return text
+
+
+def _redact_headers(headers, secrets):
+    """Copy request headers with the values of secret headers and any secrets redacted."""
+    return {
+        name: _REDACTED if name.lower() in _SECRET_HEADERS else _redact(value, secrets)
+        for name, value in headers.items()
+    }
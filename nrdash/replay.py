@@ -0,0 +1,215 @@
+"""Replays recorded API traffic from a local stub of the New Relic API.
+
+The stub answers each request with the status code, Retry-After header, and response size
+recorded for a request of the same method, after the recorded latency, and drops the
+connection where the recorded request failed. Clients are pointed at the stub with a
+transport that redirects API requests to it, so that a build recorded in production can be
+reproduced offline with different concurrency, throttling, and hedging settings.
+"""
+import hashlib
+import itertools
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, Iterator, Optional, Sequence
+from urllib.parse import parse_qs, urlsplit
+
+from .new_relic_api import BASE_URL
+from .recording import TraceEntry
+from .transport import RequestsTransport, Transport
+
+
+class TraceStub:
+    """A local stub of the New Relic API replaying the latency and errors of a trace.
+
+    Requests are answered in the order they arrive, each with the next recorded request of
+    the same method, starting over once all of them were replayed. Dashboard lookups find
+    dashboards in the proportion that recorded builds updated rather than created them.
+    """
+
+    def __init__(self, entries: Sequence[TraceEntry], speedup: float = 1.0) -> None:
+        """Initialize stub replaying recorded entries, with latencies divided by speedup."""
+        if not entries:
+            raise ValueError("Cannot replay an empty trace")
+
+        self._speedup = speedup
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Iterator[TraceEntry]] = {}
+        for method in {entry.method for entry in entries}:
+            self._entries[method] = itertools.cycle(
+                [entry for entry in entries if entry.method == method]
+            )
+        self._fallback = itertools.cycle(entries)
+        self._created_ids = itertools.count(1)
+        methods = [entry.method for entry in entries]
+        updates = methods.count("PUT")
+        self._found_ratio = updates / max(1, updates + methods.count("POST"))
+        self._server: Optional[HTTPServer] = None
+
+    def __enter__(self) -> "TraceStub":
+        """Start serving, the stub is stopped on exit."""
+        self.start()
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        """Stop serving on exiting context."""
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        """Get the base URL of the stub, which stands in for the API's base URL."""
+        if not self._server:
+            raise RuntimeError("Trace stub is not started")
+
+        host, port = self._server.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+
+        return f"http://{host}:{port}/v2/"
+
+    def create_transport(self, transport: Optional[Transport] = None) -> Transport:
+        """Create a transport sending API requests to the stub through another transport."""
+        return _RedirectingTransport(transport or RequestsTransport(), self.url)
+
+    def start(self) -> None:
+        """Start serving requests in a background thread on a free local port."""
+        self._server = _ThreadingHTTPServer(("127.0.0.1", 0), _ReplayHandler)
+        self._server.stub = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop serving requests."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def next_entry(self, method: str) -> TraceEntry:
+        """Get the recorded entry to replay for the next request of a method."""
+        with self._lock:
+            return next(self._entries.get(method, self._fallback))
+
+    def respond(self, method: str, path: str, entry: TraceEntry) -> bytes:
+        """Create the body of a replayed response, padded to the recorded size."""
+        if entry.status_code not in (200, 201):
+            body: Dict[str, Any] = {
+                "error": {"title": f"Replayed status {entry.status_code}"}
+            }
+        elif method == "GET":
+            body = {"dashboards": self._find_dashboards(path)}
+        elif method == "POST":
+            with self._lock:
+                body = {"dashboard": {"id": next(self._created_ids)}}
+        else:
+            body = {"dashboard": {"id": _dashboard_id(path)}}
+
+        content = json.dumps(body).encode()
+        return content + b" " * max(0, entry.response_bytes - len(content))
+
+    def sleep(self, entry: TraceEntry) -> None:
+        """Wait for the recorded duration of a request, divided by the speedup."""
+        time.sleep(entry.duration / self._speedup)
+
+    def _find_dashboards(self, path):
+        """Find the dashboards of a lookup by title, listings are always empty."""
+        titles = parse_qs(urlsplit(path).query).get("filter[title]")
+        if not titles:
+            return []
+
+        title = titles[0]
+        if _stable_fraction(title) >= self._found_ratio:
+            return []
+
+        return [{"id": _dashboard_id(title), "title": title}]
+
+
+class _RedirectingTransport(Transport):
+    """Transport sending requests to the New Relic API to another base URL instead."""
+
+    def __init__(self, transport: Transport, base_url: str) -> None:
+        """Initialize transport redirecting requests through another transport."""
+        self._transport = transport
+        self._base_url = base_url
+
+    def close(self) -> None:
+        """Close all connections."""
+        self._transport.close()
+
+    def request(self, method, url, headers, timeout, params=None, data=None):
+        """Send a request with connect and read timeouts in seconds."""
+        if url.startswith(BASE_URL):
+            url = url.replace(BASE_URL, self._base_url, 1)
+
+        return self._transport.request(
+            method, url, headers, timeout, params=params, data=data
+        )
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    """HTTP server answering each connection in its own thread."""
+
+    daemon_threads = True
+    stub: TraceStub
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    """Answers requests with the next recorded entry of the trace stub."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Replay a GET request."""
+        self._replay()
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Replay a POST request."""
+        self._replay()
+
+    def do_PUT(self):  # pylint: disable=invalid-name
+        """Replay a PUT request."""
+        self._replay()
+
+    def do_DELETE(self):  # pylint: disable=invalid-name
+        """Replay a DELETE request."""
+        self._replay()
+
+    def log_message(self, *_args):
+        """Do not log requests."""
+
+    def _replay(self):
+        """Answer the request like the next recorded request of the same method."""
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        stub = self.server.stub
+        entry = stub.next_entry(self.command)
+        stub.sleep(entry)
+        if entry.error or entry.status_code is None:
+            # The client sees the connection fail like the recorded request did
+            self.close_connection = True
+            return
+
+        content = stub.respond(self.command, self.path, entry)
+        self.send_response(entry.status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        if entry.retry_after is not None:
+            self.send_header("Retry-After", entry.retry_after)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def _dashboard_id(text):
+    """Derive a stable dashboard id from a title or a path ending in a dashboard id."""
+    name = text.rsplit("/", 1)[-1].split(".", 1)[0]
+    if name.isdigit():
+        return int(name)
+
+    # Above the ids of created dashboards, which are numbered from 1
+    return 2**31 + int.from_bytes(hashlib.sha256(text.encode()).digest()[:3], "big")
+
+
+def _stable_fraction(title):
+    """Map a title to a fraction between 0 and 1 that does not change between runs."""
+    digest = hashlib.sha256(title.encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
@@ -0,0 +1,695 @@
+"""Declarative schema of dashboard configuration, compiled into fast validators.
+
+Every section, field, and type of the configuration is declared once below. A schema is
+compiled into nested functions that check a whole document in a single pass and do no
+work beyond type and membership tests for valid configuration: the path of an invalid
+value, such as dashboards.my-dashboard.widgets[2].width, is only built once an error is
+found, as the error propagates out of the nested checks.
+"""
+import collections.abc
+import re
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+import attr
+
+from .layout import AUTO, GRID_COLUMNS
+from .models import (
+    InvalidAccountConfigurationException,
+    InvalidDashboardConfigurationException,
+    InvalidExtendingConditionException,
+    InvalidOutputConfigurationException,
+    InvalidQueryConfigurationException,
+    InvalidTemplateConfigurationException,
+    InvalidWidgetConfigurationException,
+    InvalidWidgetVisualizationException,
+    NrDashException,
+    WidgetVisualization,
+)
+
+Validator = Callable[..., None]
+
+# Marks a field that is missing from a record, fields may be present but null
+_MISSING = object()
+
+
+def _to_tuple(values: Iterable[Any]) -> Tuple[Any, ...]:
+    """Convert the values declared for a schema to a tuple, so that the schema is hashable."""
+    return tuple(values)
+
+
+class _SchemaError(Exception):
+    """An invalid value, collecting its path while propagating out of nested checks."""
+
+    def __init__(self, exception: Type[NrDashException], message: str) -> None:
+        """Initialize error with the exception type to raise and a description."""
+        super().__init__(message)
+        self.exception = exception
+        self.message = message
+        # Keys and list indexes from the invalid value up to the root of the document
+        self.reversed_path: list = []
+
+
+@attr.s(frozen=True)
+class String:
+    """A string, optionally matching a regular expression."""
+
+    pattern: Optional[str] = attr.ib(default=None)
+    exception: Optional[Type[NrDashException]] = attr.ib(default=None)
+
+
+@attr.s(frozen=True)
+class Integer:
+    """An integer within optional bounds, booleans are not integers."""
+
+    minimum: Optional[int] = attr.ib(default=None)
+    maximum: Optional[int] = attr.ib(default=None)
+    exception: Optional[Type[NrDashException]] = attr.ib(default=None)
+
+
+@attr.s(frozen=True)
+class Scalar:
+    """A string, number, or boolean."""
+
+    exception: Optional[Type[NrDashException]] = attr.ib(default=None)
+
+
+@attr.s(frozen=True)
+class Enum:
+    """One of a fixed set of strings."""
+
+    values: Tuple[str, ...] = attr.ib(converter=_to_tuple)
+    exception: Optional[Type[NrDashException]] = attr.ib(default=None)
+
+
+@attr.s(frozen=True)
+class Field:
+    """A field of a record.
+
+    A field that is not required may still be required unless another field of the record
+    has a given value, such as a widget's column unless its row is auto.
+    """
+
+    schema: Any = attr.ib()
+    required: bool = attr.ib(default=True)
+    required_unless: Optional[Tuple[str, Any]] = attr.ib(default=None)
+    # Whether the field may be empty, like a section with nothing under it
+    nullable: bool = attr.ib(default=False)
+
+
+@attr.s(frozen=True)
+class Record:
+    """A mapping with known fields, other keys are ignored."""
+
+    fields: Mapping[str, Field] = attr.ib()
+    exception: Optional[Type[NrDashException]] = attr.ib(default=None)
+
+
+@attr.s(frozen=True)
+class MapOf:
+    """A mapping from names to values of the same schema."""
+
+    values: Any = attr.ib()
+    min_length: int = attr.ib(default=0)
+    exception: Optional[Type[NrDashException]] = attr.ib(default=None)
+
+
+@attr.s(frozen=True)
+class ListOf:
+    """A list of items of the same schema."""
+
+    items: Any = attr.ib()
+    min_length: int = attr.ib(default=0)
+    exception: Optional[Type[NrDashException]] = attr.ib(default=None)
+
+
+@attr.s(frozen=True)
+class Union:
+    """A value of one of several schemas, chosen by the type of the value."""
+
+    alternatives: Tuple[Any, ...] = attr.ib(converter=_to_tuple)
+    exception: Optional[Type[NrDashException]] = attr.ib(default=None)
+
+
+@attr.s(frozen=True)
+class Keyed:
+    """A mapping of one of several schemas, chosen by the first key it has.
+
+    Mappings with none of the keys must match the default schema, if there is one.
+    """
+
+    alternatives: Mapping[str, Any] = attr.ib()
+    default: Any = attr.ib(default=None)
+    exception: Optional[Type[NrDashException]] = attr.ib(default=None)
+
+
+_VISUALIZATION = Enum(
+    [visualization.value for visualization in WidgetVisualization],
+    exception=InvalidWidgetVisualizationException,
+)
+
+_PRIORITY = Field(Integer(), required=False)
+
+_INLINE_QUERY = Record(
+    {
+        "title": Field(String()),
+        "nrql": Field(String()),
+        "visualization": Field(_VISUALIZATION),
+        "notes": Field(String(), required=False),
+    },
+    exception=InvalidQueryConfigurationException,
+)
+
+_WIDGET = Record(
+    {
+        "query": Field(Union([String(), _INLINE_QUERY])),
+        "row": Field(Union([Integer(minimum=1), Enum([AUTO])])),
+        "column": Field(
+            Integer(minimum=1, maximum=GRID_COLUMNS),
+            required=False,
+            required_unless=("row", AUTO),
+        ),
+        "width": Field(Integer(minimum=1, maximum=GRID_COLUMNS)),
+        "height": Field(Integer(minimum=1)),
+    },
+    exception=InvalidWidgetConfigurationException,
+)
+
+_GROUPED_OUTPUT = Record(
+    {
+        "function": Field(String()),
+        "condition": Field(String()),
+        "label": Field(String(), required=False),
+    }
+)
+
+_GROUPED_OUTPUT_SELECTION = Keyed(
+    {
+        "filter": Record({"filter": Field(_GROUPED_OUTPUT)}),
+        "percentage": Record({"percentage": Field(_GROUPED_OUTPUT)}),
+    }
+)
+
+_CONDITION_OPERANDS = ListOf(
+    Union([String(), Record({"condition": Field(String())})]), min_length=1
+)
+
+# The schema of every section of a configuration file
+CONFIG_SECTIONS = {
+    "conditions": MapOf(
+        Union(
+            [
+                String(),
+                Keyed(
+                    {
+                        "and": Record({"and": Field(_CONDITION_OPERANDS)}),
+                        "or": Record({"or": Field(_CONDITION_OPERANDS)}),
+                    }
+                ),
+            ]
+        ),
+        exception=InvalidExtendingConditionException,
+    ),
+    "output-selections": MapOf(
+        Union(
+            [
+                String(),
+                ListOf(Union([String(), _GROUPED_OUTPUT_SELECTION])),
+                _GROUPED_OUTPUT_SELECTION,
+            ]
+        ),
+        exception=InvalidOutputConfigurationException,
+    ),
+    "displays": MapOf(
+        Record(
+            {
+                "visualization": Field(_VISUALIZATION),
+                "nrql": Field(String(), required=False),
+            }
+        ),
+        exception=InvalidQueryConfigurationException,
+    ),
+    "queries": MapOf(
+        Keyed(
+            {"nrql": _INLINE_QUERY},
+            default=Record(
+                {
+                    "title": Field(String()),
+                    "event": Field(String()),
+                    "output": Field(String()),
+                    "display": Field(String()),
+                    "condition": Field(String(), required=False),
+                    "notes": Field(String(), required=False),
+                }
+            ),
+        ),
+        exception=InvalidQueryConfigurationException,
+    ),
+    "dashboards": MapOf(
+        Record(
+            {
+                "title": Field(String()),
+                "widgets": Field(ListOf(_WIDGET)),
+                "priority": _PRIORITY,
+            }
+        ),
+        exception=InvalidDashboardConfigurationException,
+    ),
+    "dashboard-templates": MapOf(
+        Record(
+            {
+                "title": Field(String()),
+                "matrix": Field(MapOf(ListOf(Scalar(), min_length=1), min_length=1)),
+                "widgets": Field(ListOf(_WIDGET)),
+                "priority": _PRIORITY,
+            }
+        ),
+        exception=InvalidTemplateConfigurationException,
+    ),
+}
+
+# The schema of files listing accounts, whose ids may be quoted
+ACCOUNTS = Record(
+    {
+        "accounts": Field(
+            ListOf(
+                Record(
+                    {
+                        "account-id": Field(
+                            Union([Integer(minimum=1), String(pattern=r"[0-9]+")])
+                        ),
+                        "api-key": Field(String()),
+                    }
+                ),
+                min_length=1,
+            )
+        )
+    },
+    exception=InvalidAccountConfigurationException,
+)
+
+
+def compile_config_validator(
+    sections: Iterable[str] = tuple(CONFIG_SECTIONS),
+) -> Validator:
+    """Compile a validator of the given sections of configuration, all of them by default.
+
+    Sections that are missing or empty are valid.
+    """
+    return compile_schema(
+        Record(
+            {
+                name: Field(CONFIG_SECTIONS[name], required=False, nullable=True)
+                for name in sections
+            }
+        )
+    )
+
+
+def compile_schema(
+    schema: Any, exception: Type[NrDashException] = NrDashException
+) -> Validator:
+    """Compile a schema into a function that validates a value in a single pass.
+
+    The function takes the value and optionally where it was read from, such as a file
+    path, and raises the exception type of the innermost schema declaring one, or the
+    given exception, naming the path of the invalid value and what is wrong with it.
+    """
+    check = _compile(schema, exception)
+
+    def validate(value: Any, location: Optional[str] = None) -> None:
+        try:
+            check(value)
+        except _SchemaError as error:
+            path = _format_path(reversed(error.reversed_path))
+            prefix = f"{location}, {path}" if location else path
+            raise error.exception(f"{prefix}: {error.message}") from None
+
+    return validate
+
+
+def _compile(schema, exception):
+    """Compile a schema node, raising the given exception unless it declares its own."""
+    return _COMPILERS[type(schema)](schema, schema.exception or exception)
+
+
+def _compile_enum(schema, exception):
+    """Compile a check that a value is one of a set of strings."""
+    values = frozenset(schema.values)
+    expected = ", ".join(schema.values)
+
+    def check(value):
+        if not isinstance(value, str) or value not in values:
+            raise _SchemaError(
+                exception, f"expected one of {expected}, got {_describe(value)}"
+            )
+
+    return check
+
+
+def _compile_field(field, exception):
+    """Compile a check of the value of a record field."""
+    check_value = _compile(field.schema, exception)
+    if not field.nullable:
+        return check_value
+
+    def check(value):
+        if value is not None:
+            check_value(value)
+
+    return check
+
+
+def _compile_integer(schema, exception):
+    """Compile a check that a value is an integer within bounds."""
+    minimum = schema.minimum
+    maximum = schema.maximum
+    if minimum is not None and maximum is not None:
+        expected = f"an integer from {minimum} to {maximum}"
+    elif minimum is not None:
+        expected = f"an integer of at least {minimum}"
+    else:
+        expected = "an integer"
+
+    # Unbounded ends compare against infinity so that every check is a single chain
+    lower = float("-inf") if minimum is None else minimum
+    upper = float("inf") if maximum is None else maximum
+
+    def check(value):
+        # Booleans are a subclass of int, comparing the exact type excludes them cheaply
+        if type(value) is int:
+            if lower <= value <= upper:
+                return
+        elif isinstance(value, int) and not isinstance(value, bool):
+            if lower <= value <= upper:
+                return
+
+        raise _SchemaError(exception, f"expected {expected}, got {_describe(value)}")
+
+    return check
+
+
+def _compile_keyed(schema, exception):
+    """Compile a check of mappings whose schema depends on the keys they have."""
+    alternatives = [
+        (key, _compile(alternative, exception))
+        for key, alternative in schema.alternatives.items()
+    ]
+    check_default = _compile(schema.default, exception) if schema.default else None
+    keys = ", ".join(schema.alternatives)
+
+    def check(value):
+        if isinstance(value, collections.abc.Mapping):
+            for key, check_alternative in alternatives:
+                if key in value:
+                    check_alternative(value)
+                    return
+
+        if check_default is not None:
+            check_default(value)
+        elif isinstance(value, collections.abc.Mapping):
+            raise _SchemaError(exception, f"expected one of the fields {keys}")
+        else:
+            raise _SchemaError(
+                exception,
+                f"expected a mapping with one of the fields {keys}, got {_describe(value)}",
+            )
+
+    return check
+
+
+def _compile_list(schema, exception):
+    """Compile a check of lists whose items all have the same schema."""
+    check_item = _compile(schema.items, exception)
+    min_length = schema.min_length
+
+    def check(value):
+        if not isinstance(value, list):
+            raise _SchemaError(exception, f"expected a list, got {_describe(value)}")
+        if len(value) < min_length:
+            raise _SchemaError(
+                exception, f"expected at least {min_length} items, got {len(value)}"
+            )
+
+        index = 0
+        try:
+            for index, item in enumerate(value):
+                check_item(item)
+        except _SchemaError as error:
+            error.reversed_path.append(index)
+            raise
+
+    return check
+
+
+def _compile_mapping(schema, exception):
+    """Compile a check of mappings from names to values of the same schema."""
+    check_value = _compile(schema.values, exception)
+    min_length = schema.min_length
+
+    def check(value):
+        # Configuration loaded from YAML is made of dicts, other mappings are rare
+        if type(value) is not dict and not isinstance(value, collections.abc.Mapping):
+            raise _SchemaError(exception, f"expected a mapping, got {_describe(value)}")
+        if len(value) < min_length:
+            raise _SchemaError(
+                exception, f"expected at least {min_length} entries, got {len(value)}"
+            )
+
+        name = None
+        try:
+            for name, item in value.items():
+                check_value(item)
+        except _SchemaError as error:
+            error.reversed_path.append(name)
+            raise
+
+    return check
+
+
+def _compile_record(schema, exception):
+    """Compile a check of mappings with known fields.
+
+    Integers and strings that a field's schema accepts without further checks, such as a
+    widget's width or query name, are accepted inline without calling its check.
+    """
+    check_required = _compile_required_fields(schema, exception)
+    fields = [
+        (name, *_get_inline_accepted(field.schema), _compile_field(field, exception))
+        for name, field in schema.fields.items()
+    ]
+
+    def check(value):
+        check_required(value)
+        name = None
+        try:
+            for name, lower, upper, strings, check_field in fields:
+                field_value = value.get(name, _MISSING)
+                value_type = type(field_value)
+                if value_type is int:
+                    if lower <= field_value <= upper:
+                        continue
+                elif value_type is str:
+                    if strings is None or field_value in strings:
+                        continue
+                if field_value is not _MISSING:
+                    check_field(field_value)
+        except _SchemaError as error:
+            error.reversed_path.append(name)
+            raise
+
+    return check
+
+
+def _compile_required_fields(schema, exception):
+    """Compile a check that a value is a mapping with the required fields of a record."""
+    required = frozenset(
+        name for name, field in schema.fields.items() if field.required
+    )
+    required_unless = [
+        (name, field.required_unless)
+        for name, field in schema.fields.items()
+        if field.required_unless
+    ]
+
+    def check(value):
+        # Configuration loaded from YAML is made of dicts, other mappings are rare
+        if type(value) is not dict and not isinstance(value, collections.abc.Mapping):
+            raise _SchemaError(exception, f"expected a mapping, got {_describe(value)}")
+        if not required <= value.keys():
+            _raise_missing_field(exception, schema.fields, value)
+        for name, (other_name, other_value) in required_unless:
+            if name not in value and value.get(other_name) != other_value:
+                raise _SchemaError(exception, f"field {name} is required")
+
+    return check
+
+
+def _compile_scalar(_schema, exception):
+    """Compile a check that a value is a string, number, or boolean."""
+
+    def check(value):
+        if not isinstance(value, (str, int, float)):
+            raise _SchemaError(
+                exception,
+                f"expected a string, number, or boolean, got {_describe(value)}",
+            )
+
+    return check
+
+
+def _compile_string(schema, exception):
+    """Compile a check that a value is a string matching an optional pattern."""
+    match = re.compile(schema.pattern).fullmatch if schema.pattern else None
+    expected = f"a string matching {schema.pattern}" if match else "a string"
+
+    def check(value):
+        if not isinstance(value, str) or (match and not match(value)):
+            raise _SchemaError(
+                exception, f"expected {expected}, got {_describe(value)}"
+            )
+
+    return check
+
+
+def _compile_union(schema, exception):
+    """Compile a check of values whose schema is chosen by their type."""
+    checks = {}
+    for alternative in schema.alternatives:
+        check_alternative = _compile(alternative, exception)
+        for value_type in _ACCEPTED_TYPES[type(alternative)]:
+            checks.setdefault(value_type, check_alternative)
+    expected = " or ".join(
+        dict.fromkeys(
+            _TYPE_NAMES[type(alternative)] for alternative in schema.alternatives
+        )
+    )
+
+    def check(value):
+        check_alternative = checks.get(type(value))
+        if check_alternative is None:
+            # Subclasses of the types loaded from YAML, such as OrderedDict, or other mappings
+            for value_type, check_subclass in checks.items():
+                if isinstance(value, value_type):
+                    check_subclass(value)
+                    return
+
+            raise _SchemaError(
+                exception, f"expected {expected}, got {_describe(value)}"
+            )
+
+        check_alternative(value)
+
+    return check
+
+
+def _accepts(schema, value_type):
+    """Determine whether a kind of schema accepts values of a type."""
+    return value_type in _ACCEPTED_TYPES.get(type(schema), ())
+
+
+def _describe(value):
+    """Describe an invalid value for an error message."""
+    if isinstance(value, collections.abc.Mapping):
+        return "a mapping"
+    if isinstance(value, list):
+        return "a list"
+    if value is None:
+        return "nothing"
+
+    return repr(value)
+
+
+def _format_path(path):
+    """Format keys and list indexes as a path like dashboards.my-dashboard.widgets[2]."""
+    text = ""
+    for key in path:
+        if isinstance(key, int) and not isinstance(key, bool):
+            text += f"[{key}]"
+        else:
+            text += f".{key}" if text else str(key)
+
+    return text or "configuration"
+
+
+def _get_inline_accepted(schema):
+    """Get the integers and strings a schema accepts without further checks.
+
+    Returns the lowest and highest integer accepted, which are an empty range if integers
+    must be checked, and the strings accepted, None if every string is, or an empty set if
+    strings must be checked. Only the alternative a union would choose for a type counts.
+    """
+    alternatives = schema.alternatives if isinstance(schema, Union) else (schema,)
+    integer = next(
+        (alternative for alternative in alternatives if _accepts(alternative, int)),
+        None,
+    )
+    string = next(
+        (alternative for alternative in alternatives if _accepts(alternative, str)),
+        None,
+    )
+
+    lower, upper = float("inf"), float("-inf")
+    if isinstance(integer, Integer):
+        lower = float("-inf") if integer.minimum is None else integer.minimum
+        upper = float("inf") if integer.maximum is None else integer.maximum
+
+    strings = frozenset()
+    if isinstance(string, String) and string.pattern is None:
+        strings = None
+    elif isinstance(string, Enum):
+        strings = frozenset(string.values)
+
+    return lower, upper, strings
+
+
+def _raise_missing_field(exception, fields, value):
+    """Raise an error naming the first required field, in declared order, that is missing."""
+    for name, field in fields.items():
+        if field.required and name not in value:
+            raise _SchemaError(exception, f"field {name} is required")
+
+
+_COMPILERS = {
+    Enum: _compile_enum,
+    Integer: _compile_integer,
+    Keyed: _compile_keyed,
+    ListOf: _compile_list,
+    MapOf: _compile_mapping,
+    Record: _compile_record,
+    Scalar: _compile_scalar,
+    String: _compile_string,
+    Union: _compile_union,
+}
+
+# The Python types of YAML values each kind of schema accepts, to choose union alternatives
+_ACCEPTED_TYPES: Dict[type, Sequence[type]] = {
+    Enum: (str,),
+    Integer: (int,),
+    Keyed: (dict, collections.abc.Mapping),
+    ListOf: (list,),
+    MapOf: (dict, collections.abc.Mapping),
+    Record: (dict, collections.abc.Mapping),
+    Scalar: (str, int, float, bool),
+    String: (str,),
+}
+
+_TYPE_NAMES = {
+    Enum: "a string",
+    Integer: "an integer",
+    Keyed: "a mapping",
+    ListOf: "a list",
+    MapOf: "a mapping",
+    Record: "a mapping",
+    Scalar: "a scalar",
+    String: "a string",
+}
@@ -0,0 +1,117 @@
+"""Splits dashboards between independent builds by a stable hash of their names."""
+import hashlib
+import json
+from typing import Container, Dict, Iterable, Optional
+
+import attr
+
+from .deployment import DashboardResult, DeploymentAction, DeploymentReport
+from .models import InvalidShardResultsException
+
+
+@attr.s(frozen=True)
+class Shard(Container[str]):
+    """One of several slices of the dashboards in a configuration, numbered from 1.
+
+    Every process and machine agrees on the shard of each dashboard since it only depends
+    on the dashboard's name and the number of shards, so shards can be built independently
+    and together build every dashboard exactly once.
+    """
+
+    index: int = attr.ib()
+    count: int = attr.ib()
+
+    @count.validator
+    def _check_index(self, _attribute, count):
+        """Check that the shard is one of the shards."""
+        if not 1 <= self.index <= count:
+            raise ValueError(f"Shard {self.index} is not between 1 and {count}")
+
+    def __contains__(self, dashboard_name: object) -> bool:
+        """Determine whether a dashboard belongs to the shard."""
+        return (
+            isinstance(dashboard_name, str)
+            and get_shard_index(dashboard_name, self.count) == self.index
+        )
+
+    def __str__(self) -> str:
+        """Format the shard as INDEX/COUNT."""
+        return f"{self.index}/{self.count}"
+
+
+def get_shard_index(dashboard_name: str, shard_count: int) -> int:
+    """Get the index of the shard a dashboard belongs to, from 1 to the number of shards."""
+    # Unlike hash(), a SHA-256 digest does not change between processes
+    digest = hashlib.sha256(dashboard_name.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count + 1
+
+
+def merge_results(file_paths: Iterable[str]) -> DeploymentReport:
+    """Merge the results written by every shard of a build into a single report.
+
+    Raises InvalidShardResultsException unless the files hold the results of every shard of
+    the same build exactly once.
+    """
+    results = []
+    shard_files: Dict[int, str] = {}
+    shard_count: Optional[int] = None
+    for file_path in file_paths:
+        shard, shard_results = _read_results(file_path)
+        if shard_count is not None and shard.count != shard_count:
+            raise InvalidShardResultsException(
+                f"{file_path} holds results of shard {shard}, but other files are of {shard_count} shards"
+            )
+
+        if shard.index in shard_files:
+            raise InvalidShardResultsException(
+                f"{file_path} and {shard_files[shard.index]} both hold results of shard {shard}"
+            )
+
+        shard_count = shard.count
+        shard_files[shard.index] = file_path
+        results.extend(shard_results)
+
+    if shard_count is None:
+        raise InvalidShardResultsException("No shard results to merge")
+
+    missing = [
+        str(index) for index in range(1, shard_count + 1) if index not in shard_files
+    ]
+    if missing:
+        raise InvalidShardResultsException(
+            f"Missing results of shards {', '.join(missing)} of {shard_count}"
+        )
+
+    return DeploymentReport(results=results)
+
+
+def write_results(file_path: str, shard: Shard, report: DeploymentReport) -> None:
+    """Write the results of building a shard, to be merged with those of the other shards."""
+    results = [
+        dict(attr.asdict(result), action=result.action.value)
+        for result in report.results
+    ]
+    with open(file_path, "w") as results_file:
+        json.dump(
+            {"shard": {"index": shard.index, "count": shard.count}, "results": results},
+            results_file,
+        )
+
+
+def _read_results(file_path):
+    """Read the shard and results written by write_results."""
+    try:
+        with open(file_path, "r") as results_file:
+            content = json.load(results_file)
+
+        shard = Shard(**content["shard"])
+        results = [
+            DashboardResult(**dict(result, action=DeploymentAction(result["action"])))
+            for result in content["results"]
+        ]
+    except (OSError, ValueError, TypeError, KeyError) as error:
+        raise InvalidShardResultsException(
+            f"{file_path} is not a shard results file: {error}"
+        )
+
+    return shard, results
@@ -0,0 +1,233 @@
+"""Tracing spans recording where builds spend their time.
+
+Tracing is disabled until an exporter is configured. While disabled, span returns a shared
+span that records nothing, so instrumented code costs no more than a function call.
+Spans nest within the span that is current in the same thread when they start.
+"""
+import json
+import random
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from enum import Enum, unique
+from typing import Any, Dict, List, Optional
+
+import attr
+
+
+@unique
+class SpanKind(Enum):
+    """The kind of a span, numbered as in OTLP."""
+
+    INTERNAL = 1
+    CLIENT = 3
+
+
+@unique
+class SpanStatus(Enum):
+    """The status of a finished span, numbered as in OTLP."""
+
+    UNSET = 0
+    OK = 1
+    ERROR = 2
+
+
+@attr.s
+class Span:
+    """A single timed operation."""
+
+    name: str = attr.ib()
+    trace_id: str = attr.ib()
+    span_id: str = attr.ib()
+    parent_span_id: Optional[str] = attr.ib()
+    kind: SpanKind = attr.ib()
+    attributes: Dict[str, Any] = attr.ib()
+    start_time: int = attr.ib()
+    end_time: Optional[int] = attr.ib(default=None)
+    status: SpanStatus = attr.ib(default=SpanStatus.UNSET)
+    status_message: Optional[str] = attr.ib(default=None)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute of the span."""
+        self.attributes[key] = value
+
+
+class Exporter(ABC):
+    """Receives every finished span."""
+
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        """Export a finished span, may be called from any thread."""
+
+    def shutdown(self) -> None:
+        """Flush any spans not yet written."""
+
+
+class OtlpJsonExporter(Exporter):
+    """Writes all spans in the OTLP JSON format when shut down."""
+
+    def __init__(self, file_path: str) -> None:
+        """Initialize exporter writing to the given file, or standard output for -."""
+        self._file_path = file_path
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        """Keep the span until shut down."""
+        with self._lock:
+            self._spans.append(span)
+
+    def shutdown(self) -> None:
+        """Write all spans to the file."""
+        with self._lock:
+            spans = [_span_to_otlp(span) for span in self._spans]
+
+        document = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _attributes_to_otlp({"service.name": "nrdash"})
+                    },
+                    "scopeSpans": [{"scope": {"name": "nrdash"}, "spans": spans}],
+                }
+            ]
+        }
+        if self._file_path == "-":
+            json.dump(document, sys.stdout)
+            sys.stdout.write("\n")
+            return
+
+        with open(self._file_path, "w") as trace_file:
+            json.dump(document, trace_file)
+
+
+class _ActiveSpan:
+    """Context manager starting a span on entry and finishing it on exit."""
+
+    def __init__(self, exporter, name, kind, attributes):
+        """Initialize span context."""
+        self._exporter = exporter
+        self._name = name
+        self._kind = kind
+        self._attributes = attributes
+        self._span = None
+        self._parent = None
+
+    def __enter__(self) -> Span:
+        """Start the span as a child of the current span."""
+        parent = self._parent = getattr(_thread_state, "span", None)
+        self._span = Span(
+            name=self._name,
+            trace_id=parent.trace_id if parent else f"{random.getrandbits(128):032x}",
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_span_id=parent.span_id if parent else None,
+            kind=self._kind,
+            attributes=self._attributes,
+            start_time=_now(),
+        )
+        _thread_state.span = self._span
+        return self._span
+
+    def __exit__(self, exc_type, exc_value, _traceback) -> None:
+        """Finish the span, marking it as failed if an exception was raised."""
+        _thread_state.span = self._parent
+        self._span.end_time = _now()
+        if exc_type is None:
+            self._span.status = SpanStatus.OK
+        else:
+            self._span.status = SpanStatus.ERROR
+            self._span.status_message = f"{exc_type.__name__}: {exc_value}"
+        self._exporter.export(self._span)
+
+
+class _DisabledSpan:
+    """Span context used while tracing is disabled, recording nothing."""
+
+    def __enter__(self) -> "_DisabledSpan":
+        """Enter context."""
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        """Exit context."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Ignore the attribute."""
+
+
+# Holds the span current in each thread
+_thread_state = threading.local()
+
+_DISABLED_SPAN = _DisabledSpan()
+
+_exporter: Optional[Exporter] = None
+
+
+def configure(exporter: Exporter) -> None:
+    """Enable tracing, exporting every finished span to the exporter."""
+    global _exporter  # pylint: disable=global-statement
+    _exporter = exporter
+
+
+def is_enabled() -> bool:
+    """Determine whether tracing is enabled."""
+    return _exporter is not None
+
+
+def shutdown() -> None:
+    """Disable tracing, flushing the exporter."""
+    global _exporter  # pylint: disable=global-statement
+    exporter, _exporter = _exporter, None
+    if exporter:
+        exporter.shutdown()
+
+
+def span(name: str, kind: SpanKind = SpanKind.INTERNAL, **attributes):
+    """Trace an operation with a span, used as a context manager yielding the span."""
+    if _exporter is None:
+        return _DISABLED_SPAN
+
+    return _ActiveSpan(_exporter, name, kind, attributes)
+
+
+def _attributes_to_otlp(attributes):
+    """Convert span attributes into OTLP JSON key values."""
+    key_values = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            otlp_value = {"boolValue": value}
+        elif isinstance(value, int):
+            # OTLP JSON encodes 64-bit integers as strings
+            otlp_value = {"intValue": str(value)}
+        elif isinstance(value, float):
+            otlp_value = {"doubleValue": value}
+        else:
+            otlp_value = {"stringValue": str(value)}
+        key_values.append({"key": key, "value": otlp_value})
+
+    return key_values
+
+
+def _now():
+    """Get the current time in nanoseconds since the epoch."""
+    return int(time.time() * 1e9)
+
+
+def _span_to_otlp(finished_span):
+    """Convert a finished span into an OTLP JSON span."""
+    otlp_span = {
+        "traceId": finished_span.trace_id,
+        "spanId": finished_span.span_id,
+        "name": finished_span.name,
+        "kind": finished_span.kind.value,
+        "startTimeUnixNano": str(finished_span.start_time),
+        "endTimeUnixNano": str(finished_span.end_time),
+        "attributes": _attributes_to_otlp(finished_span.attributes),
+        "status": {"code": finished_span.status.value},
+    }
+    if finished_span.parent_span_id:
+        otlp_span["parentSpanId"] = finished_span.parent_span_id
+    if finished_span.status_message:
+        otlp_span["status"]["message"] = finished_span.status_message
+
+    return otlp_span
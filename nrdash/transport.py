@@ -0,0 +1,127 @@
+"""HTTP transports used by the New Relic API client.
+
+The requests transport sends requests over a pool of HTTP/1.1 connections and is always
+available. The HTTP/2 transport multiplexes any number of concurrent requests over a
+single connection to each host and requires the optional httpx package, installed with
+pip install nrdash[http2].
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Mapping, Optional, Tuple
+
+import requests
+
+from .models import TransportException, TransportTimeoutException
+
+
+class TransportResponse(ABC):
+    """Interface of responses returned by transports."""
+
+    status_code: int
+    content: bytes
+    headers: Mapping[str, str]
+
+    @abstractmethod
+    def json(self):
+        """Decode the response content as JSON."""
+
+
+class Transport(ABC):
+    """Sends HTTP requests, safe to share between threads and clients."""
+
+    def close(self) -> None:
+        """Close all connections."""
+
+    @abstractmethod
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: Tuple[float, float],
+        params: Optional[Dict[str, str]] = None,
+        data: Optional[bytes] = None,
+    ) -> TransportResponse:
+        """Send a request with connect and read timeouts in seconds.
+
+        Raises TransportTimeoutException if the request timed out and TransportException if
+        it failed for any other reason.
+        """
+
+
+class Http2Transport(Transport):
+    """Transport multiplexing requests over a single HTTP/2 connection to each host."""
+
+    def __init__(self, prior_knowledge: bool = False) -> None:
+        """Initialize transport.
+
+        HTTP/2 is negotiated over TLS and the transport falls back to HTTP/1.1 for servers
+        that do not support it. With prior_knowledge, HTTP/2 is used without negotiation,
+        which also allows it over plain HTTP.
+        """
+        try:
+            import httpx  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            raise TransportException(
+                "HTTP/2 transport requires httpx, install it with pip install nrdash[http2]"
+            )
+
+        self._httpx = httpx
+        self._client = httpx.Client(http1=not prior_knowledge, http2=True)
+
+    def close(self) -> None:
+        """Close all connections."""
+        self._client.close()
+
+    def request(self, method, url, headers, timeout, params=None, data=None):
+        """Send a request with connect and read timeouts in seconds."""
+        connect_timeout, read_timeout = timeout
+        try:
+            return self._client.request(
+                method,
+                url,
+                headers=headers,
+                params=params,
+                content=data,
+                timeout=self._httpx.Timeout(read_timeout, connect=connect_timeout),
+            )
+        except self._httpx.TimeoutException as error:
+            raise TransportTimeoutException(str(error))
+        except self._httpx.HTTPError as error:
+            raise TransportException(str(error))
+
+
+class RequestsTransport(Transport):
+    """Transport sending requests over a pool of HTTP/1.1 connections to each host."""
+
+    def __init__(self, pool_size: Optional[int] = None) -> None:
+        """Initialize transport, keeping up to pool_size connections open to each host."""
+        self._session = requests.Session()
+        if pool_size:
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=pool_size, pool_maxsize=pool_size
+            )
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+
+    def close(self) -> None:
+        """Close all connections."""
+        self._session.close()
+
+    def request(self, method, url, headers, timeout, params=None, data=None):
+        """Send a request with connect and read timeouts in seconds."""
+        try:
+            return self._session.request(
+                method, url, headers=headers, params=params, data=data, timeout=timeout
+            )
+        except requests.Timeout as error:
+            raise TransportTimeoutException(str(error))
+        except requests.RequestException as error:
+            raise TransportException(str(error))
+
+
+def create_transport(http2: bool = False, pool_size: Optional[int] = None) -> Transport:
+    """Create an HTTP/2 transport or a requests transport with the given pool size."""
+    if http2:
+        return Http2Transport()
+
+    return RequestsTransport(pool_size)
@@ -0,0 +1,213 @@
+"""Smoke tests of widget NRQL queries against the New Relic query API."""
+import hashlib
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from enum import Enum, unique
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import attr
+
+from .concurrency import RequestThrottle
+from .defaults import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_QUERY_URL,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_VERIFY_WINDOW_MINUTES,
+)
+from .http_cache import CachedResponse, ResponseCache
+from .models import Dashboard, TransportException
+from .transport import RequestsTransport, Transport
+
+
+@unique
+class QueryStatus(Enum):
+    """The outcome of running a single query."""
+
+    OK = "ok"
+    NO_DATA = "no_data"
+    ERROR = "error"
+
+
+@attr.s(frozen=True)
+class QueryVerification:
+    """The result of running a single distinct query used by one or more widgets."""
+
+    nrql: str = attr.ib()
+    # Dashboard name and widget title of every widget using the query
+    widgets: List[Tuple[str, str]] = attr.ib()
+    status: QueryStatus = attr.ib()
+    error: Optional[str] = attr.ib(default=None)
+
+
+class NrqlQueryClient:
+    """Runs NRQL queries on a single account through the query API."""
+
+    def __init__(
+        self,
+        query_key: str,
+        account_id: int,
+        query_url: str = DEFAULT_QUERY_URL,
+        requests_per_second: Optional[float] = None,
+        response_cache: Optional[ResponseCache] = None,
+        timeout: Tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        transport: Optional[Transport] = None,
+    ) -> None:
+        """Initialize client with a query key and account id.
+
+        The query URL may contain an {account_id} placeholder. If requests_per_second is
+        provided, queries are throttled to at most that rate across all threads. If a
+        response cache is provided, successful responses and NRQL errors are kept in it,
+        keyed by a hash of the query key, account, URL, and query.
+        """
+        self._query_key = query_key
+        self._account_id = account_id
+        self._query_url = query_url.format(account_id=account_id)
+        self._throttle = RequestThrottle(requests_per_second)
+        self._response_cache = response_cache
+        self._timeout = timeout
+        self._transport = transport or RequestsTransport()
+
+    def query(self, nrql: str) -> Tuple[int, bytes]:
+        """Run a query, returns the response status code and content."""
+        cache_key = _create_query_key(
+            self._query_key, self._account_id, self._query_url, nrql
+        )
+        if self._response_cache:
+            cached = self._response_cache.get(cache_key)
+            if cached and self._response_cache.is_fresh(cached):
+                return cached.status_code, cached.content
+
+        self._throttle.wait()
+        response = self._transport.request(
+            "GET",
+            self._query_url,
+            {"Accept": "application/json", "X-Query-Key": self._query_key},
+            self._timeout,
+            params={"nrql": nrql},
+        )
+        # Only results and rejected NRQL are definitive, throttling, authentication, and
+        # server errors say nothing about the query
+        if self._response_cache and response.status_code in _CACHED_STATUS_CODES:
+            self._response_cache.put(
+                cache_key,
+                CachedResponse(
+                    status_code=response.status_code,
+                    content=response.content,
+                    stored_at=time.time(),
+                ),
+            )
+
+        return response.status_code, response.content
+
+
+def collect_queries(
+    dashboards: Iterable[Dashboard],
+) -> Dict[str, List[Tuple[str, str]]]:
+    """Collect every distinct widget query, with the dashboard and title of each widget using it."""
+    queries: Dict[str, List[Tuple[str, str]]] = {}
+    for dashboard in dashboards:
+        for widget in dashboard.widgets:
+            queries.setdefault(widget.query, []).append((dashboard.name, widget.title))
+
+    return queries
+
+
+def limit_time_window(
+    nrql: str, window_minutes: int = DEFAULT_VERIFY_WINDOW_MINUTES
+) -> str:
+    """Restrict a query to the last few minutes unless it already sets its time window."""
+    if _SINCE_PATTERN.search(nrql):
+        return nrql
+
+    return f"{nrql} SINCE {window_minutes} minutes ago"
+
+
+def verify_queries(
+    client: NrqlQueryClient,
+    queries: Dict[str, List[Tuple[str, str]]],
+    window_minutes: int = DEFAULT_VERIFY_WINDOW_MINUTES,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    on_result: Optional[Callable[[QueryVerification], None]] = None,
+) -> List[QueryVerification]:
+    """Run every query concurrently over a short time window, reporting which fail.
+
+    A query fails if the API rejects it or if it returns no data. The on_result callback,
+    if provided, is called with each result as soon as it is available.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_verify_query, client, nrql, widgets, window_minutes)
+            for nrql, widgets in queries.items()
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+    return results
+
+
+# Status codes of a query's result and of invalid NRQL
+_CACHED_STATUS_CODES = frozenset([200, 400])
+
+# NRQL keywords are case insensitive
+_SINCE_PATTERN = re.compile(r"\bSINCE\b", re.IGNORECASE)
+
+
+def _contains_data(value):
+    """Determine whether a query result value holds any data."""
+    if isinstance(value, dict):
+        return any(_contains_data(item) for item in value.values())
+
+    if isinstance(value, list):
+        return any(_contains_data(item) for item in value)
+
+    return value not in (None, 0, "")
+
+
+def _create_query_key(query_key, account_id, query_url, nrql):
+    """Create the cache key of a query, a hash of everything that affects its result."""
+    query = f"{query_key}\n{account_id}\n{query_url}\n{nrql}"
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def _has_data(body):
+    """Determine whether a query API response body holds any data."""
+    if body.get("facets"):
+        return True
+
+    results = [body.get("results")]
+    results.extend(bucket.get("results") for bucket in body.get("timeSeries") or [])
+    return any(_contains_data(result) for result in results)
+
+
+def _verify_query(client, nrql, widgets, window_minutes):
+    """Run a single query and classify its outcome."""
+    result = QueryVerification(nrql=nrql, widgets=widgets, status=QueryStatus.OK)
+    try:
+        status_code, content = client.query(limit_time_window(nrql, window_minutes))
+    except TransportException as error:
+        return attr.evolve(result, status=QueryStatus.ERROR, error=str(error))
+
+    try:
+        body = json.loads(content)
+    except ValueError:
+        body = {}
+
+    if status_code != 200:
+        message = body.get("error") if isinstance(body, dict) else None
+        return attr.evolve(
+            result,
+            status=QueryStatus.ERROR,
+            error=message or f"Query failed with status {status_code}",
+        )
+
+    if not isinstance(body, dict) or not _has_data(body):
+        return attr.evolve(result, status=QueryStatus.NO_DATA)
+
+    return result
@@ -18,6 +18,7 @@ setuptools.setup(
     packages=setuptools.find_packages(),
     python_requires=">=3.6",
     install_requires=["pyyaml", "attrs", "typing", "requests", "click"],
+    extras_require={"http2": ["httpx[http2]"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
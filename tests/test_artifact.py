@@ -0,0 +1,86 @@
+"""Tests for compiled configuration artifacts."""
+import os
+
+import pytest
+
+from nrdash import artifact, models, new_relic_api, parsing
+
+
+def test_artifact_round_trip(tmp_path):
+    artifact_path = str(tmp_path / "dashboards.nrdc")
+    dashboards = list(parsing.iter_file(_get_test_file_path("dashboard_templates.yml")))
+
+    count = artifact.write_artifact(artifact_path, dashboards)
+    payloads = list(artifact.read_artifact(artifact_path))
+
+    assert len(dashboards) == count
+    assert dashboards == [payload.dashboard for payload in payloads]
+    assert [
+        new_relic_api.render_dashboard_payload(dashboard) for dashboard in dashboards
+    ] == payloads
+
+
+def test_artifact_keeps_priorities(tmp_path):
+    artifact_path = str(tmp_path / "dashboards.nrdc")
+    dashboards = list(
+        parsing.iter_file(_get_test_file_path("dashboard_priorities.yml"))
+    )
+
+    artifact.write_artifact(artifact_path, dashboards)
+
+    assert [10, 0, 5] == [
+        payload.dashboard.priority for payload in artifact.read_artifact(artifact_path)
+    ]
+
+
+def test_artifact_without_dashboards(tmp_path):
+    artifact_path = str(tmp_path / "empty.nrdc")
+
+    artifact.write_artifact(artifact_path, [])
+
+    assert [] == list(artifact.read_artifact(artifact_path))
+
+
+def test_corrupt_artifact(tmp_path):
+    artifact_path = str(tmp_path / "dashboards.nrdc")
+    artifact.write_artifact(
+        artifact_path, parsing.iter_file(_get_test_file_path("dashboards.yml"))
+    )
+
+    with open(artifact_path, "r+b") as artifact_file:
+        artifact_file.seek(-10, os.SEEK_END)
+        artifact_file.write(b"X")
+
+    with pytest.raises(models.InvalidCompiledArtifactException):
+        list(artifact.read_artifact(artifact_path))
+
+
+def test_corrupt_artifact_body(tmp_path):
+    artifact_path = str(tmp_path / "dashboards.nrdc")
+    artifact.write_artifact(
+        artifact_path, parsing.iter_file(_get_test_file_path("dashboards.yml"))
+    )
+
+    with open(artifact_path, "rb") as artifact_file:
+        data = artifact_file.read()
+    with open(artifact_path, "wb") as artifact_file:
+        artifact_file.write(data.replace(b"My Dashboard", b"My Dashboarx"))
+
+    with pytest.raises(models.InvalidCompiledArtifactException):
+        list(artifact.read_artifact(artifact_path))
+
+
+@pytest.mark.parametrize(
+    "contents", [b"", b"NOPE", b"NRDC\x01\x00\x00\x00\x00\x00\x00\x00"]
+)
+def test_invalid_artifact(tmp_path, contents):
+    artifact_path = tmp_path / "invalid.nrdc"
+    artifact_path.write_bytes(contents)
+
+    with pytest.raises(models.InvalidCompiledArtifactException):
+        list(artifact.read_artifact(str(artifact_path)))
+
+
+def _get_test_file_path(file_name):
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(test_dir, "test_data", file_name)
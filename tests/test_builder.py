@@ -0,0 +1,191 @@
+"""Tests for the library interface for building dashboards."""
+import json
+import os
+import threading
+
+import pytest
+import responses
+import yaml
+
+from nrdash import builder, deployment, models, new_relic_api, parsing
+
+
+@responses.activate
+def test_build_creates_dashboards():
+    _set_dashboards_api()
+
+    with builder.Builder("API_KEY", 1) as dashboard_builder:
+        report = dashboard_builder.build(_get_test_file_path("dashboards.yml"))
+
+    (result,) = report.results
+    assert deployment.DeploymentAction.CREATED == result.action
+    assert "my-dashboard" == result.dashboard_name
+
+
+def test_build_invalid_config():
+    with builder.Builder("API_KEY", 1) as dashboard_builder:
+        with pytest.raises(models.InvalidWidgetConfigurationException):
+            dashboard_builder.build(_get_test_file_path("missing_widget_row.yml"))
+
+
+@responses.activate
+def test_build_concurrently_creates_each_dashboard_once():
+    created_titles = _set_dashboards_api()
+    start = threading.Barrier(4)
+    config_path = _get_test_file_path("dashboards.yml")
+
+    with builder.Builder("API_KEY", 1) as dashboard_builder:
+
+        def build():
+            start.wait()
+            return dashboard_builder.build(config_path)
+
+        threads = [threading.Thread(target=build) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert ["My Dashboard"] == created_titles
+
+
+def test_lint_valid_sources():
+    config_path = _get_test_file_path("dashboards.yml")
+    with open(config_path) as config_file:
+        config_text = config_file.read()
+
+    with builder.Builder("API_KEY", 1) as dashboard_builder:
+        results = [
+            dashboard_builder.lint(config_path),
+            dashboard_builder.lint(text=config_text),
+            dashboard_builder.lint(yaml.safe_load(config_text)),
+        ]
+
+    expected = builder.LintResult(valid=True, dashboard_names=["my-dashboard"])
+    assert [expected, expected, expected] == results
+
+
+def test_lint_single_line_yaml_text():
+    config = yaml.safe_load(_read_test_file("dashboard_with_inline_queries.yml"))
+    config_text = yaml.safe_dump(config, default_flow_style=True, width=float("inf"))
+
+    with builder.Builder("API_KEY", 1) as dashboard_builder:
+        result = dashboard_builder.lint(text=config_text.strip())
+
+    assert "\n" not in config_text.strip()
+    assert result.valid
+
+
+def test_lint_config_with_mixed_key_types():
+    config = yaml.safe_load(_read_test_file("dashboards.yml"))
+    config[1] = "not a section"
+
+    with builder.Builder("API_KEY", 1) as dashboard_builder:
+        results = [dashboard_builder.lint(config), dashboard_builder.lint(config)]
+
+    assert [True, True] == [result.valid for result in results]
+
+
+def test_lint_requires_one_source():
+    with builder.Builder("API_KEY", 1) as dashboard_builder:
+        with pytest.raises(ValueError):
+            dashboard_builder.lint()
+
+
+def test_lint_invalid_config():
+    with builder.Builder("API_KEY", 1) as dashboard_builder:
+        result = dashboard_builder.lint(_get_test_file_path("missing_widget_row.yml"))
+
+    assert not result.valid
+    assert "row" in result.error
+
+
+def test_lint_missing_file():
+    with builder.Builder("API_KEY", 1) as dashboard_builder:
+        result = dashboard_builder.lint(_get_test_file_path("does_not_exist.yml"))
+
+    assert not result.valid
+
+
+def test_parsed_config_is_cached(monkeypatch, tmp_path):
+    config_path = str(tmp_path / "dashboards.yml")
+    with open(_get_test_file_path("dashboards.yml")) as config_file:
+        config_text = config_file.read()
+    with open(config_path, "w") as config_file:
+        config_file.write(config_text)
+
+    parsed_paths = []
+    parse_file = parsing.parse_file
+    monkeypatch.setattr(
+        parsing,
+        "parse_file",
+        lambda path, limits: parsed_paths.append(path) or parse_file(path, limits),
+    )
+
+    with builder.Builder("API_KEY", 1) as dashboard_builder:
+        dashboard_builder.lint(config_path)
+        dashboard_builder.lint(config_path)
+        with open(config_path, "w") as config_file:
+            config_file.write(config_text.replace("My Dashboard", "Renamed Dashboard"))
+        dashboard_builder.lint(config_path)
+
+    assert [config_path, config_path] == parsed_paths
+
+
+@responses.activate
+def test_plan():
+    _set_dashboards_api(existing_titles=["My Dashboard"])
+
+    with builder.Builder("API_KEY", 1) as dashboard_builder:
+        plan = dashboard_builder.plan(_get_test_file_path("dashboards.yml"))
+
+    assert [
+        builder.PlannedDeployment(
+            dashboard_name="my-dashboard",
+            title="My Dashboard",
+            action=deployment.DeploymentAction.UPDATED,
+            dashboard_id=1,
+        )
+    ] == plan
+    assert 1 == len(responses.calls)
+
+
+def _get_test_file_path(file_name):
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(test_dir, "test_data", file_name)
+
+
+def _read_test_file(file_name):
+    with open(_get_test_file_path(file_name)) as test_file:
+        return test_file.read()
+
+
+def _set_dashboards_api(existing_titles=()):
+    titles = list(existing_titles)
+    created_titles = []
+    lock = threading.Lock()
+
+    def get_callback(request):
+        with lock:
+            dashboards = [
+                {"title": title, "id": index}
+                for index, title in enumerate(titles, start=1)
+                if title == request.params["filter[title]"]
+            ]
+        return 200, {}, json.dumps({"dashboards": dashboards})
+
+    def post_callback(request):
+        title = json.loads(request.body)["dashboard"]["title"]
+        with lock:
+            titles.append(title)
+            created_titles.append(title)
+            dashboard_id = len(titles)
+        return 200, {}, json.dumps({"dashboard": {"id": dashboard_id}})
+
+    responses.add_callback(
+        responses.GET, new_relic_api.DASHBOARDS_URL, callback=get_callback
+    )
+    responses.add_callback(
+        responses.POST, new_relic_api.DASHBOARDS_URL, callback=post_callback
+    )
+    return created_titles
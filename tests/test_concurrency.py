@@ -0,0 +1,182 @@
+"""Tests for adaptive concurrency limiting and circuit breaking."""
+import threading
+import time
+
+import pytest
+
+from nrdash import concurrency, models
+
+
+def test_limiter_grows_while_requests_succeed():
+    limiter = concurrency.AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=8)
+
+    for _ in range(20):
+        _complete_request(limiter, concurrency.RequestOutcome.SUCCESS)
+
+    assert limiter.limit > 2
+
+
+def test_limiter_does_not_grow_past_max_limit():
+    limiter = concurrency.AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=3)
+
+    for _ in range(100):
+        _complete_request(limiter, concurrency.RequestOutcome.SUCCESS)
+
+    assert 3 == limiter.limit
+
+
+@pytest.mark.parametrize(
+    "outcome",
+    [concurrency.RequestOutcome.THROTTLED, concurrency.RequestOutcome.TIMEOUT],
+)
+def test_limiter_backs_off(outcome):
+    limiter = concurrency.AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8)
+
+    _complete_request(limiter, outcome)
+
+    assert 4 == limiter.limit
+
+
+def test_limiter_does_not_back_off_below_min_limit():
+    limiter = concurrency.AdaptiveConcurrencyLimiter(
+        initial_limit=2, min_limit=2, max_limit=8
+    )
+
+    _complete_request(limiter, concurrency.RequestOutcome.THROTTLED)
+
+    assert 2 == limiter.limit
+
+
+def test_limiter_backs_off_once_for_concurrent_failures():
+    limiter = concurrency.AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8)
+
+    first_slot = limiter.slot()
+    second_slot = limiter.slot()
+    first = first_slot.__enter__()
+    second = second_slot.__enter__()
+    first.outcome = concurrency.RequestOutcome.THROTTLED
+    second.outcome = concurrency.RequestOutcome.THROTTLED
+    first_slot.__exit__(None, None, None)
+    second_slot.__exit__(None, None, None)
+
+    assert 4 == limiter.limit
+
+
+def test_limiter_treats_unreported_outcome_as_timeout():
+    limiter = concurrency.AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8)
+
+    with pytest.raises(RuntimeError):
+        with limiter.slot():
+            raise RuntimeError()
+
+    assert 4 == limiter.limit
+
+
+def test_circuit_breaker_opens_after_consecutive_failures():
+    breaker = concurrency.CircuitBreaker(failure_threshold=2)
+
+    breaker.record(concurrency.RequestOutcome.THROTTLED)
+    breaker.check()
+    breaker.record(concurrency.RequestOutcome.SERVER_ERROR)
+
+    assert breaker.is_open
+    with pytest.raises(models.CircuitOpenException):
+        breaker.check()
+
+
+def test_circuit_breaker_success_resets_failures():
+    breaker = concurrency.CircuitBreaker(failure_threshold=2)
+
+    breaker.record(concurrency.RequestOutcome.THROTTLED)
+    breaker.record(concurrency.RequestOutcome.SUCCESS)
+    breaker.record(concurrency.RequestOutcome.THROTTLED)
+
+    assert not breaker.is_open
+
+
+def test_circuit_breaker_allows_single_trial_after_reset_timeout():
+    breaker = concurrency.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record(concurrency.RequestOutcome.TIMEOUT)
+
+    breaker.check()
+    with pytest.raises(models.CircuitOpenException):
+        breaker.check()
+
+    breaker.record(concurrency.RequestOutcome.SUCCESS)
+
+    assert not breaker.is_open
+
+
+def test_deadline():
+    assert not concurrency.Deadline(60).expired
+    assert 0 < concurrency.Deadline(60).remaining() <= 60
+
+    deadline = concurrency.Deadline(0)
+
+    assert deadline.expired
+    assert 0 == deadline.remaining()
+    with pytest.raises(models.DeadlineExceededException):
+        deadline.check()
+
+
+def test_hedger_does_not_hedge_fast_requests():
+    hedger = concurrency.RequestHedger(min_samples=1)
+    calls = []
+
+    for _ in range(3):
+        assert "response" == hedger.send(lambda: calls.append(1) or "response")
+
+    assert 3 == len(calls)
+
+
+def test_hedger_sends_duplicate_of_slow_request():
+    hedger = concurrency.RequestHedger(min_samples=1)
+    hedger.send(lambda: "warm up")
+    release_primary = threading.Event()
+    calls = []
+
+    def request():
+        calls.append(1)
+        if len(calls) == 1:
+            release_primary.wait(5)
+            return "primary"
+        return "duplicate"
+
+    assert "duplicate" == hedger.send(request)
+    assert 2 == len(calls)
+    release_primary.set()
+
+
+def test_hedger_does_not_hedge_requests_waiting_for_a_thread():
+    hedger = concurrency.RequestHedger(min_samples=1, max_workers=1)
+    hedger.send(lambda: time.sleep(0.4))
+    calls = []
+
+    def request():
+        calls.append(1)
+        time.sleep(0.3)
+
+    # The second request waits 0.3 seconds for the only thread, then takes 0.3 seconds
+    threads = [threading.Thread(target=hedger.send, args=(request,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert 2 == len(calls)
+
+
+def test_hedger_raises_when_all_requests_fail():
+    hedger = concurrency.RequestHedger(min_samples=1)
+    hedger.send(lambda: "warm up")
+
+    def request():
+        raise models.NewRelicApiException("failed")
+
+    with pytest.raises(models.NewRelicApiException):
+        hedger.send(request)
+
+
+def _complete_request(limiter, outcome):
+    with limiter.slot() as slot:
+        slot.outcome = outcome
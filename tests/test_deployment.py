@@ -0,0 +1,361 @@
+"""Tests for deploying dashboards to New Relic accounts."""
+import json
+import re
+import threading
+
+import attr
+import pytest
+import responses
+
+from nrdash import (
+    concurrency,
+    deployment,
+    http_cache,
+    id_cache,
+    journal,
+    models,
+    new_relic_api,
+)
+
+
+@responses.activate
+def test_deploy_dashboards_to_multiple_accounts():
+    _set_get_dashboards_response(existing_titles=["Existing Dashboard"])
+    responses.add(responses.POST, new_relic_api.DASHBOARDS_URL, status=200)
+    responses.add(
+        responses.PUT, re.compile(f"{new_relic_api.BASE_URL}dashboards/.*"), status=200
+    )
+
+    clients = [_create_client(1), _create_client(2)]
+    dashboards = [
+        _create_dashboard("new-dashboard", "New Dashboard"),
+        _create_dashboard("existing-dashboard", "Existing Dashboard"),
+    ]
+
+    report = deployment.deploy_dashboards(dashboards, clients)
+
+    assert not report.failures
+    assert [
+        deployment.AccountSummary(account_id=1, created=1, updated=1, failed=0),
+        deployment.AccountSummary(account_id=2, created=1, updated=1, failed=0),
+    ] == report.summarize_by_account()
+
+
+@responses.activate
+def test_deploy_dashboards_reports_failures():
+    _set_get_dashboards_response()
+    responses.add(responses.POST, new_relic_api.DASHBOARDS_URL, status=500)
+
+    received_results = []
+    report = deployment.deploy_dashboards(
+        [_create_dashboard("my-dashboard", "My Dashboard")],
+        [_create_client(1)],
+        on_result=received_results.append,
+    )
+
+    assert 1 == len(report.failures)
+    assert report.failures == received_results
+    assert deployment.DeploymentAction.FAILED == received_results[0].action
+
+
+@responses.activate
+def test_deploy_dashboards_pushes_while_parsing():
+    _set_get_dashboards_response()
+    responses.add(responses.POST, new_relic_api.DASHBOARDS_URL, status=200)
+
+    first_pushed = threading.Event()
+
+    def dashboards():
+        yield _create_dashboard("first-dashboard", "First Dashboard")
+        # The first dashboard must be pushed before the rest of the config is parsed
+        assert first_pushed.wait(timeout=5)
+        yield _create_dashboard("second-dashboard", "Second Dashboard")
+
+    report = deployment.deploy_dashboards(
+        dashboards(), [_create_client(1)], on_result=lambda _: first_pushed.set()
+    )
+
+    assert 2 == len(report.results)
+    assert not report.failures
+
+
+@responses.activate
+def test_deploy_dashboards_finishes_queued_work_on_parse_error():
+    _set_get_dashboards_response()
+    responses.add(responses.POST, new_relic_api.DASHBOARDS_URL, status=200)
+
+    received_results = []
+
+    def dashboards():
+        yield _create_dashboard("first-dashboard", "First Dashboard")
+        raise models.InvalidWidgetConfigurationException("bad widget")
+
+    with pytest.raises(models.InvalidWidgetConfigurationException):
+        deployment.deploy_dashboards(
+            dashboards(), [_create_client(1)], on_result=received_results.append
+        )
+
+    assert ["first-dashboard"] == [result.dashboard_name for result in received_results]
+
+
+@responses.activate
+def test_deploy_dashboards_resumes_from_journal(tmp_path):
+    _set_get_dashboards_response()
+    responses.add(responses.POST, new_relic_api.DASHBOARDS_URL, status=500)
+    responses.add(
+        responses.POST,
+        new_relic_api.DASHBOARDS_URL,
+        status=200,
+        json={"dashboard": {"id": 5}},
+    )
+    journal_path = str(tmp_path / "journal.jsonl")
+    dashboards = [_create_dashboard("my-dashboard", "My Dashboard")]
+
+    with journal.BuildJournal(journal_path) as build_journal:
+        first_report = deployment.deploy_dashboards(
+            dashboards, [_create_client(1)], journal=build_journal
+        )
+
+    with journal.BuildJournal(journal_path, resume=True) as build_journal:
+        second_report = deployment.deploy_dashboards(
+            dashboards, [_create_client(1)], journal=build_journal
+        )
+
+    with journal.BuildJournal(journal_path, resume=True) as build_journal:
+        third_report = deployment.deploy_dashboards(
+            dashboards, [_create_client(1)], journal=build_journal
+        )
+
+    assert deployment.DeploymentAction.FAILED == first_report.results[0].action
+    assert deployment.DeploymentAction.CREATED == second_report.results[0].action
+    assert 5 == second_report.results[0].dashboard_id
+    assert deployment.DeploymentAction.SKIPPED == third_report.results[0].action
+
+
+@responses.activate
+def test_deploy_dashboards_stops_when_circuit_opens():
+    responses.add(responses.GET, new_relic_api.DASHBOARDS_URL, status=429)
+    client = _create_client(
+        1, circuit_breaker=concurrency.CircuitBreaker(failure_threshold=1)
+    )
+    dashboards = [
+        _create_dashboard(f"dashboard-{index}", f"Dashboard {index}")
+        for index in range(5)
+    ]
+
+    report = deployment.deploy_dashboards(dashboards, [client], max_workers=1)
+
+    assert 1 == len(report.failures)
+    assert report.cancellations
+    assert 1 == len(responses.calls)
+
+
+@responses.activate
+def test_deploy_dashboards_recreates_dashboard_with_stale_cached_id(tmp_path):
+    _set_get_dashboards_response()
+    responses.add(
+        responses.PUT, re.compile(f"{new_relic_api.BASE_URL}dashboards/.*"), status=404
+    )
+    responses.add(
+        responses.POST,
+        new_relic_api.DASHBOARDS_URL,
+        status=200,
+        json={"dashboard": {"id": 7}},
+    )
+    with id_cache.DashboardIdCache(str(tmp_path / "ids.db")) as dashboard_id_cache:
+        dashboard_id_cache.put(1, "My Dashboard", 3)
+        client = _create_client(1, dashboard_id_cache=dashboard_id_cache)
+
+        report = deployment.deploy_dashboards(
+            [_create_dashboard("my-dashboard", "My Dashboard")], [client]
+        )
+
+        assert deployment.DeploymentAction.CREATED == report.results[0].action
+        assert 7 == dashboard_id_cache.get(1, "My Dashboard")
+
+
+@responses.activate
+def test_deploy_dashboards_recreates_dashboard_with_stale_cached_lookup():
+    existing_titles = ["My Dashboard"]
+    _set_get_dashboards_response(existing_titles)
+    responses.add(
+        responses.PUT, re.compile(f"{new_relic_api.BASE_URL}dashboards/.*"), status=404
+    )
+    responses.add(
+        responses.POST,
+        new_relic_api.DASHBOARDS_URL,
+        status=200,
+        json={"dashboard": {"id": 7}},
+    )
+    client = new_relic_api.NewRelicApiClient(
+        "API_KEY", 1, response_cache=http_cache.ResponseCache(ttl=60)
+    )
+    assert 1 == client.get_dashboard_id_by_title("My Dashboard")
+    # The dashboard is deleted while its lookup is still cached
+    existing_titles.clear()
+
+    report = deployment.deploy_dashboards(
+        [_create_dashboard("my-dashboard", "My Dashboard")], [client]
+    )
+
+    assert deployment.DeploymentAction.CREATED == report.results[0].action
+    assert ["GET", "PUT", "GET", "POST"] == [
+        call.request.method for call in responses.calls
+    ]
+
+
+@responses.activate
+def test_deploy_dashboards_reports_dashboards_not_deployed_by_deadline():
+    build_deadline = concurrency.Deadline(0)
+    clients = [new_relic_api.NewRelicApiClient("API_KEY", 1, deadline=build_deadline)]
+    dashboards = [
+        _create_dashboard(f"dashboard-{index}", f"Dashboard {index}")
+        for index in range(5)
+    ]
+
+    report = deployment.deploy_dashboards(
+        dashboards, clients, max_workers=2, deadline=build_deadline
+    )
+
+    assert 5 == len(report.cancellations)
+    assert not responses.calls
+
+
+@responses.activate
+def test_deploy_dashboards_scheduled_by_priority_and_cost():
+    _set_get_dashboards_response()
+    responses.add(responses.POST, new_relic_api.DASHBOARDS_URL, status=200)
+    large = _create_dashboard("large", "Large")
+    dashboards = [
+        _create_dashboard("low", "Low"),
+        attr.evolve(large, widgets=large.widgets * 100, priority=1),
+        attr.evolve(_create_dashboard("small", "Small"), priority=1),
+        attr.evolve(_create_dashboard("urgent", "Urgent"), priority=2),
+    ]
+
+    report = deployment.deploy_dashboards(
+        dashboards, [_create_client(1)], max_workers=1, schedule=True
+    )
+
+    assert ["urgent", "small", "large", "low"] == [
+        result.dashboard_name for result in report.results
+    ]
+
+
+@responses.activate
+def test_deploy_dashboards_scheduled_within_window():
+    _set_get_dashboards_response()
+    first_push_started = threading.Event()
+    release_first_push = threading.Event()
+
+    def create_dashboard(_request):
+        if not first_push_started.is_set():
+            first_push_started.set()
+            release_first_push.wait(timeout=5)
+        return 200, {}, json.dumps({"dashboard": {"id": 1}})
+
+    responses.add_callback(
+        responses.POST, new_relic_api.DASHBOARDS_URL, callback=create_dashboard
+    )
+
+    def dashboards():
+        yield _create_dashboard("first", "First")
+        assert first_push_started.wait(timeout=5)
+        # Fills the queue, so that the following dashboards are held and reordered
+        yield _create_dashboard("low", "Low")
+        yield attr.evolve(_create_dashboard("high", "High"), priority=1)
+        yield attr.evolve(_create_dashboard("urgent", "Urgent"), priority=2)
+        release_first_push.set()
+
+    report = deployment.deploy_dashboards(
+        dashboards(),
+        [_create_client(1)],
+        max_workers=1,
+        queue_size=1,
+        schedule=True,
+        schedule_window=2,
+    )
+
+    assert ["first", "low", "urgent", "high"] == [
+        result.dashboard_name for result in report.results
+    ]
+
+
+@responses.activate
+def test_deploy_dashboards_scheduled_within_window_streams():
+    _set_get_dashboards_response()
+    responses.add(responses.POST, new_relic_api.DASHBOARDS_URL, status=200)
+    first_pushed = threading.Event()
+
+    def dashboards():
+        for index in range(3):
+            yield _create_dashboard(f"dashboard-{index}", f"Dashboard {index}")
+        # Far fewer dashboards than the window must not wait for the end of the stream
+        assert first_pushed.wait(timeout=5)
+
+    report = deployment.deploy_dashboards(
+        dashboards(),
+        [_create_client(1)],
+        on_result=lambda _: first_pushed.set(),
+        schedule=True,
+        schedule_window=deployment.DEFAULT_SCHEDULE_WINDOW,
+    )
+
+    assert 3 == len(report.results)
+    assert not report.failures
+
+
+def test_estimate_cost_without_lookup(tmp_path):
+    payload = new_relic_api.render_dashboard_payload(
+        _create_dashboard("my-dashboard", "My Dashboard")
+    )
+    with id_cache.DashboardIdCache(str(tmp_path / "ids.db")) as dashboard_id_cache:
+        client = _create_client(1, dashboard_id_cache=dashboard_id_cache)
+        lookup_cost = deployment.estimate_cost(client, payload)
+        dashboard_id_cache.put(1, "My Dashboard", 3)
+
+        assert deployment.estimate_cost(client, payload) == pytest.approx(
+            lookup_cost - 1
+        )
+
+
+def _create_client(account_id, circuit_breaker=None, dashboard_id_cache=None):
+    return new_relic_api.NewRelicApiClient(
+        "API_KEY",
+        account_id,
+        circuit_breaker=circuit_breaker,
+        id_cache=dashboard_id_cache,
+    )
+
+
+def _create_dashboard(name, title):
+    return models.Dashboard(
+        name=name,
+        title=title,
+        widgets=[
+            models.Widget(
+                title="My Widget",
+                query="SELECT COUNT(*) FROM Transactions",
+                visualization=models.WidgetVisualization.BILLBOARD,
+                row=1,
+                column=1,
+                width=1,
+                height=1,
+            )
+        ],
+    )
+
+
+def _set_get_dashboards_response(existing_titles=()):
+    def callback(request):
+        title = request.params["filter[title]"]
+        dashboards = [
+            {"title": existing_title, "id": index}
+            for index, existing_title in enumerate(existing_titles, start=1)
+            if existing_title == title
+        ]
+        return 200, {}, json.dumps({"dashboards": dashboards})
+
+    responses.add_callback(
+        responses.GET, new_relic_api.DASHBOARDS_URL, callback=callback
+    )
@@ -0,0 +1,75 @@
+"""Tests for the API response cache."""
+import time
+
+from nrdash import http_cache
+
+
+def test_get_missing_response():
+    cache = http_cache.ResponseCache()
+
+    assert cache.get("key") is None
+
+
+def test_put_and_get_response():
+    cache = http_cache.ResponseCache()
+    response = _create_response()
+
+    cache.put("key", response)
+
+    assert response == cache.get("key")
+
+
+def test_invalidate_response():
+    cache = http_cache.ResponseCache()
+    cache.put("key", _create_response())
+
+    cache.invalidate("key")
+
+    assert cache.get("key") is None
+
+
+def test_response_fresh_within_ttl():
+    cache = http_cache.ResponseCache(ttl=60)
+
+    assert cache.is_fresh(_create_response())
+    assert not cache.is_fresh(_create_response(stored_at=time.time() - 120))
+
+
+def test_responses_persisted_across_caches(tmp_path):
+    directory = str(tmp_path / "cache")
+    response = _create_response(content=b'{"dashboards": []}\xff', etag='"abc"')
+    http_cache.ResponseCache(directory=directory).put("key", response)
+
+    actual = http_cache.ResponseCache(directory=directory).get("key")
+
+    assert response == actual
+
+
+def test_invalidate_persisted_response(tmp_path):
+    directory = str(tmp_path / "cache")
+    http_cache.ResponseCache(directory=directory).put("key", _create_response())
+
+    http_cache.ResponseCache(directory=directory).invalidate("key")
+
+    assert http_cache.ResponseCache(directory=directory).get("key") is None
+
+
+def test_conditional_headers():
+    response = _create_response(etag='"abc"', last_modified="yesterday")
+
+    expected = {"If-None-Match": '"abc"', "If-Modified-Since": "yesterday"}
+
+    assert response.can_revalidate
+    assert expected == response.conditional_headers()
+
+
+def _create_response(
+    content=b'{"dashboards": []}', stored_at=None, etag=None, last_modified=None
+):
+    return http_cache.CachedResponse(
+        status_code=200,
+        content=content,
+        stored_at=time.time() if stored_at is None else stored_at,
+        etag=etag,
+        last_modified=last_modified,
+    )
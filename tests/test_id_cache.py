@@ -0,0 +1,75 @@
+"""Tests for the persistent dashboard id cache."""
+import multiprocessing
+import time
+
+from nrdash import id_cache
+
+
+def test_get_missing_dashboard_id(tmp_path):
+    with _open_cache(tmp_path) as cache:
+        assert cache.get(1, "My Dashboard") is None
+
+
+def test_put_and_get_dashboard_id(tmp_path):
+    with _open_cache(tmp_path) as cache:
+        cache.put(1, "My Dashboard", 10)
+
+        assert 10 == cache.get(1, "My Dashboard")
+        assert cache.get(2, "My Dashboard") is None
+
+
+def test_dashboard_id_expires_after_ttl(tmp_path, monkeypatch):
+    with _open_cache(tmp_path, ttl=60) as cache:
+        cache.put(1, "My Dashboard", 10)
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 120)
+
+        assert cache.get(1, "My Dashboard") is None
+
+
+def test_invalidate_dashboard_id(tmp_path):
+    with _open_cache(tmp_path) as cache:
+        cache.put(1, "My Dashboard", 10)
+        cache.put(2, "My Dashboard", 10)
+
+        cache.invalidate(1, 10)
+
+        assert cache.get(1, "My Dashboard") is None
+        assert 10 == cache.get(2, "My Dashboard")
+
+
+def test_dashboard_ids_persisted_across_caches(tmp_path):
+    with _open_cache(tmp_path) as cache:
+        cache.put(1, "My Dashboard", 10)
+
+    with _open_cache(tmp_path) as cache:
+        assert 10 == cache.get(1, "My Dashboard")
+
+
+def test_cache_shared_by_concurrent_processes(tmp_path):
+    path = str(tmp_path / "ids.db")
+    processes = [
+        multiprocessing.Process(target=_put_dashboard_ids, args=(path, account_id))
+        for account_id in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    with id_cache.DashboardIdCache(path) as cache:
+        for account_id in range(4):
+            for index in range(50):
+                assert index == cache.get(account_id, f"Dashboard {index}")
+
+
+def _open_cache(tmp_path, ttl=60):
+    return id_cache.DashboardIdCache(str(tmp_path / "ids.db"), ttl)
+
+
+def _put_dashboard_ids(path, account_id):
+    with id_cache.DashboardIdCache(path) as cache:
+        for index in range(50):
+            cache.put(account_id, f"Dashboard {index}", index)
+            cache.get(account_id, f"Dashboard {index}")
@@ -0,0 +1,58 @@
+"""Tests for the build journal."""
+from nrdash import journal
+
+
+def test_new_journal_discards_previous_entries(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with journal.BuildJournal(path) as build_journal:
+        build_journal.record(_create_entry())
+
+    with journal.BuildJournal(path) as build_journal:
+        assert not build_journal.is_complete(1, "my-dashboard", "hash")
+
+
+def test_resumed_journal_keeps_completed_entries(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with journal.BuildJournal(path) as build_journal:
+        build_journal.record(_create_entry())
+
+    with journal.BuildJournal(path, resume=True) as build_journal:
+        assert build_journal.is_complete(1, "my-dashboard", "hash")
+        assert not build_journal.is_complete(1, "my-dashboard", "changed-hash")
+        assert not build_journal.is_complete(2, "my-dashboard", "hash")
+
+
+def test_resumed_journal_latest_entry_wins(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with journal.BuildJournal(path) as build_journal:
+        build_journal.record(_create_entry())
+        build_journal.record(_create_entry(action="failed"))
+
+    with journal.BuildJournal(path, resume=True) as build_journal:
+        assert not build_journal.is_complete(1, "my-dashboard", "hash")
+
+
+def test_resumed_journal_ignores_partially_written_entry(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with journal.BuildJournal(str(path)) as build_journal:
+        build_journal.record(_create_entry())
+
+    with open(str(path), "a") as journal_file:
+        journal_file.write('{"account_id": 1, "dashb')
+
+    with journal.BuildJournal(str(path), resume=True) as build_journal:
+        build_journal.record(_create_entry(dashboard_name="other-dashboard"))
+
+    with journal.BuildJournal(str(path), resume=True) as build_journal:
+        assert build_journal.is_complete(1, "my-dashboard", "hash")
+        assert build_journal.is_complete(1, "other-dashboard", "hash")
+
+
+def _create_entry(dashboard_name="my-dashboard", action="created"):
+    return journal.JournalEntry(
+        account_id=1,
+        dashboard_name=dashboard_name,
+        action=action,
+        payload_hash="hash",
+        dashboard_id=7,
+    )
@@ -0,0 +1,101 @@
+"""Tests for placing widgets on the dashboard grid."""
+import pytest
+
+from nrdash import layout, models
+
+
+def test_arrange_fixed_widgets():
+    widgets = [
+        _create_widget(row=1, column=1, width=3),
+        _create_widget(row=2, column=1, width=1, height=2),
+        _create_widget(row=2, column=2, width=2, height=2),
+    ]
+
+    assert widgets == layout.arrange_widgets(widgets, "my-dashboard")
+
+
+@pytest.mark.parametrize(
+    "widget, message",
+    [
+        (dict(row=1, column=3, width=2), "extends past column 3"),
+        (dict(row=1, column=4), "must have a column from 1 to 3, got 4"),
+        (dict(row=0, column=1), "must have a row of at least 1 or auto, got 0"),
+        (dict(row=1, column=1, width="2"), "must have a width from 1 to 3, got '2'"),
+        (dict(row=1, column=1, height=True), "must have a height of at least 1"),
+        (dict(row=layout.AUTO, column=3, width=2), "extends past column 3"),
+    ],
+)
+def test_widget_outside_grid(widget, message):
+    with pytest.raises(models.InvalidWidgetConfigurationException, match=message):
+        layout.arrange_widgets([_create_widget(**widget)], "my-dashboard")
+
+
+def test_overlapping_widgets():
+    widgets = [
+        _create_widget(row=1, column=1),
+        _create_widget(row=1, column=2, title="Wide", width=2, height=3),
+        _create_widget(row=3, column=3, title="Overlapping"),
+    ]
+
+    with pytest.raises(
+        models.InvalidWidgetConfigurationException,
+        match=r"Widget 3 \(Overlapping\) on dashboard my-dashboard overlaps widget 2 \(Wide\) at row 3, column 3",
+    ):
+        layout.arrange_widgets(widgets, "my-dashboard")
+
+
+def test_auto_placed_widgets_fill_free_space_in_order():
+    widgets = [
+        _create_widget(row=layout.AUTO, column=None, width=2),
+        _create_widget(row=1, column=3, height=2),
+        _create_widget(row=layout.AUTO, column=None, width=3),
+        _create_widget(row=layout.AUTO, column=None),
+        _create_widget(row=layout.AUTO, column=1, height=2),
+    ]
+
+    arranged = layout.arrange_widgets(widgets, "my-dashboard")
+
+    assert [(1, 1), (1, 3), (3, 1), (2, 1), (4, 1)] == [
+        (widget.row, widget.column) for widget in arranged
+    ]
+
+
+def test_auto_placement_never_overlaps():
+    widgets = [
+        _create_widget(
+            row=layout.AUTO, column=None, width=index % 3 + 1, height=index % 4 + 1
+        )
+        for index in range(1000)
+    ]
+
+    arranged = layout.arrange_widgets(widgets, "my-dashboard")
+
+    # Checking the placed widgets again raises if any of them overlap
+    assert arranged == layout.arrange_widgets(arranged, "my-dashboard")
+
+
+def test_auto_placement_skips_tall_widgets():
+    widgets = [
+        _create_widget(row=1, column=1, height=20000000),
+        _create_widget(row=1, column=2, width=2, height=10000000),
+        _create_widget(row=layout.AUTO, column=None, width=2),
+        _create_widget(row=layout.AUTO, column=None, width=3),
+    ]
+
+    arranged = layout.arrange_widgets(widgets, "my-dashboard")
+
+    assert [(10000001, 2), (20000001, 1)] == [
+        (widget.row, widget.column) for widget in arranged[2:]
+    ]
+
+
+def _create_widget(row, column, width=1, height=1, title="My Widget"):
+    return models.Widget(
+        title=title,
+        query="SELECT COUNT(*) FROM Transaction",
+        visualization=models.WidgetVisualization.BILLBOARD,
+        row=row,
+        column=column,
+        width=width,
+        height=height,
+    )
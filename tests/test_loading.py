@@ -0,0 +1,192 @@
+"""Tests for loading YAML configuration."""
+import io
+import os
+
+import pytest
+import yaml
+
+from nrdash import loading, models
+
+_CONFIG = """
+common: &common
+  row: 1
+  column: 1
+other:
+  position: *common
+dashboards:
+  first:
+    title: First
+    position: *common
+  second: &second
+    title: Second
+  third: *second
+"""
+
+_UNANCHORED_CONFIG = """
+dashboards:
+  first:
+    title: First
+    widgets:
+      - {row: 1, column: 1}
+      - {row: 1, column: 2}
+  second:
+    title: Second
+"""
+
+
+@pytest.fixture(params=sorted(loading.LOADERS))
+def loader(request):
+    return loading.LOADERS[request.param]
+
+
+def test_libyaml_is_used_when_available():
+    expected = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+    assert expected is loading.SafeLoader
+
+
+@pytest.mark.parametrize(
+    "file_name", ["dashboard_templates.yml", "selected_dashboards.yml", "empty.yml"]
+)
+def test_load_matches_safe_load(loader, file_name):
+    with open(_get_test_file_path(file_name)) as config_file:
+        config_text = config_file.read()
+    expected = yaml.safe_load(config_text)
+
+    assert expected == loading.load(config_text, loader=loader)
+    assert expected == loading.load(
+        config_text, sections=list(expected or {}), loader=loader
+    )
+
+
+def test_load_selected_sections(loader):
+    actual = loading.load(_CONFIG, sections=["other"], loader=loader)
+
+    assert {"other": {"position": {"row": 1, "column": 1}}} == actual
+
+
+def test_load_selected_entries(loader):
+    actual = loading.load(
+        _CONFIG,
+        sections=["dashboards"],
+        entries={"dashboards": ["first", "third"]},
+        loader=loader,
+    )
+
+    assert {
+        "dashboards": {
+            "first": {"title": "First", "position": {"row": 1, "column": 1}},
+            "third": {"title": "Second"},
+        }
+    } == actual
+
+
+def test_load_selected_entries_of_all_sections(loader):
+    actual = loading.load(_CONFIG, entries={"dashboards": []}, loader=loader)
+
+    assert ["common", "other", "dashboards"] == list(actual)
+    assert {} == actual["dashboards"]
+
+
+def test_load_selected_sections_of_empty_document(loader):
+    assert loading.load("", sections=["dashboards"], loader=loader) is None
+
+
+@pytest.mark.parametrize(
+    "config_text",
+    [
+        "dashboards: {}\n---\nqueries: {}\n",
+        "dashboards: &anchor {}\nqueries: &anchor {}\n",
+        "dashboards: *undefined\n",
+    ],
+)
+def test_load_selected_sections_of_invalid_document(loader, config_text):
+    with pytest.raises(yaml.YAMLError):
+        loading.load(config_text, sections=["dashboards"], loader=loader)
+
+
+@pytest.mark.parametrize(
+    "limits, message",
+    [
+        (
+            models.ParseLimits(max_aliases=2),
+            "line 13, column 10: configuration exceeds the limit of 2 aliases",
+        ),
+        (
+            models.ParseLimits(max_nodes=34),
+            "line 13, column 10: configuration exceeds the limit of 34 nodes",
+        ),
+        (
+            models.ParseLimits(max_nesting_depth=4),
+            "line 10, column 15: configuration exceeds the limit of 4 levels of nesting",
+        ),
+    ],
+)
+def test_load_exceeding_limit(loader, limits, message):
+    with pytest.raises(models.ConfigurationLimitExceededException, match=message):
+        loading.load(_CONFIG, limits=limits, loader=loader)
+
+
+def test_load_within_limits(loader):
+    limits = models.ParseLimits(max_aliases=3, max_nodes=35, max_nesting_depth=5)
+
+    assert yaml.safe_load(_CONFIG) == loading.load(
+        _CONFIG, limits=limits, loader=loader
+    )
+
+
+def test_load_recursive_alias_within_limits(loader):
+    actual = loading.load(
+        "items: &items [*items]\n", limits=models.ParseLimits(), loader=loader
+    )
+
+    assert actual["items"][0] is actual["items"]
+
+
+@pytest.mark.parametrize(
+    "limits, message",
+    [
+        (
+            models.ParseLimits(max_nodes=16),
+            "line 7, column 15: configuration exceeds the limit of 16 nodes",
+        ),
+        (
+            models.ParseLimits(max_nesting_depth=5),
+            "line 6, column 10: configuration exceeds the limit of 5 levels of nesting",
+        ),
+    ],
+)
+def test_load_without_anchors_exceeding_limit(loader, limits, message):
+    with pytest.raises(models.ConfigurationLimitExceededException, match=message):
+        loading.load(_UNANCHORED_CONFIG, limits=limits, loader=loader)
+    # Selecting sections composes event by event, which must fail at the same place
+    with pytest.raises(models.ConfigurationLimitExceededException, match=message):
+        loading.load(
+            _UNANCHORED_CONFIG, sections=["dashboards"], limits=limits, loader=loader
+        )
+
+
+def test_load_file_without_anchors_exceeding_limit(loader, tmp_path):
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(_UNANCHORED_CONFIG)
+    limits = models.ParseLimits(max_nodes=16)
+
+    with open(config_path, "rb") as config_file:
+        with pytest.raises(
+            models.ConfigurationLimitExceededException, match=r"config\.yml, line 7"
+        ):
+            loading.load(config_file, limits=limits, loader=loader)
+
+
+def test_load_without_anchors_within_limits(loader):
+    limits = models.ParseLimits(max_nodes=23, max_nesting_depth=6)
+
+    with io.StringIO(_UNANCHORED_CONFIG) as config_file:
+        actual = loading.load(config_file, limits=limits, loader=loader)
+
+    assert yaml.safe_load(_UNANCHORED_CONFIG) == actual
+
+
+def _get_test_file_path(file_name):
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(test_dir, "test_data", file_name)
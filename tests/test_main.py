@@ -0,0 +1,210 @@
+"""Tests for the command line interface."""
+import os
+import subprocess
+import sys
+
+import responses
+from click.testing import CliRunner
+
+from nrdash import main, models, new_relic_api, recording
+
+
+def test_lint_valid_file():
+    result = CliRunner().invoke(
+        main.main, ["lint", _get_test_file_path("dashboards.yml")]
+    )
+
+    assert 0 == result.exit_code
+    assert "is valid" in result.output
+
+
+def test_lint_invalid_file():
+    result = CliRunner().invoke(
+        main.main, ["lint", _get_test_file_path("missing_widget_row.yml")]
+    )
+
+    assert 0 != result.exit_code
+
+
+@responses.activate
+def test_build_rejects_dashboard_defined_in_multiple_files():
+    file_path = _get_test_file_path("dashboards.yml")
+
+    result = CliRunner().invoke(
+        main.main,
+        ["build", file_path, file_path, "--api-key", "API_KEY", "--account-id", "1"],
+    )
+
+    assert isinstance(result.exception, models.DuplicateDashboardException)
+    assert not responses.calls
+
+
+@responses.activate
+def test_build_selected_dashboards(tmp_path):
+    responses.add(responses.GET, new_relic_api.DASHBOARDS_URL, json={"dashboards": []})
+    responses.add(
+        responses.POST, new_relic_api.DASHBOARDS_URL, json={"dashboard": {"id": 1}}
+    )
+
+    result = CliRunner().invoke(
+        main.main,
+        [
+            "build",
+            _get_test_file_path("selected_dashboards.yml"),
+            "--dashboard",
+            "valid-dashboard",
+            "--api-key",
+            "API_KEY",
+            "--account-id",
+            "1",
+            "--journal",
+            str(tmp_path / "journal"),
+        ],
+    )
+
+    assert 0 == result.exit_code, result.output
+    assert "Created valid-dashboard on account 1" in result.output
+    assert 1 == len([call for call in responses.calls if call.request.method == "POST"])
+
+
+@responses.activate
+def test_build_shards_and_merge_results(tmp_path):
+    responses.add(responses.GET, new_relic_api.DASHBOARDS_URL, json={"dashboards": []})
+    responses.add(
+        responses.POST, new_relic_api.DASHBOARDS_URL, json={"dashboard": {"id": 1}}
+    )
+    result_files = [str(tmp_path / f"shard-{index}.json") for index in (1, 2)]
+
+    outputs = []
+    for index, result_file in enumerate(result_files, start=1):
+        result = CliRunner().invoke(
+            main.main,
+            [
+                "build",
+                _get_test_file_path("dashboard_templates.yml"),
+                "--shard",
+                f"{index}/2",
+                "--shard-results",
+                result_file,
+                "--api-key",
+                "API_KEY",
+                "--account-id",
+                "1",
+                "--journal",
+                str(tmp_path / f"journal-{index}"),
+            ],
+        )
+        assert 0 == result.exit_code, result.output
+        outputs.append(result.output)
+    report = CliRunner().invoke(main.main, ["shard-report"] + result_files)
+
+    assert "Created overview" in outputs[0]
+    assert "Created service-checkout-us" in outputs[0]
+    assert "Created service-search-us" in outputs[1]
+    assert 0 == report.exit_code, report.output
+    assert "Account 1: 3 created" in report.output
+
+
+@responses.activate
+def test_build_shards_with_default_journals(tmp_path, monkeypatch):
+    responses.add(responses.GET, new_relic_api.DASHBOARDS_URL, json={"dashboards": []})
+    responses.add(
+        responses.POST, new_relic_api.DASHBOARDS_URL, json={"dashboard": {"id": 1}}
+    )
+    monkeypatch.chdir(tmp_path)
+
+    for index in (1, 2):
+        result = CliRunner().invoke(
+            main.main,
+            [
+                "build",
+                _get_test_file_path("dashboard_templates.yml"),
+                "--shard",
+                f"{index}/2",
+                "--api-key",
+                "API_KEY",
+                "--account-id",
+                "1",
+            ],
+        )
+        assert 0 == result.exit_code, result.output
+
+    assert [".nrdash-journal.1-of-2.jsonl", ".nrdash-journal.2-of-2.jsonl"] == sorted(
+        os.listdir(tmp_path)
+    )
+    assert (tmp_path / ".nrdash-journal.1-of-2.jsonl").read_text()
+    assert (tmp_path / ".nrdash-journal.2-of-2.jsonl").read_text()
+
+
+def test_build_invalid_shard():
+    result = CliRunner().invoke(
+        main.main,
+        ["build", _get_test_file_path("dashboards.yml"), "--shard", "3/2"],
+    )
+
+    assert 2 == result.exit_code
+    assert "expected I/N" in result.output
+
+
+@responses.activate
+def test_build_records_api_requests(tmp_path):
+    responses.add(responses.GET, new_relic_api.DASHBOARDS_URL, json={"dashboards": []})
+    responses.add(
+        responses.POST, new_relic_api.DASHBOARDS_URL, json={"dashboard": {"id": 1}}
+    )
+    trace_path = tmp_path / "trace.jsonl"
+
+    result = CliRunner().invoke(
+        main.main,
+        [
+            "build",
+            _get_test_file_path("dashboards.yml"),
+            "--record",
+            str(trace_path),
+            "--api-key",
+            "API_KEY",
+            "--account-id",
+            "1",
+            "--journal",
+            str(tmp_path / "journal"),
+        ],
+    )
+
+    assert 0 == result.exit_code, result.output
+    assert ["GET", "POST"] == [
+        entry.method for entry in recording.read_trace(str(trace_path))
+    ]
+    assert "API_KEY" not in trace_path.read_text()
+
+
+def test_startup_does_not_import_command_dependencies():
+    imported = _get_imported_modules("import nrdash.main")
+
+    assert "requests" not in imported
+    assert "yaml" not in imported
+
+
+def test_lint_does_not_import_http_client():
+    lint_file = _get_test_file_path("dashboards.yml")
+    imported = _get_imported_modules(
+        f"from nrdash import main; main.main(['lint', {lint_file!r}], standalone_mode=False)"
+    )
+
+    assert "requests" not in imported
+    assert "nrdash.new_relic_api" not in imported
+
+
+def _get_imported_modules(code):
+    result = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys\nprint(*sys.modules, sep='\\n')"],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    return set(result.stdout.splitlines())
+
+
+def _get_test_file_path(file_name):
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(test_dir, "test_data", file_name)
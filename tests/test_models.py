@@ -78,6 +78,25 @@ def test_componentized_query_to_nrql_no_display_no_condition():
     assert expected == actual
 
 
+def test_template_string_render():
+    template = models.TemplateString(
+        literals=("appName = '", "' AND region = '", "'"),
+        parameters=("service", "region"),
+    )
+
+    expected = "appName = 'checkout' AND region = 'us'"
+
+    actual = template.render({"service": "checkout", "region": "us"})
+
+    assert expected == actual
+
+
+def test_template_string_render_no_parameters():
+    template = models.TemplateString(literals=("COUNT(*)",), parameters=())
+
+    assert "COUNT(*)" == template.render({"service": "checkout"})
+
+
 def _create_condition(nrql):
     """Create a condition object for testing."""
     return models.QueryCondition(name="test-condition", nrql=nrql)
@@ -1,11 +1,13 @@
 """Tests for New Relic API accessor."""
+import json
 import re
+import time
 
 import attr
 import responses
 import pytest
 
-from nrdash import models, new_relic_api
+from nrdash import concurrency, http_cache, id_cache, models, new_relic_api
 
 
 @attr.s(frozen=True)
@@ -98,6 +100,165 @@ def test_get_dashboard_id_by_title_single_exact_match():
     assert dashboard_id == actual_dashboard_id
 
 
+def test_render_dashboard_payload_for_account():
+    payload = new_relic_api.render_dashboard_payload(_create_dashboard_data())
+
+    first_account = json.loads(payload.for_account(1))
+    second_account = json.loads(payload.for_account(2))
+
+    assert 1 == first_account["dashboard"]["widgets"][0]["account_id"]
+    assert 2 == second_account["dashboard"]["widgets"][0]["account_id"]
+    assert first_account["dashboard"]["title"] == "My Dashboard"
+
+
+def test_rendered_dashboard_is_marked_as_managed():
+    payload = new_relic_api.render_dashboard_payload(_create_dashboard_data())
+
+    assert new_relic_api.is_managed_dashboard(json.loads(payload.body)["dashboard"])
+    assert not new_relic_api.is_managed_dashboard({"title": "Created By Hand"})
+
+
+@responses.activate
+def test_create_dashboard_sends_account_id():
+    _set_create_dashboard_response(200)
+
+    client = _create_client(account_id=42)
+    client.create_dashboard(_create_dashboard_data())
+
+    body = json.loads(responses.calls[0].request.body)
+    assert 42 == body["dashboard"]["widgets"][0]["account_id"]
+
+
+@responses.activate
+def test_requests_are_throttled():
+    _set_get_dashboards_response()
+    client = new_relic_api.NewRelicApiClient("API_KEY", 1, requests_per_second=20)
+
+    start = time.monotonic()
+    for _ in range(3):
+        client.get_dashboard_id_by_title("My Dashboard")
+    elapsed = time.monotonic() - start
+
+    assert elapsed >= 0.1
+
+
+@responses.activate
+def test_throttled_requests_reduce_concurrency_limit():
+    _set_get_dashboards_response(status=429)
+    limiter = concurrency.AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8)
+    client = new_relic_api.NewRelicApiClient("API_KEY", 1, limiter=limiter)
+
+    with pytest.raises(models.NewRelicApiException):
+        client.get_dashboard_id_by_title("My Dashboard")
+
+    assert 4 == limiter.limit
+
+
+@responses.activate
+def test_throttle_wait_is_not_measured_as_latency():
+    _set_get_dashboards_response()
+    limiter = _LatencyRecordingLimiter()
+    client = new_relic_api.NewRelicApiClient(
+        "API_KEY", 1, requests_per_second=10, limiter=limiter
+    )
+
+    for _ in range(3):
+        client.get_dashboard_id_by_title("My Dashboard")
+
+    # Each request after the first waited about 0.1 seconds for the throttle
+    assert 3 == len(limiter.latencies)
+    assert max(limiter.latencies) < 0.05
+
+
+@responses.activate
+def test_open_circuit_stops_requests():
+    _set_get_dashboards_response(status=503)
+    breaker = concurrency.CircuitBreaker(failure_threshold=1)
+    client = new_relic_api.NewRelicApiClient("API_KEY", 1, circuit_breaker=breaker)
+
+    with pytest.raises(models.NewRelicApiException):
+        client.get_dashboard_id_by_title("My Dashboard")
+
+    with pytest.raises(models.CircuitOpenException):
+        client.get_dashboard_id_by_title("My Dashboard")
+
+    assert 1 == len(responses.calls)
+
+
+@responses.activate
+def test_cached_lookup_revalidated_with_etag():
+    dashboard_json = {"dashboards": [{"title": "My Dashboard", "id": 1}]}
+    responses.add(
+        responses.GET,
+        new_relic_api.DASHBOARDS_URL,
+        json=dashboard_json,
+        headers={"ETag": '"v1"'},
+    )
+    responses.add(responses.GET, new_relic_api.DASHBOARDS_URL, status=304)
+    client = _create_client(response_cache=http_cache.ResponseCache())
+
+    assert 1 == client.get_dashboard_id_by_title("My Dashboard")
+    assert 1 == client.get_dashboard_id_by_title("My Dashboard")
+
+    assert '"v1"' == responses.calls[1].request.headers["If-None-Match"]
+
+
+@responses.activate
+def test_cached_lookup_reused_within_ttl():
+    _set_get_dashboards_response(
+        dashboard_responses=[_DashboardResponse(title="My Dashboard", dashboard_id=1)]
+    )
+    client = _create_client(response_cache=http_cache.ResponseCache(ttl=60))
+
+    assert 1 == client.get_dashboard_id_by_title("My Dashboard")
+    assert 1 == client.get_dashboard_id_by_title("My Dashboard")
+
+    assert 1 == len(responses.calls)
+
+
+@responses.activate
+def test_cached_lookup_invalidated_by_create():
+    _set_get_dashboards_response()
+    _set_create_dashboard_response(200)
+    client = _create_client(response_cache=http_cache.ResponseCache(ttl=60))
+
+    client.get_dashboard_id_by_title("My Dashboard")
+    client.create_dashboard(_create_dashboard_data())
+    client.get_dashboard_id_by_title("My Dashboard")
+
+    assert 3 == len(responses.calls)
+
+
+@responses.activate
+def test_delete_dashboard():
+    responses.add(
+        responses.DELETE, f"{new_relic_api.BASE_URL}dashboards/1.json", status=200
+    )
+
+    _create_client().delete_dashboard(1)
+
+    assert 1 == len(responses.calls)
+
+
+@responses.activate
+def test_delete_missing_dashboard():
+    responses.add(
+        responses.DELETE, f"{new_relic_api.BASE_URL}dashboards/1.json", status=404
+    )
+
+    _create_client().delete_dashboard(1)
+
+
+@responses.activate
+def test_delete_dashboard_error():
+    responses.add(
+        responses.DELETE, f"{new_relic_api.BASE_URL}dashboards/1.json", status=500
+    )
+
+    with pytest.raises(models.NewRelicApiException):
+        _create_client().delete_dashboard(1)
+
+
 @responses.activate
 def test_update_dashboard():
     _set_update_dashboard_response(200)
@@ -115,8 +276,120 @@ def test_update_dashboard_error():
         _update_dashboard()
 
 
-def _create_client(api_key="API_KEY", account_id=1):
-    return new_relic_api.NewRelicApiClient(api_key, account_id)
+@responses.activate
+def test_lookup_uses_id_cache(tmp_path):
+    _set_get_dashboards_response(
+        dashboard_responses=[_DashboardResponse(title="My Dashboard", dashboard_id=1)]
+    )
+    with id_cache.DashboardIdCache(str(tmp_path / "ids.db")) as dashboard_id_cache:
+        client = _create_client(dashboard_id_cache=dashboard_id_cache)
+
+        assert 1 == client.get_dashboard_id_by_title("My Dashboard")
+        assert 1 == client.get_dashboard_id_by_title("My Dashboard")
+
+    assert 1 == len(responses.calls)
+
+
+@responses.activate
+def test_update_missing_dashboard_invalidates_id_cache(tmp_path):
+    _set_update_dashboard_response(404)
+    with id_cache.DashboardIdCache(str(tmp_path / "ids.db")) as dashboard_id_cache:
+        dashboard_id_cache.put(1, "My Dashboard", 1)
+        client = _create_client(dashboard_id_cache=dashboard_id_cache)
+
+        with pytest.raises(models.DashboardNotFoundException):
+            client.update_dashboard(1, _create_dashboard_data())
+
+        assert dashboard_id_cache.get(1, "My Dashboard") is None
+
+
+@responses.activate
+def test_requests_use_timeouts():
+    _set_get_dashboards_response()
+    client = new_relic_api.NewRelicApiClient("API_KEY", 1, timeout=(1.0, 2.0))
+
+    client.get_dashboard_id_by_title("My Dashboard")
+
+    assert (1.0, 2.0) == responses.calls[0].request.req_kwargs["timeout"]
+
+
+@responses.activate
+def test_requests_cut_short_by_deadline():
+    _set_get_dashboards_response()
+    client = new_relic_api.NewRelicApiClient(
+        "API_KEY", 1, timeout=(10.0, 60.0), deadline=concurrency.Deadline(5)
+    )
+
+    client.get_dashboard_id_by_title("My Dashboard")
+
+    connect_timeout, read_timeout = responses.calls[0].request.req_kwargs["timeout"]
+    assert connect_timeout <= 5
+    assert read_timeout <= 5
+
+
+@responses.activate
+def test_no_requests_after_deadline():
+    client = new_relic_api.NewRelicApiClient(
+        "API_KEY", 1, deadline=concurrency.Deadline(0)
+    )
+
+    with pytest.raises(models.DeadlineExceededException):
+        client.get_dashboard_id_by_title("My Dashboard")
+
+    assert not responses.calls
+
+
+@responses.activate
+def test_list_dashboards_follows_pages():
+    for page_titles in (["First", "Second"], ["Third"], []):
+        _set_get_dashboards_response(
+            dashboard_responses=[
+                _DashboardResponse(title=title, dashboard_id=title)
+                for title in page_titles
+            ]
+        )
+
+    actual = _create_client().list_dashboards()
+
+    assert ["First", "Second", "Third"] == [dashboard["id"] for dashboard in actual]
+    assert ["1", "2", "3"] == [call.request.params["page"] for call in responses.calls]
+
+
+@responses.activate
+def test_lookups_use_title_index():
+    _set_get_dashboards_response(
+        dashboard_responses=[_DashboardResponse(title="My Dashboard", dashboard_id=1)]
+    )
+    _set_get_dashboards_response()
+    client = _create_client()
+
+    client.load_title_index()
+    calls_after_loading = len(responses.calls)
+
+    assert 1 == client.get_dashboard_id_by_title("My Dashboard")
+    assert client.get_dashboard_id_by_title("Other Dashboard") is None
+    assert calls_after_loading == len(responses.calls)
+
+
+class _LatencyRecordingLimiter(concurrency.AdaptiveConcurrencyLimiter):
+    def __init__(self):
+        super().__init__()
+        self.latencies = []
+
+    def _on_outcome(self, outcome, start_time):
+        self.latencies.append(time.monotonic() - start_time)
+        super()._on_outcome(outcome, start_time)
+
+
+def _create_client(
+    api_key="API_KEY", account_id=1, response_cache=None, dashboard_id_cache=None
+):
+    return new_relic_api.NewRelicApiClient(
+        api_key,
+        account_id,
+        response_cache=response_cache,
+        id_cache=dashboard_id_cache,
+    )
 
 
 def _create_dashboard():
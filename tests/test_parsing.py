@@ -1,5 +1,6 @@
 """Test parsing YAML dashboard configurations."""
 import os
+import types
 
 import pytest
 import yaml
@@ -89,6 +90,47 @@ def test_parse_unresolvable_extending_condition():
     _assert_invalid_condition_configuration("unresolvable_extending_condition.yml")
 
 
+def test_parse_diamond_conditions():
+    config = _create_diamond_conditions(2)
+
+    actual = parsing.parse_conditions(config)
+
+    level_one = "((a = 0) AND (b = 1)) OR ((a = 0) AND (c = 1))"
+    assert level_one == actual["level-1"].nrql
+    assert (
+        f"(({level_one}) AND (b = 2)) OR (({level_one}) AND (c = 2))"
+        == actual["level-2"].nrql
+    )
+
+
+def test_parse_deep_diamond_conditions_exceeding_length_limit():
+    # Rendering level-40 would produce hundreds of gigabytes of NRQL
+    config = _create_diamond_conditions(40)
+
+    with pytest.raises(models.ConditionLimitExceededException, match="level-"):
+        parsing.parse_conditions(config)
+
+
+def test_parse_conditions_rendered_length_matches_limit():
+    config = _create_diamond_conditions(5)
+    length = len(parsing.parse_conditions(config)["level-5"].nrql)
+
+    parsing.parse_conditions(config, models.ParseLimits(max_condition_length=length))
+    with pytest.raises(models.ConditionLimitExceededException, match="level-5"):
+        parsing.parse_conditions(
+            config, models.ParseLimits(max_condition_length=length - 1)
+        )
+
+
+def test_parse_conditions_exceeding_depth_limit():
+    config = _create_diamond_conditions(5)
+
+    # Each level of the diamond adds two levels of extending conditions
+    parsing.parse_conditions(config, models.ParseLimits(max_condition_depth=10))
+    with pytest.raises(models.ConditionLimitExceededException, match="level-5"):
+        parsing.parse_conditions(config, models.ParseLimits(max_condition_depth=9))
+
+
 def test_parse_output_selections():
     expected = {
         "latest-timestamp-raw-nrql": models.QueryOutputSelection(
@@ -252,6 +294,14 @@ def test_parse_dashboards():
     assert expected == actual
 
 
+def test_parse_dashboards_from_read_only_mapping():
+    config = types.MappingProxyType(_load_test_file("dashboards.yml"))
+
+    actual = parsing.parse_dashboards(config)
+
+    assert _parse_dashboards("dashboards.yml") == actual
+
+
 def test_parse_dashboard_with_inline_queries():
     expected = {
         "sample-dashboard": models.Dashboard(
@@ -276,6 +326,110 @@ def test_parse_dashboard_with_inline_queries():
     assert expected == actual
 
 
+def test_iter_dashboards_is_lazy():
+    config = _load_test_file("dashboards.yml")
+    config["dashboards"]["invalid-dashboard"] = {
+        "title": "Invalid Dashboard",
+        "widgets": [
+            {"query": "missing-query", "row": 1, "column": 1, "width": 1, "height": 1}
+        ],
+    }
+
+    dashboards = parsing.iter_dashboards(config)
+
+    assert "my-dashboard" == next(dashboards).name
+    with pytest.raises(models.InvalidWidgetConfigurationException):
+        next(dashboards)
+
+
+def test_parse_dashboard_templates():
+    expected = {
+        "overview": models.Dashboard(
+            name="overview",
+            title="Overview",
+            widgets=[
+                models.Widget(
+                    title="All Transactions",
+                    query="SELECT COUNT(*) FROM Transaction",
+                    visualization=models.WidgetVisualization.BILLBOARD,
+                    row=1,
+                    column=1,
+                    width=1,
+                    height=1,
+                )
+            ],
+        ),
+        "service-checkout-us": models.Dashboard(
+            name="service-checkout-us",
+            title="checkout (us)",
+            widgets=[
+                models.Widget(
+                    title="checkout Throughput",
+                    query="SELECT COUNT(*) FROM Transaction WHERE (appName = 'checkout') AND (region = 'us') TIMESERIES",
+                    visualization=models.WidgetVisualization.LINE_CHART,
+                    row=1,
+                    column=1,
+                    width=3,
+                    height=1,
+                )
+            ],
+        ),
+        "service-search-us": models.Dashboard(
+            name="service-search-us",
+            title="search (us)",
+            widgets=[
+                models.Widget(
+                    title="search Throughput",
+                    query="SELECT COUNT(*) FROM Transaction WHERE (appName = 'search') AND (region = 'us') TIMESERIES",
+                    visualization=models.WidgetVisualization.LINE_CHART,
+                    row=1,
+                    column=1,
+                    width=3,
+                    height=1,
+                )
+            ],
+        ),
+    }
+
+    actual = _parse_dashboards("dashboard_templates.yml")
+
+    assert expected == actual
+
+
+def test_parse_dashboard_template_unknown_parameter():
+    _assert_invalid_template_configuration("dashboard_template_unknown_parameter.yml")
+
+
+def test_parse_dashboard_template_duplicate_name():
+    _assert_invalid_template_configuration("dashboard_template_duplicate_name.yml")
+
+
+def test_parse_dashboard_template_duplicate_title():
+    with pytest.raises(
+        models.InvalidTemplateConfigurationException,
+        match="creates dashboards service-checkout-us and service-checkout-eu with the "
+        "same title 'checkout Overview'",
+    ):
+        _parse_dashboards("dashboard_template_duplicate_title.yml")
+
+
+def test_parse_dashboard_template_missing_matrix():
+    _assert_invalid_template_configuration("dashboard_template_missing_matrix.yml")
+
+
+def test_parse_dashboard_priorities():
+    actual = _parse_dashboards("dashboard_priorities.yml")
+
+    assert {"on-call": 10, "capacity": 0, "service-checkout": 5} == {
+        name: dashboard.priority for name, dashboard in actual.items()
+    }
+
+
+def test_parse_invalid_dashboard_priority():
+    with pytest.raises(models.InvalidDashboardConfigurationException):
+        _parse_dashboards("invalid_dashboard_priority.yml")
+
+
 def test_parse_missing_widget_column():
     _assert_invalid_widget_configuration("missing_widget_column.yml")
 
@@ -296,15 +450,163 @@ def test_parse_missing_widget_width():
     _assert_invalid_widget_configuration("missing_widget_width.yml")
 
 
+def test_parse_invalid_widget_width_type():
+    with pytest.raises(
+        models.InvalidWidgetConfigurationException,
+        match=r"dashboards\.my-dashboard\.widgets\[0\]\.width: expected an integer from 1 to 3, got '2'",
+    ):
+        _parse_dashboards("invalid_widget_width_type.yml")
+
+
 def test_parse_invalid_widget_query_reference():
     _assert_invalid_widget_configuration("invalid_widget_query_reference.yml")
 
 
+def test_parse_overlapping_widgets():
+    _assert_invalid_widget_configuration("overlapping_widgets.yml")
+
+
+def test_parse_auto_placed_widgets():
+    dashboards = _parse_dashboards("auto_placed_widgets.yml")
+
+    assert [(2, 1), (1, 2), (1, 3)] == [
+        (widget.row, widget.column) for widget in dashboards["my-dashboard"].widgets
+    ]
+
+
+def test_parse_accounts_file():
+    expected = [
+        models.Account(account_id=1, api_key="KEY_ONE"),
+        models.Account(account_id=2, api_key="KEY_TWO"),
+    ]
+
+    actual = parsing.parse_accounts_file(_get_test_file_path("accounts.yml"))
+
+    assert expected == actual
+
+
+def test_parse_accounts_file_missing_api_key():
+    with pytest.raises(models.InvalidAccountConfigurationException):
+        parsing.parse_accounts_file(_get_test_file_path("missing_account_api_key.yml"))
+
+
 def test_parse_file():
     actual = parsing.parse_file(_get_test_file_path("dashboards.yml"))
     assert actual
 
 
+def test_parse_file_selected_dashboards():
+    actual = parsing.parse_file(
+        _get_test_file_path("dashboard_templates.yml"),
+        dashboard_names=["overview", "service-search-us"],
+    )
+
+    assert ["overview", "service-search-us"] == list(actual)
+
+
+def test_parse_file_skips_dashboards_not_selected():
+    # The configuration of the dashboard that is not selected is invalid
+    actual = parsing.parse_file(
+        _get_test_file_path("selected_dashboards.yml"),
+        dashboard_names=["valid-dashboard"],
+    )
+
+    assert 1 == actual["valid-dashboard"].widgets[0].row
+    with pytest.raises(models.InvalidWidgetConfigurationException):
+        parsing.parse_file(_get_test_file_path("selected_dashboards.yml"))
+
+
+@pytest.mark.parametrize(
+    "file_name, location, limit",
+    [
+        ("billion_laughs.yml", "line 8, column 35", "10000000 nodes"),
+        ("deeply_nested.yml", "line 4, column 75", "64 levels of nesting"),
+        ("deeply_nested_alias.yml", "line 6, column 54", "64 levels of nesting"),
+    ],
+)
+def test_parse_file_exceeding_yaml_limit(file_name, location, limit):
+    with pytest.raises(models.ConfigurationLimitExceededException) as error:
+        parsing.parse_file(_get_test_file_path(file_name))
+
+    assert f"{file_name}, {location}: " in str(error.value)
+    assert f"limit of {limit}" in str(error.value)
+
+
+def test_parse_file_exceeding_alias_limit():
+    file_path = _get_test_file_path("selected_dashboards.yml")
+    dashboard_names = ["valid-dashboard"]
+    parsing.parse_file(file_path, models.ParseLimits(max_aliases=1), dashboard_names)
+
+    with pytest.raises(models.ConfigurationLimitExceededException, match="line 15"):
+        parsing.parse_file(
+            file_path, models.ParseLimits(max_aliases=0), dashboard_names
+        )
+
+
+def test_parse_file_exceeding_nrql_length_limit():
+    file_path = _get_test_file_path("dashboard_templates.yml")
+    dashboards = parsing.parse_file(file_path)
+    nrql_length = sum(
+        len(widget.query)
+        for dashboard in dashboards.values()
+        for widget in dashboard.widgets
+    )
+    parsing.parse_file(file_path, models.ParseLimits(max_nrql_length=nrql_length))
+
+    with pytest.raises(
+        models.ConfigurationLimitExceededException, match="dashboard service-search-us"
+    ):
+        parsing.parse_file(
+            file_path, models.ParseLimits(max_nrql_length=nrql_length - 1)
+        )
+
+
+def test_parse_files():
+    actual = parsing.parse_files(
+        [
+            _get_test_file_path("dashboards.yml"),
+            _get_test_file_path("dashboard_with_inline_queries.yml"),
+        ]
+    )
+
+    assert ["my-dashboard", "sample-dashboard"] == list(actual)
+
+
+def test_parse_files_with_duplicate_dashboard():
+    file_path = _get_test_file_path("dashboards.yml")
+
+    with pytest.raises(models.DuplicateDashboardException, match="defined in both"):
+        parsing.parse_files([file_path, file_path])
+
+
+def test_parse_string():
+    with open(_get_test_file_path("dashboards.yml")) as config_file:
+        config_text = config_file.read()
+
+    actual = parsing.parse_string(config_text)
+
+    assert parsing.parse_file(_get_test_file_path("dashboards.yml")) == actual
+
+
+def test_parse_string_empty():
+    assert {} == parsing.parse_string("")
+
+
+def _create_diamond_conditions(levels):
+    conditions = {"level-0": "a = 0"}
+    for level in range(1, levels + 1):
+        extended = {"condition": f"level-{level - 1}"}
+        conditions[f"level-{level}-left"] = {"and": [extended, f"b = {level}"]}
+        conditions[f"level-{level}-right"] = {"and": [extended, f"c = {level}"]}
+        conditions[f"level-{level}"] = {
+            "or": [
+                {"condition": f"level-{level}-left"},
+                {"condition": f"level-{level}-right"},
+            ]
+        }
+    return {"conditions": conditions}
+
+
 def _assert_invalid_condition_configuration(file_name):
     with pytest.raises(models.InvalidExtendingConditionException):
         _parse_conditions(file_name)
@@ -320,6 +622,11 @@ def _assert_invalid_query_configuration(file_name):
         _parse_queries(file_name)
 
 
+def _assert_invalid_template_configuration(file_name):
+    with pytest.raises(models.InvalidTemplateConfigurationException):
+        _parse_dashboards(file_name)
+
+
 def _assert_invalid_widget_configuration(file_name):
     with pytest.raises(models.InvalidWidgetConfigurationException):
         _parse_dashboards(file_name)
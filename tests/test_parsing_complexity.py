@@ -0,0 +1,208 @@
+"""Test that parsing time grows linearly with the size of the configuration.
+
+Each parsing stage is timed on generated configurations of 1k, 10k, and 100k entities and
+a power law is fitted to the timings. A stage fails if its time grows noticeably faster
+than the number of entities, which catches accidentally quadratic code paths long before
+they show up as slow builds of large configurations.
+"""
+
+import gc
+import math
+import time
+
+import pytest
+
+from nrdash import layout, models, parsing
+
+SIZES = (1_000, 10_000, 100_000)
+
+# Linear growth has an exponent of 1 and quadratic growth of 2, allow for timing noise and
+# for cache effects at scale
+MAX_GROWTH_EXPONENT = 1.3
+
+# Length of each chain of conditions extending one another, well within the depth limit
+CHAIN_LENGTH = 20
+
+REPEATS = 3
+
+# Timing large configurations takes a while, deselect with -m "not slow"
+pytestmark = pytest.mark.slow
+
+
+def test_parse_conditions_is_linear():
+    def parse(config):
+        conditions = parsing.parse_conditions(config)
+        # Conditions are rendered lazily, so render every one of them
+        for name in conditions:
+            conditions[name]  # pylint: disable=pointless-statement
+
+    _assert_linear(parse, _create_conditions)
+
+
+def test_parse_output_selections_is_linear():
+    conditions = parsing.parse_conditions(_create_conditions(100))
+
+    _assert_linear(
+        lambda config: parsing.parse_output_selections(config, conditions),
+        _create_output_selections,
+    )
+
+
+def test_parse_queries_is_linear():
+    _assert_linear(parsing.parse_queries, _create_queries)
+
+
+def test_parse_dashboards_is_linear():
+    _assert_linear(parsing.parse_dashboards, _create_dashboards)
+
+
+def test_arrange_widgets_is_linear():
+    def create_widgets(size):
+        return [
+            models.Widget(
+                title=f"Widget {index}",
+                query="SELECT count(*) FROM Transaction",
+                visualization=models.WidgetVisualization.BILLBOARD,
+                row=layout.AUTO if index % 2 else index // 2 + 1,
+                column=None if index % 2 else index % 3 + 1,
+                width=1,
+                height=index % 3 + 1 if index % 2 else 1,
+            )
+            for index in range(size)
+        ]
+
+    _assert_linear(
+        lambda widgets: layout.arrange_widgets(widgets, "dashboard"), create_widgets
+    )
+
+
+def _assert_linear(parse, create_config):
+    timings = []
+    for size in SIZES:
+        config = create_config(size)
+        timings.append(_time(parse, config))
+
+    exponent = _fit_growth_exponent(SIZES, timings)
+    assert (
+        exponent <= MAX_GROWTH_EXPONENT
+    ), f"Parsing time grows as n^{exponent:.2f}, timings were " + ", ".join(
+        f"{size}: {timing:.4f}s" for size, timing in zip(SIZES, timings)
+    )
+
+
+def _create_conditions(size):
+    # Chains of extending conditions listed in reverse, so that every condition is listed
+    # before the condition it extends, the worst case for resolving extending conditions
+    conditions = {}
+    chain_count = max(1, size // CHAIN_LENGTH)
+    for chain in range(chain_count):
+        for link in reversed(range(1, CHAIN_LENGTH)):
+            operator = "and" if link % 2 else "or"
+            conditions[f"chain-{chain}-{link}"] = {
+                operator: [
+                    {"condition": f"chain-{chain}-{link - 1}"},
+                    f"attribute{link} = {chain}",
+                ]
+            }
+        conditions[f"chain-{chain}-0"] = f"appName = 'app-{chain}'"
+
+    return {"conditions": conditions}
+
+
+def _create_dashboards(size):
+    config = _create_queries(max(1, size // 10))
+    query_names = list(config["queries"])
+    config["dashboards"] = {
+        f"dashboard-{index}": {
+            "title": f"Dashboard {index}",
+            "widgets": [
+                {
+                    "query": query_names[index % len(query_names)],
+                    "row": 1,
+                    "column": 1,
+                    "width": 1,
+                    "height": 1,
+                }
+            ],
+        }
+        for index in range(size)
+    }
+    return config
+
+
+def _create_output_selections(size):
+    output_selections = {}
+    for index in range(size):
+        if index % 3 == 0:
+            output_selections[f"output-{index}"] = f"COUNT(*) AS `Count {index}`"
+        elif index % 3 == 1:
+            output_selections[f"output-{index}"] = {
+                "filter": {
+                    "function": "LATEST(timestamp)",
+                    "condition": f"chain-{index % 5}-{CHAIN_LENGTH - 1}",
+                }
+            }
+        else:
+            output_selections[f"output-{index}"] = [
+                {
+                    "percentage": {
+                        "function": "COUNT(*)",
+                        "condition": f"status = {index}",
+                        "label": f"Rate {index}",
+                    }
+                },
+                "LATEST(timestamp)",
+            ]
+
+    return {"output-selections": output_selections}
+
+
+def _create_queries(size):
+    shared = max(1, size // 10)
+    config = _create_conditions(shared)
+    config.update(_create_output_selections(shared))
+    config["displays"] = {
+        f"display-{index}": {"visualization": "line_chart", "nrql": "TIMESERIES"}
+        for index in range(shared)
+    }
+    condition_names = list(config["conditions"])
+    output_names = list(config["output-selections"])
+    config["queries"] = {
+        f"query-{index}": {
+            "title": f"Query {index}",
+            "event": "Transaction",
+            "condition": condition_names[index % len(condition_names)],
+            "output": output_names[index % len(output_names)],
+            "display": f"display-{index % shared}",
+        }
+        for index in range(size)
+    }
+    return config
+
+
+def _fit_growth_exponent(sizes, timings):
+    # Least squares fit of log(time) = exponent * log(size) + constant
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(timing) for timing in timings]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return covariance / variance
+
+
+def _time(parse, config):
+    # Like timeit, disable garbage collection whose full collections scan every live
+    # object and so would make any allocation-heavy stage look superlinear
+    best = math.inf
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(REPEATS):
+            start_time = time.perf_counter()
+            parse(config)
+            best = min(best, time.perf_counter() - start_time)
+    finally:
+        gc.enable()
+
+    return best
@@ -0,0 +1,88 @@
+"""Tests for pruning dashboards no longer defined in configuration."""
+import json
+import re
+
+import responses
+
+from nrdash import new_relic_api, pruning
+
+_DASHBOARD_URL_PATTERN = re.compile(f"{new_relic_api.BASE_URL}dashboards/.*")
+
+
+@responses.activate
+def test_find_orphaned_dashboards_only_considers_managed_dashboards():
+    _set_list_dashboards_response()
+
+    actual = pruning.find_orphaned_dashboards(_create_client(1), {"Configured"})
+
+    assert [3] == [dashboard["id"] for dashboard in actual]
+
+
+@responses.activate
+def test_prune_dashboards_dry_run_deletes_nothing():
+    _set_list_dashboards_response()
+
+    results = pruning.prune_dashboards([_create_client(1)], {"Configured"})
+
+    assert [
+        pruning.PruneResult(
+            account_id=1, dashboard_id=3, title="Removed", deleted=False
+        )
+    ] == results
+    assert all(call.request.method == "GET" for call in responses.calls)
+
+
+@responses.activate
+def test_prune_dashboards_deletes_orphaned_dashboards():
+    _set_list_dashboards_response()
+    responses.add(responses.DELETE, _DASHBOARD_URL_PATTERN, status=200)
+
+    received_results = []
+    results = pruning.prune_dashboards(
+        [_create_client(1), _create_client(2)],
+        {"Configured"},
+        dry_run=False,
+        on_result=received_results.append,
+    )
+
+    assert [(1, True), (2, True)] == sorted(
+        (result.account_id, result.deleted) for result in results
+    )
+    assert set(results) == set(received_results)
+    deleted_urls = [
+        call.request.url for call in responses.calls if call.request.method == "DELETE"
+    ]
+    assert [f"{new_relic_api.BASE_URL}dashboards/3.json"] * 2 == deleted_urls
+
+
+@responses.activate
+def test_prune_dashboards_reports_failures():
+    _set_list_dashboards_response()
+    responses.add(responses.DELETE, _DASHBOARD_URL_PATTERN, status=500)
+
+    results = pruning.prune_dashboards(
+        [_create_client(1)], {"Configured"}, dry_run=False
+    )
+
+    assert not results[0].deleted
+    assert results[0].error
+
+
+def _create_client(account_id):
+    return new_relic_api.NewRelicApiClient("API_KEY", account_id)
+
+
+def _set_list_dashboards_response():
+    dashboards = [
+        {"id": 1, "title": "Configured", "metadata": {"managed_by": "nrdash"}},
+        {"id": 2, "title": "Created By Hand", "metadata": {"version": 1}},
+        {"id": 3, "title": "Removed", "metadata": {"managed_by": "nrdash"}},
+    ]
+
+    def callback(request):
+        page_dashboards = dashboards if request.params["page"] == "1" else []
+        return 200, {}, json.dumps({"dashboards": page_dashboards})
+
+    responses.add_callback(
+        responses.GET, new_relic_api.DASHBOARDS_URL, callback=callback
+    )
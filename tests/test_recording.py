@@ -0,0 +1,106 @@
+"""Tests for recording API requests to trace files."""
+import json
+
+import responses
+
+from nrdash import models, new_relic_api, recording
+from nrdash.transport import Transport
+
+
+@responses.activate
+def test_client_records_requests(tmp_path):
+    trace_path = str(tmp_path / "trace.jsonl")
+    responses.add(
+        responses.GET,
+        new_relic_api.DASHBOARDS_URL,
+        json={"dashboards": []},
+        headers={"Retry-After": "1"},
+        status=429,
+    )
+    responses.add(
+        responses.POST, new_relic_api.DASHBOARDS_URL, json={"dashboard": {"id": 7}}
+    )
+
+    with recording.TraceRecorder(trace_path) as recorder:
+        client = new_relic_api.NewRelicApiClient("SECRET_KEY", 1, recorder=recorder)
+        try:
+            client.get_dashboard_id_by_title("My Dashboard")
+        except models.NewRelicApiException:
+            pass
+        client.create_dashboard(_create_dashboard())
+
+    lookup, creation = recording.read_trace(trace_path)
+
+    assert ("GET", 429, "1") == (lookup.method, lookup.status_code, lookup.retry_after)
+    assert "filter%5Btitle%5D=My+Dashboard" in lookup.url
+    assert 0 == lookup.request_bytes
+    assert ("POST", 200, 1) == (
+        creation.method,
+        creation.status_code,
+        creation.account_id,
+    )
+    assert creation.request_bytes > 0
+    assert len(json.dumps({"dashboard": {"id": 7}})) == creation.response_bytes
+    assert 0 <= lookup.offset <= creation.offset
+    assert "SECRET_KEY" not in open(trace_path).read()
+
+
+def test_client_records_failed_requests(tmp_path):
+    trace_path = str(tmp_path / "trace.jsonl")
+
+    with recording.TraceRecorder(trace_path) as recorder:
+        client = new_relic_api.NewRelicApiClient(
+            "SECRET_KEY", 1, transport=_TimingOutTransport(), recorder=recorder
+        )
+        try:
+            client.get_dashboard_id_by_title("My Dashboard")
+        except models.NewRelicApiException:
+            pass
+
+    (entry,) = recording.read_trace(trace_path)
+
+    assert recording.RecordedError.TIMEOUT is entry.error
+    assert entry.status_code is None
+
+
+def test_secrets_are_redacted(tmp_path):
+    trace_path = str(tmp_path / "trace.jsonl")
+
+    with recording.TraceRecorder(trace_path) as recorder:
+        entry = recorder.record(
+            0.0,
+            1,
+            "GET",
+            "https://example.com/?key=SECRET_KEY",
+            {"X-Api-Key": "OTHER_KEY", "X-Custom": "Bearer SECRET_KEY"},
+            secrets=["SECRET_KEY"],
+        )
+
+    assert "https://example.com/?key=REDACTED" == entry.url
+    assert {"X-Api-Key": "REDACTED", "X-Custom": "Bearer REDACTED"} == (
+        entry.request_headers
+    )
+    assert [entry] == recording.read_trace(trace_path)
+
+
+class _TimingOutTransport(Transport):
+    def request(self, method, url, headers, timeout, params=None, data=None):
+        raise models.TransportTimeoutException("Read timed out")
+
+
+def _create_dashboard():
+    return models.Dashboard(
+        name="my-dashboard",
+        title="My Dashboard",
+        widgets=[
+            models.Widget(
+                title="My Widget",
+                query="SELECT COUNT(*) FROM Transactions",
+                visualization=models.WidgetVisualization.BILLBOARD,
+                row=1,
+                column=1,
+                width=1,
+                height=1,
+            )
+        ],
+    )
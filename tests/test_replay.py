@@ -0,0 +1,92 @@
+"""Tests for replaying recorded API traffic from a local stub."""
+import contextlib
+import time
+
+import pytest
+
+from nrdash import models, new_relic_api, recording, replay
+
+
+def test_stub_replays_status_and_latency():
+    entries = [
+        _create_entry("GET", duration=0.05, status_code=429, retry_after="2"),
+        _create_entry("GET", duration=0.0, status_code=200),
+    ]
+
+    with replay.TraceStub(entries) as stub:
+        with contextlib.closing(stub.create_transport()) as transport:
+            started_at = time.perf_counter()
+            throttled = _lookup(transport)
+            elapsed = time.perf_counter() - started_at
+            found = _lookup(transport)
+
+    assert (429, "2") == (throttled.status_code, throttled.headers["Retry-After"])
+    assert elapsed >= 0.05
+    assert (200, {"dashboards": []}) == (found.status_code, found.json())
+
+
+def test_stub_pads_responses_to_recorded_size():
+    entries = [_create_entry("POST", response_bytes=1000)]
+
+    with replay.TraceStub(entries) as stub:
+        with contextlib.closing(stub.create_transport()) as transport:
+            response = transport.request(
+                "POST", new_relic_api.DASHBOARDS_URL, {}, (1.0, 1.0), data=b"{}"
+            )
+
+    assert 1000 == len(response.content)
+    assert {"dashboard": {"id": 1}} == response.json()
+
+
+def test_stub_replays_failed_requests():
+    entries = [_create_entry("GET", error=recording.RecordedError.TRANSPORT)]
+
+    with replay.TraceStub(entries) as stub:
+        with contextlib.closing(stub.create_transport()) as transport:
+            with pytest.raises(models.TransportException):
+                _lookup(transport)
+
+
+def test_lookups_find_dashboards_updated_in_trace():
+    entries = [
+        _create_entry("GET"),
+        _create_entry("PUT"),
+    ]
+
+    with replay.TraceStub(entries) as stub:
+        with contextlib.closing(stub.create_transport()) as transport:
+            client = new_relic_api.NewRelicApiClient("API_KEY", 1, transport=transport)
+            dashboard_id = client.get_dashboard_id_by_title("My Dashboard")
+
+    # Every recorded dashboard was updated, so every lookup finds its dashboard
+    assert dashboard_id is not None
+
+
+def test_empty_trace():
+    with pytest.raises(ValueError):
+        replay.TraceStub([])
+
+
+def _create_entry(method, duration=0.0, status_code=200, **kwargs):
+    if kwargs.get("error"):
+        status_code = None
+
+    return recording.TraceEntry(
+        offset=0.0,
+        duration=duration,
+        account_id=1,
+        method=method,
+        url=new_relic_api.DASHBOARDS_URL,
+        status_code=status_code,
+        **kwargs,
+    )
+
+
+def _lookup(transport):
+    return transport.request(
+        "GET",
+        new_relic_api.DASHBOARDS_URL,
+        {},
+        (1.0, 1.0),
+        params={"filter[title]": "My Dashboard"},
+    )
@@ -0,0 +1,234 @@
+"""Test validating configuration against the compiled schema."""
+import collections
+import types
+
+import pytest
+
+from nrdash import models, schema
+
+
+def test_valid_config():
+    validate = schema.compile_config_validator()
+
+    validate(
+        {
+            "conditions": {
+                "base": "appName = 'MyApp'",
+                "extended": {"and": [{"condition": "base"}, "host = 'prod'"]},
+            },
+            "output-selections": {
+                "count": "count(*)",
+                "errors": [
+                    "count(*)",
+                    {"filter": {"function": "count(*)", "condition": "base"}},
+                ],
+            },
+            "displays": {"number": {"visualization": "billboard"}},
+            "queries": {
+                "componentized": {
+                    "title": "Count",
+                    "event": "Transaction",
+                    "output": "count",
+                    "display": "number",
+                },
+                "inline": {
+                    "title": "Count",
+                    "nrql": "SELECT count(*) FROM Transaction",
+                    "visualization": "billboard",
+                },
+            },
+            "dashboards": {
+                "my-dashboard": {
+                    "title": "My Dashboard",
+                    "widgets": [_create_widget(), _create_widget(row="auto")],
+                    "priority": 5,
+                }
+            },
+            "dashboard-templates": {
+                "my-template": {
+                    "title": "${app}",
+                    "matrix": {"app": ["checkout", 1]},
+                    "widgets": [_create_widget()],
+                }
+            },
+        }
+    )
+
+
+def test_empty_sections_are_valid():
+    validate = schema.compile_config_validator()
+
+    validate({})
+    validate({"conditions": None, "dashboards": None, "unknown": 1})
+
+
+@pytest.mark.parametrize(
+    "widget, exception, message",
+    [
+        (
+            dict(width="2"),
+            models.InvalidWidgetConfigurationException,
+            "dashboards.my-dashboard.widgets[0].width: expected an integer from 1 to 3, got '2'",
+        ),
+        (
+            dict(width=4),
+            models.InvalidWidgetConfigurationException,
+            "widgets[0].width: expected an integer from 1 to 3, got 4",
+        ),
+        (
+            dict(row="top"),
+            models.InvalidWidgetConfigurationException,
+            "widgets[0].row: expected one of auto, got 'top'",
+        ),
+        (
+            dict(height=True),
+            models.InvalidWidgetConfigurationException,
+            "widgets[0].height: expected an integer of at least 1, got True",
+        ),
+        (
+            dict(column=None),
+            models.InvalidWidgetConfigurationException,
+            "widgets[0]: field column is required",
+        ),
+        (
+            dict(query=["my-query"]),
+            models.InvalidWidgetConfigurationException,
+            "widgets[0].query: expected a string or a mapping, got a list",
+        ),
+        (
+            dict(query={"title": "Count"}),
+            models.InvalidQueryConfigurationException,
+            "widgets[0].query: field nrql is required",
+        ),
+    ],
+)
+def test_invalid_widget(widget, exception, message):
+    validate = schema.compile_config_validator()
+    config = {"dashboards": {"my-dashboard": _create_dashboard(**widget)}}
+
+    with pytest.raises(exception) as error:
+        validate(config)
+
+    assert message in str(error.value)
+
+
+@pytest.mark.parametrize(
+    "config, exception, message",
+    [
+        (
+            {"dashboards": {"my-dashboard": {"title": "My Dashboard"}}},
+            models.InvalidDashboardConfigurationException,
+            "dashboards.my-dashboard: field widgets is required",
+        ),
+        (
+            {"displays": {"number": {"visualization": "pie"}}},
+            models.InvalidWidgetVisualizationException,
+            "displays.number.visualization: expected one of ",
+        ),
+        (
+            {"queries": {"my-query": {"event": "Transaction"}}},
+            models.InvalidQueryConfigurationException,
+            "queries.my-query: field title is required",
+        ),
+        (
+            {"conditions": {"extended": {"xor": ["a = 1"]}}},
+            models.InvalidExtendingConditionException,
+            "conditions.extended: expected one of the fields and, or",
+        ),
+        (
+            {"conditions": {"extended": {"or": ["a = 1", 2]}}},
+            models.InvalidExtendingConditionException,
+            "conditions.extended.or[1]: expected a string or a mapping, got 2",
+        ),
+        (
+            {"output-selections": {"errors": [{"sum": {}}]}},
+            models.InvalidOutputConfigurationException,
+            "output-selections.errors[0]: expected one of the fields filter, percentage",
+        ),
+        (
+            {
+                "dashboard-templates": {
+                    "my-template": {"title": "My Template", "matrix": {}, "widgets": []}
+                }
+            },
+            models.InvalidTemplateConfigurationException,
+            "dashboard-templates.my-template.matrix: expected at least 1 entries, got 0",
+        ),
+        (
+            {"dashboards": []},
+            models.NrDashException,
+            "dashboards: expected a mapping, got a list",
+        ),
+    ],
+)
+def test_invalid_config(config, exception, message):
+    validate = schema.compile_config_validator()
+
+    with pytest.raises(exception) as error:
+        validate(config)
+
+    assert message in str(error.value)
+
+
+def test_validate_selected_sections():
+    validate = schema.compile_config_validator(["queries"])
+
+    validate({"dashboards": {"my-dashboard": None}})
+
+
+def test_validate_mapping_subclasses():
+    validate = schema.compile_config_validator()
+    widget = collections.OrderedDict(_create_widget(width=4))
+
+    with pytest.raises(models.InvalidWidgetConfigurationException, match="width"):
+        validate({"dashboards": {"my-dashboard": _create_dashboard(widget=widget)}})
+
+
+def test_validate_mappings_that_are_not_dicts():
+    validate = schema.compile_config_validator()
+    dashboard = _create_dashboard(widget=types.MappingProxyType(_create_widget()))
+
+    validate(types.MappingProxyType({"dashboards": {"my-dashboard": dashboard}}))
+
+
+def test_validate_accounts_names_location():
+    validate = schema.compile_schema(schema.ACCOUNTS)
+    validate({"accounts": [{"account-id": "1", "api-key": "KEY"}]}, "accounts.yml")
+
+    with pytest.raises(
+        models.InvalidAccountConfigurationException,
+        match=r"accounts\.yml, accounts\[0\]\.account-id: expected an integer or a string, got 1.5",
+    ):
+        validate({"accounts": [{"account-id": 1.5, "api-key": "KEY"}]}, "accounts.yml")
+
+
+def test_union_field_checks_the_first_alternative_of_a_type():
+    validate = schema.compile_schema(
+        schema.Record(
+            {"name": schema.Field(schema.Union([schema.Enum(["a"]), schema.String()]))}
+        )
+    )
+    validate({"name": "a"})
+
+    with pytest.raises(
+        models.NrDashException, match="name: expected one of a, got 'b'"
+    ):
+        validate({"name": "b"})
+
+
+def test_nested_unions_are_not_supported():
+    with pytest.raises(KeyError):
+        schema.compile_schema(schema.Union([schema.Union([schema.String()])]))
+
+
+def _create_dashboard(widget=None, **widget_fields):
+    return {
+        "title": "My Dashboard",
+        "widgets": [widget or _create_widget(**widget_fields)],
+    }
+
+
+def _create_widget(**fields):
+    widget = dict(query="my-query", row=1, column=1, width=1, height=1)
+    widget.update(fields)
+    return {name: value for name, value in widget.items() if value is not None}
@@ -0,0 +1,101 @@
+"""Tests for splitting dashboards between independent builds."""
+import json
+
+import pytest
+
+from nrdash import deployment, models, sharding
+
+
+def test_shard_index_is_stable():
+    # Changing how dashboards are assigned to shards would move dashboards between CI jobs
+    assert [4, 1, 3, 3] == [
+        sharding.get_shard_index(name, 4)
+        for name in ("my-dashboard", "overview", "service-checkout-us", "dashboard-0")
+    ]
+
+
+def test_every_dashboard_belongs_to_exactly_one_shard():
+    names = [f"dashboard-{index}" for index in range(1000)]
+    shards = [sharding.Shard(index, 4) for index in range(1, 5)]
+
+    shard_sizes = [sum(name in shard for name in names) for shard in shards]
+
+    assert 1000 == sum(shard_sizes)
+    assert all(200 < size < 300 for size in shard_sizes)
+
+
+@pytest.mark.parametrize("index, count", [(0, 2), (3, 2)])
+def test_invalid_shard(index, count):
+    with pytest.raises(ValueError):
+        sharding.Shard(index, count)
+
+
+def test_merge_results(tmp_path):
+    paths = [str(tmp_path / f"shard-{index}.json") for index in (1, 2)]
+    sharding.write_results(
+        paths[0],
+        sharding.Shard(1, 2),
+        deployment.DeploymentReport(
+            results=[_create_result("first", deployment.DeploymentAction.CREATED)]
+        ),
+    )
+    sharding.write_results(
+        paths[1],
+        sharding.Shard(2, 2),
+        deployment.DeploymentReport(
+            results=[
+                _create_result(
+                    "second", deployment.DeploymentAction.FAILED, error="Timed out"
+                )
+            ]
+        ),
+    )
+
+    report = sharding.merge_results(reversed(paths))
+
+    assert [
+        _create_result("second", deployment.DeploymentAction.FAILED, error="Timed out"),
+        _create_result("first", deployment.DeploymentAction.CREATED),
+    ] == report.results
+
+
+@pytest.mark.parametrize(
+    "shards, message",
+    [
+        ([(1, 3), (3, 3)], "Missing results of shards 2 of 3"),
+        ([(1, 2), (1, 2)], "both hold results of shard 1/2"),
+        ([(1, 2), (2, 3)], "other files are of 2 shards"),
+        ([], "No shard results"),
+    ],
+)
+def test_merge_incomplete_results(tmp_path, shards, message):
+    paths = []
+    for file_index, (index, count) in enumerate(shards):
+        path = str(tmp_path / f"shard-{file_index}.json")
+        sharding.write_results(
+            path, sharding.Shard(index, count), deployment.DeploymentReport(results=[])
+        )
+        paths.append(path)
+
+    with pytest.raises(models.InvalidShardResultsException, match=message):
+        sharding.merge_results(paths)
+
+
+def test_merge_invalid_results_file(tmp_path):
+    path = tmp_path / "shard.json"
+    path.write_text(json.dumps({"results": []}))
+
+    with pytest.raises(
+        models.InvalidShardResultsException, match="not a shard results"
+    ):
+        sharding.merge_results([str(path)])
+
+
+def _create_result(dashboard_name, action, error=None):
+    return deployment.DashboardResult(
+        account_id=1,
+        dashboard_name=dashboard_name,
+        action=action,
+        error=error,
+        dashboard_id=None if error else 1,
+    )
@@ -0,0 +1,151 @@
+"""Tests for tracing spans."""
+import json
+import os
+
+import pytest
+import responses
+from click.testing import CliRunner
+
+from nrdash import main, new_relic_api, parsing, tracing
+
+
+class _CollectingExporter(tracing.Exporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture(name="exporter")
+def _exporter():
+    exporter = _CollectingExporter()
+    tracing.configure(exporter)
+    yield exporter
+    tracing.shutdown()
+
+
+def test_span_disabled_by_default():
+    assert not tracing.is_enabled()
+
+    with tracing.span("operation", size=1) as span:
+        span.set_attribute("other", 2)
+
+
+def test_span_nests_within_current_span(exporter):
+    with tracing.span("outer"):
+        with tracing.span("inner", size=3):
+            pass
+
+    inner, outer = exporter.spans
+    assert "inner" == inner.name
+    assert {"size": 3} == inner.attributes
+    assert outer.span_id == inner.parent_span_id
+    assert outer.trace_id == inner.trace_id
+    assert outer.parent_span_id is None
+    assert tracing.SpanStatus.OK == outer.status
+    assert outer.start_time <= inner.start_time <= inner.end_time <= outer.end_time
+
+
+def test_span_marks_exception_as_error(exporter):
+    with pytest.raises(ValueError):
+        with tracing.span("operation"):
+            raise ValueError("failed")
+
+    (span,) = exporter.spans
+    assert tracing.SpanStatus.ERROR == span.status
+    assert "ValueError: failed" == span.status_message
+
+
+def test_parse_file_spans(exporter):
+    parsing.parse_file(_get_test_file_path("dashboards.yml"))
+
+    spans = {span.name: span for span in exporter.spans}
+    assert {
+        "parse_file",
+        "parse_dashboards",
+        "parse_queries",
+        "parse_conditions",
+        "parse_output_selections",
+        "parse_displays",
+        "parse_dashboard",
+        "parse_widget",
+    } <= set(spans)
+    assert spans["parse_file"].span_id == spans["parse_dashboards"].parent_span_id
+    assert 0 < spans["parse_dashboards"].attributes["dashboard_count"]
+
+
+@responses.activate
+def test_request_span(exporter):
+    responses.add(
+        responses.POST,
+        new_relic_api.DASHBOARDS_URL,
+        status=200,
+        json={"dashboard": {"id": 1}},
+    )
+    dashboards = parsing.parse_file(_get_test_file_path("dashboards.yml"))
+
+    new_relic_api.NewRelicApiClient("API_KEY", 1).create_dashboard(
+        dashboards["my-dashboard"]
+    )
+
+    spans = {span.name: span for span in exporter.spans}
+    request_span = spans["HTTP POST"]
+    assert tracing.SpanKind.CLIENT == request_span.kind
+    assert 200 == request_span.attributes["http.status_code"]
+    assert 0 < request_span.attributes["http.request_content_length"]
+    assert 0 < spans["render_dashboard_payload"].attributes["payload_bytes"]
+
+
+def test_otlp_json_exporter_writes_file(tmp_path):
+    trace_path = str(tmp_path / "trace.json")
+    tracing.configure(tracing.OtlpJsonExporter(trace_path))
+    with tracing.span("outer", label="value", count=2, ratio=0.5, enabled=True):
+        with tracing.span("inner"):
+            pass
+    tracing.shutdown()
+
+    with open(trace_path) as trace_file:
+        document = json.load(trace_file)
+    (resource_spans,) = document["resourceSpans"]
+    (scope_spans,) = resource_spans["scopeSpans"]
+    inner, outer = scope_spans["spans"]
+    assert outer["spanId"] == inner["parentSpanId"]
+    assert "parentSpanId" not in outer
+    assert 32 == len(outer["traceId"])
+    assert {"code": 1} == outer["status"]
+    assert [
+        {"key": "label", "value": {"stringValue": "value"}},
+        {"key": "count", "value": {"intValue": "2"}},
+        {"key": "ratio", "value": {"doubleValue": 0.5}},
+        {"key": "enabled", "value": {"boolValue": True}},
+    ] == outer["attributes"]
+    assert not tracing.is_enabled()
+
+
+def test_incomplete_exporter_cannot_be_created():
+    class _IncompleteExporter(tracing.Exporter):
+        pass
+
+    with pytest.raises(TypeError, match="export"):
+        _IncompleteExporter()
+
+
+def test_trace_option_writes_trace(tmp_path):
+    trace_path = str(tmp_path / "trace.json")
+
+    result = CliRunner().invoke(
+        main.main,
+        ["--trace", trace_path, "lint", _get_test_file_path("dashboards.yml")],
+    )
+
+    assert 0 == result.exit_code
+    with open(trace_path) as trace_file:
+        spans = json.load(trace_file)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert "parse_file" in {span["name"] for span in spans}
+    assert not tracing.is_enabled()
+
+
+def _get_test_file_path(file_name):
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(test_dir, "test_data", file_name)
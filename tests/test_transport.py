@@ -0,0 +1,56 @@
+"""Tests for HTTP transports."""
+import sys
+
+import pytest
+import requests
+import responses
+
+from nrdash import models, transport
+
+_URL = "https://api.newrelic.com/v2/dashboards.json"
+
+
+@responses.activate
+def test_requests_transport_sends_request():
+    responses.add(responses.PUT, _URL, status=200, json={"dashboard": {"id": 1}})
+
+    response = transport.RequestsTransport().request(
+        "PUT", _URL, {"X-Api-Key": "API_KEY"}, (1.0, 2.0), data=b"{}"
+    )
+
+    assert 200 == response.status_code
+    assert {"dashboard": {"id": 1}} == response.json()
+    assert b"{}" == responses.calls[0].request.body
+    assert (1.0, 2.0) == responses.calls[0].request.req_kwargs["timeout"]
+
+
+@responses.activate
+def test_requests_transport_timeout():
+    responses.add(responses.GET, _URL, body=requests.Timeout("timed out"))
+
+    with pytest.raises(models.TransportTimeoutException):
+        transport.RequestsTransport().request("GET", _URL, {}, (1.0, 1.0))
+
+
+@responses.activate
+def test_requests_transport_connection_error():
+    responses.add(responses.GET, _URL, body=requests.ConnectionError("refused"))
+
+    with pytest.raises(models.TransportException):
+        transport.RequestsTransport(pool_size=4).request("GET", _URL, {}, (1.0, 1.0))
+
+
+def test_http2_transport_requires_httpx(monkeypatch):
+    monkeypatch.setitem(sys.modules, "httpx", None)
+
+    with pytest.raises(models.TransportException, match="nrdash\\[http2\\]"):
+        transport.create_transport(http2=True)
+
+
+def test_incomplete_transport_cannot_be_created():
+    class _IncompleteTransport(transport.Transport):
+        def close(self):
+            pass
+
+    with pytest.raises(TypeError, match="request"):
+        _IncompleteTransport()
@@ -0,0 +1,214 @@
+"""Tests for verifying widget queries against the query API."""
+import json
+import os
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import responses
+from click.testing import CliRunner
+
+from nrdash import http_cache, main, models, verification
+
+_QUERY_URL = "https://insights-api.newrelic.com/v1/accounts/1/query"
+
+
+def test_collect_queries_deduplicates_widget_queries():
+    dashboards = [
+        _create_dashboard("first", ["SELECT 1", "SELECT 2"]),
+        _create_dashboard("second", ["SELECT 1"]),
+    ]
+
+    queries = verification.collect_queries(dashboards)
+
+    assert {
+        "SELECT 1": [("first", "Widget 0"), ("second", "Widget 0")],
+        "SELECT 2": [("first", "Widget 1")],
+    } == queries
+
+
+@pytest.mark.parametrize(
+    "nrql, expected",
+    [
+        (
+            "SELECT count(*) FROM Transaction",
+            "SELECT count(*) FROM Transaction SINCE 5 minutes ago",
+        ),
+        (
+            "SELECT count(*) FROM Transaction since 1 day ago",
+            "SELECT count(*) FROM Transaction since 1 day ago",
+        ),
+    ],
+)
+def test_limit_time_window(nrql, expected):
+    assert expected == verification.limit_time_window(nrql)
+
+
+@responses.activate
+def test_verify_queries():
+    bodies = {
+        "SELECT count(*) FROM Transaction SINCE 5 minutes ago": (
+            200,
+            {"results": [{"count": 12}]},
+        ),
+        "SELECT count(*) FROM Missing SINCE 5 minutes ago": (
+            200,
+            {"results": [{"count": 0}]},
+        ),
+        "SELECT count(*) FROM Transaction FACET appName SINCE 5 minutes ago": (
+            200,
+            {"facets": [{"name": "checkout", "results": [{"count": 3}]}]},
+        ),
+        "SELECT cuont(*) FROM Transaction SINCE 5 minutes ago": (
+            400,
+            {"error": "Unknown function cuont"},
+        ),
+    }
+    responses.add_callback(
+        responses.GET,
+        _QUERY_URL,
+        callback=lambda request: (
+            bodies[request.params["nrql"]][0],
+            {},
+            json.dumps(bodies[request.params["nrql"]][1]),
+        ),
+    )
+    queries = {
+        nrql.replace(" SINCE 5 minutes ago", ""): [("dashboard", "Widget")]
+        for nrql in bodies
+    }
+
+    results = verification.verify_queries(_create_client(), queries)
+
+    assert {
+        "SELECT count(*) FROM Transaction": (verification.QueryStatus.OK, None),
+        "SELECT count(*) FROM Missing": (verification.QueryStatus.NO_DATA, None),
+        "SELECT count(*) FROM Transaction FACET appName": (
+            verification.QueryStatus.OK,
+            None,
+        ),
+        "SELECT cuont(*) FROM Transaction": (
+            verification.QueryStatus.ERROR,
+            "Unknown function cuont",
+        ),
+    } == {result.nrql: (result.status, result.error) for result in results}
+    assert "QUERY_KEY" == responses.calls[0].request.headers["X-Query-Key"]
+
+
+@responses.activate
+def test_query_results_are_cached():
+    responses.add(responses.GET, _QUERY_URL, json={"results": [{"count": 1}]})
+    client = _create_client(response_cache=http_cache.ResponseCache(ttl=60))
+
+    first = client.query("SELECT 1")
+    second = client.query("SELECT 1")
+    client.query("SELECT 2")
+
+    assert first == second
+    assert 2 == len(responses.calls)
+
+
+@pytest.mark.parametrize("status", [401, 403, 429, 503])
+@responses.activate
+def test_transient_errors_are_not_cached(status):
+    responses.add(responses.GET, _QUERY_URL, status=status)
+    client = _create_client(response_cache=http_cache.ResponseCache(ttl=60))
+
+    client.query("SELECT 1")
+    client.query("SELECT 1")
+
+    assert 2 == len(responses.calls)
+
+
+@responses.activate
+def test_invalid_nrql_is_cached():
+    responses.add(responses.GET, _QUERY_URL, status=400, json={"error": "Bad NRQL"})
+    client = _create_client(response_cache=http_cache.ResponseCache(ttl=60))
+
+    client.query("SELEKT 1")
+    client.query("SELEKT 1")
+
+    assert 1 == len(responses.calls)
+
+
+@responses.activate
+def test_query_results_are_cached_per_query_key():
+    responses.add(responses.GET, _QUERY_URL, json={"results": [{"count": 1}]})
+    response_cache = http_cache.ResponseCache(ttl=60)
+
+    _create_client(response_cache=response_cache).query("SELECT 1")
+    verification.NrqlQueryClient(
+        "OTHER_QUERY_KEY", 1, response_cache=response_cache
+    ).query("SELECT 1")
+
+    assert 2 == len(responses.calls)
+
+
+def test_verify_command_against_stub_server():
+    received_queries = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # pylint: disable=invalid-name
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            received_queries.append(query["nrql"][0])
+            body = json.dumps({"results": [{"count": 1}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        result = CliRunner().invoke(
+            main.main,
+            [
+                "verify",
+                _get_test_file_path("dashboard_templates.yml"),
+                "--query-key",
+                "QUERY_KEY",
+                "--account-id",
+                "1",
+                "--query-url",
+                f"http://127.0.0.1:{server.server_port}/v1/accounts/{{account_id}}/query",
+            ],
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert 0 == result.exit_code, result.output
+    assert "Verifying 3 distinct queries used by 3 widgets" in result.output
+    assert 3 == len(received_queries)
+
+
+def _create_client(response_cache=None):
+    return verification.NrqlQueryClient("QUERY_KEY", 1, response_cache=response_cache)
+
+
+def _create_dashboard(name, queries):
+    return models.Dashboard(
+        name=name,
+        title=name,
+        widgets=[
+            models.Widget(
+                title=f"Widget {index}",
+                query=query,
+                visualization=models.WidgetVisualization.BILLBOARD,
+                row=1,
+                column=1,
+                width=1,
+                height=1,
+            )
+            for index, query in enumerate(queries)
+        ],
+    )
+
+
+def _get_test_file_path(file_name):
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(test_dir, "test_data", file_name)